@@ -0,0 +1,117 @@
+"""Cascata de providers: o modelo barato responde primeiro, o caro só se preciso.
+
+Cada resposta de um nível é avaliada por ``reject`` (JSON, schema,
+cobertura); se for recusada ou a chamada falhar, o mesmo prompt sobe para o
+próximo nível. A resposta do último nível é devolvida sem avaliação. O
+nível que respondeu fica em ``raw["tier"]`` e o ``raw`` das respostas
+recusadas em ``raw["attempts"]``, para que o consumo delas entre nas métricas
+da run.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Awaitable, Callable
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeLLMClient(LLMClient):
+    """``LLMClient`` que tenta ``tiers`` em ordem, ex.: ``[("local", ollama), ("openai", gpt)]``."""
+
+    def __init__(
+        self,
+        tiers: list[tuple[str, LLMClient]],
+        reject: Callable[[str], str | None],
+    ) -> None:
+        if not tiers:
+            raise ValueError("A cascata precisa de pelo menos um provider")
+        super().__init__(model=">".join(client.model for _name, client in tiers))
+        self.tiers = tiers
+        self.reject = reject
+
+    def _accepts(self, name: str, response: LLMResponse | None, error: Exception | None) -> bool:
+        if error is not None:
+            logger.warning("Cascata: nível %s falhou (%s); escalando", name, error)
+            return False
+        reason = self.reject(response.text)  # type: ignore[union-attr]
+        if reason:
+            logger.info("Cascata: resposta do nível %s recusada (%s); escalando", name, reason)
+            return False
+        return True
+
+    @staticmethod
+    def _tag(
+        response: LLMResponse, name: str, escalations: list[str], attempts: list[dict[str, Any]]
+    ) -> LLMResponse:
+        raw = dict(response.raw or {})
+        raw["tier"] = name
+        raw["escalated_from"] = escalations
+        raw["attempts"] = attempts
+        return LLMResponse(text=response.text, raw=raw)
+
+    def _run(self, call: Callable[[LLMClient], LLMResponse]) -> LLMResponse:
+        escalations: list[str] = []
+        attempts: list[dict[str, Any]] = []
+        *lower, (last_name, last) = self.tiers
+        for name, client in lower:
+            response, error = None, None
+            try:
+                response = call(client)
+            except Exception as e:  # noqa: BLE001 — qualquer falha escala
+                error = e
+            if self._accepts(name, response, error):
+                return self._tag(response, name, escalations, attempts)  # type: ignore[arg-type]
+            escalations.append(name)
+            if response is not None and isinstance(response.raw, dict):
+                attempts.append(response.raw)
+        return self._tag(call(last), last_name, escalations, attempts)
+
+    async def _arun(self, call: Callable[[LLMClient], Awaitable[LLMResponse]]) -> LLMResponse:
+        escalations: list[str] = []
+        attempts: list[dict[str, Any]] = []
+        *lower, (last_name, last) = self.tiers
+        for name, client in lower:
+            response, error = None, None
+            try:
+                response = await call(client)
+            except Exception as e:  # noqa: BLE001 — qualquer falha escala
+                error = e
+            if self._accepts(name, response, error):
+                return self._tag(response, name, escalations, attempts)  # type: ignore[arg-type]
+            escalations.append(name)
+            if response is not None and isinstance(response.raw, dict):
+                attempts.append(response.raw)
+        return self._tag(await call(last), last_name, escalations, attempts)
+
+    def complete(self, prompt: str) -> LLMResponse:
+        return self._run(lambda client: client.complete(prompt))
+
+    async def acomplete(self, prompt: str) -> LLMResponse:
+        return await self._arun(lambda client: client.acomplete(prompt))
+
+    def complete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        return self._run(lambda client: client.complete_json(prompt, schema))
+
+    async def acomplete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        return await self._arun(lambda client: client.acomplete_json(prompt, schema))
+
+    def cache_prefix(self, prefix: str) -> None:
+        for _name, client in self.tiers:
+            client.cache_prefix(prefix)
+
+    def max_input_tokens(self) -> int | None:
+        # O chunk precisa caber em todos os níveis
+        limits = [c.max_input_tokens() for _name, c in self.tiers]
+        known = [limit for limit in limits if limit is not None]
+        return min(known) if known else None
+
+    def close(self) -> None:
+        for _name, client in self.tiers:
+            client.close()
+
+    async def aclose(self) -> None:
+        for _name, client in self.tiers:
+            await client.aclose()
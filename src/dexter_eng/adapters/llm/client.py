@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
@@ -21,3 +22,57 @@ class LLMClient(ABC):
     @abstractmethod
     def complete(self, prompt: str) -> LLMResponse:
         """Envia prompt e retorna resposta estruturada."""
+
+    def complete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        """Como ``complete``, pedindo ao provider uma resposta JSON conforme ``schema``.
+
+        Providers com decodificação restrita por schema sobrescrevem este
+        método; o padrão ignora o schema e depende só das instruções do prompt.
+        """
+        return self.complete(prompt)
+
+    async def acomplete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        """Versão assíncrona de ``complete_json``."""
+        return await self.acomplete(prompt)
+
+    def cache_prefix(self, prefix: str) -> None:
+        """Informa o trecho inicial fixo dos próximos prompts (instruções do template).
+
+        Providers com cache de prefixo (KV cache do Ollama, prompt caching da
+        OpenAI) usam a dica para reaproveitar o processamento desse trecho
+        entre chamadas; o padrão a ignora.
+        """
+
+    def max_input_tokens(self) -> int | None:
+        """Tokens disponíveis para o prompt (janela de contexto menos a resposta).
+
+        ``None`` quando o provider não impõe um limite relevante para os chunks.
+        """
+        return None
+
+    async def acomplete(self, prompt: str) -> LLMResponse:
+        """Versão assíncrona de ``complete``.
+
+        Providers com cliente assíncrono nativo sobrescrevem este método; o
+        padrão executa ``complete`` numa thread para não bloquear o event loop.
+        """
+        return await asyncio.to_thread(self.complete, prompt)
+
+    def close(self) -> None:
+        """Libera conexões mantidas pelo provider (no-op por padrão)."""
+
+    async def aclose(self) -> None:
+        """Versão assíncrona de ``close``; também libera os recursos síncronos."""
+        self.close()
+
+    def __enter__(self) -> LLMClient:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    async def __aenter__(self) -> LLMClient:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
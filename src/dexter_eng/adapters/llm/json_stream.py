@@ -0,0 +1,77 @@
+"""Acompanhamento incremental de JSON em respostas via streaming.
+
+Modelos locais costumam continuar gerando comentários depois de fechar o
+objeto JSON pedido, até esgotar ``num_predict``. ``JsonStreamTracker``
+recebe os pedaços do stream e indica quando o primeiro objeto JSON de nível
+superior está completo e válido, para que o cliente possa encerrar a
+requisição sem esperar o ``done``. Listas só contam dentro do objeto: texto
+antes dele ("conforme item [1]: {...}") não encerra o stream.
+"""
+
+from __future__ import annotations
+
+import json
+
+# Só um objeto inicia o valor acompanhado; colchetes contam apenas no aninhamento
+_START = "{"
+_OPEN = "{["
+_CLOSE = "}]"
+
+
+class JsonStreamTracker:
+    """Balanceamento de chaves/colchetes fora de strings, em O(1) por caractere."""
+
+    def __init__(self) -> None:
+        self._buf: list[str] = []
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.end = -1  # offset (exclusivo) do fim do valor, quando completo
+
+    @property
+    def complete(self) -> bool:
+        return self.end >= 0
+
+    def feed(self, piece: str) -> bool:
+        """Consome mais texto; retorna True quando o valor JSON fechou e é válido."""
+        if self.complete:
+            return True
+        self._buf.append(piece)
+        for ch in piece:
+            pos = self._pos
+            self._pos += 1
+            if self._start < 0:
+                if ch == _START:
+                    self._start, self._depth = pos, 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in _OPEN:
+                self._depth += 1
+            elif ch in _CLOSE:
+                self._depth -= 1
+                if self._depth == 0 and self._closes_valid_value(pos + 1):
+                    self.end = pos + 1
+                    return True
+        return False
+
+    def _closes_valid_value(self, end: int) -> bool:
+        text = "".join(self._buf)
+        self._buf = [text]
+        try:
+            json.loads(text[self._start : end])
+        except json.JSONDecodeError:
+            # Fechamento espúrio (ex.: "{" solto no texto); procura o próximo valor
+            self._start = -1
+            self._in_string = self._escape = False
+            return False
+        return True
@@ -1,13 +1,45 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import threading
 import time
 import uuid
+from contextlib import nullcontext
 from typing import Any, Optional
 
 import httpx
 
 from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.adapters.llm.json_stream import JsonStreamTracker
+from dexter_eng.adapters.llm.usage import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+
+async def _close_when_cancelled(client: httpx.AsyncClient) -> None:
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await client.aclose()
+
+
+def _retire_aclient(
+    client: httpx.AsyncClient | None,
+    loop: asyncio.AbstractEventLoop | None,
+    guard: asyncio.Task | None,
+) -> None:
+    """Fecha, no próprio loop, um pool assíncrono que saiu de uso."""
+    if client is None or client.is_closed or loop is None:
+        return
+    if loop.is_closed():
+        # Loop fechado sem cancelar as tarefas (fora do asyncio.run)
+        logger.warning("Pool HTTP assíncrono do Ollama abandonado com o loop fechado")
+        return
+    if guard is not None:
+        loop.call_soon_threadsafe(guard.cancel)
+    asyncio.run_coroutine_threadsafe(client.aclose(), loop)
 
 
 class LocalOllamaClient(LLMClient):
@@ -17,11 +49,35 @@ class LocalOllamaClient(LLMClient):
     Interface compatível com o teu pipeline:
       - atributo: model (str)
       - método: complete(prompt:str) -> LLMResponse(text, raw)
+      - método: acomplete(prompt:str) -> LLMResponse (coroutine)
+
+    As conexões HTTP ficam num pool persistente (keep-alive), compartilhado
+    entre chamadas e threads; o cliente assíncrono tem um pool próprio por
+    event loop. Feche com ``close()``/``aclose()`` ou use como context manager.
+
+    Com ``stop_on_json`` (padrão), o stream é encerrado assim que o primeiro
+    objeto JSON da resposta fecha e é válido; o texto gerado depois dele
+    (comentários do modelo) não é esperado nem devolvido.
+
+    ``keep_alive`` (ex.: ``"5m"``, ``-1`` = sempre, ``0`` = descarrega) vai em
+    toda requisição e controla quanto tempo o modelo fica na memória depois
+    dela. ``warm_up=True`` carrega o modelo já na criação do cliente, para
+    que a primeira extração não pague o carregamento; ``pin()``/``unpin()``
+    mantêm o modelo residente durante um batch.
+
+    O Ollama reaproveita o KV cache do maior prefixo em comum com o prompt
+    anterior. Com ``cache_prefix``, prompts que começam pelo prefixo
+    informado levam ``num_keep`` (o prefixo não sai da janela quando o
+    contexto é deslocado) e ``raw["prefix_chars"]`` para as métricas.
 
     Depende de:
       pip install httpx
     """
 
+    # Só uma chamada por vez exibe o spinner: o rich não permite dois
+    # displays "live" simultâneos (chamadas concorrentes do map-reduce).
+    _progress_lock = threading.Lock()
+
     def __init__(
         self,
         model: str = "mistral",
@@ -31,6 +87,11 @@ class LocalOllamaClient(LLMClient):
         num_ctx: int = 8192,
         num_predict: int = 2048,
         seed: Optional[int] = 42,
+        max_connections: int = 16,
+        keepalive_expiry_s: float = 30.0,
+        stop_on_json: bool = True,
+        keep_alive: str | int | None = None,
+        warm_up: bool = False,
     ) -> None:
         super().__init__(model=model)
         self.base_url = base_url.rstrip("/")
@@ -39,10 +100,82 @@ class LocalOllamaClient(LLMClient):
         self.num_ctx = num_ctx
         self.num_predict = num_predict
         self.seed = seed
+        self.stop_on_json = stop_on_json
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry_s,
+        )
+        self._client: httpx.Client | None = None
+        self._aclient: httpx.AsyncClient | None = None
+        self._aclient_loop: asyncio.AbstractEventLoop | None = None
+        self._aclient_guard: asyncio.Task | None = None
+        self._client_lock = threading.Lock()
+        self.keep_alive = keep_alive
+        self._configured_keep_alive = keep_alive
+        # Tempo de carga do modelo medido no aquecimento (separado da geração)
+        self.warmup_load_s: float | None = None
+        self._prefix = ""
+        if warm_up:
+            self.warm_up()
+
+    def _http(self) -> httpx.Client:
+        """Cliente síncrono compartilhado, criado na primeira chamada."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self.timeout_s, limits=self.limits)
+            return self._client
+
+    def _ahttp(self) -> httpx.AsyncClient:
+        """Cliente assíncrono do event loop atual.
 
-    def _payload(self, prompt: str) -> dict[str, Any]:
+        Conexões de um ``AsyncClient`` ficam presas ao loop em que foram
+        abertas; se o loop mudou (outro ``asyncio.run``), abre um pool novo.
+        Uma tarefa-guarda no loop fecha o pool quando ela é cancelada, o que
+        ``asyncio.run`` faz com as tarefas pendentes antes de fechar o loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            if self._aclient is not None and self._aclient_loop is loop:
+                return self._aclient
+            stale = (self._aclient, self._aclient_loop, self._aclient_guard)
+            self._aclient = httpx.AsyncClient(timeout=self.timeout_s, limits=self.limits)
+            self._aclient_loop = loop
+            self._aclient_guard = loop.create_task(_close_when_cancelled(self._aclient))
+            aclient = self._aclient
+        _retire_aclient(*stale)
+        return aclient
+
+    def close(self) -> None:
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        with self._client_lock:
+            aclient, self._aclient = self._aclient, None
+            loop, self._aclient_loop = self._aclient_loop, None
+            guard, self._aclient_guard = self._aclient_guard, None
+        if aclient is not None and loop is asyncio.get_running_loop():
+            guard.cancel()
+            await aclient.aclose()
+        else:
+            _retire_aclient(aclient, loop, guard)
+        self.close()
+
+    def max_input_tokens(self) -> int | None:
+        return max(1, self.num_ctx - self.num_predict)
+
+    def cache_prefix(self, prefix: str) -> None:
+        self._prefix = prefix
+
+    def _prefix_chars(self, prompt: str) -> int:
+        return len(self._prefix) if self._prefix and prompt.startswith(self._prefix) else 0
+
+    def _payload(self, prompt: str, schema: dict[str, Any] | None = None) -> dict[str, Any]:
         # /api/generate: simples e direto (não-chat), bom pra “retorne APENAS JSON”
-        return {
+        payload: dict[str, Any] = {
             "model": self.model,
             "prompt": prompt,
             "stream": True,  # ATIVAR STREAMING
@@ -53,69 +186,224 @@ class LocalOllamaClient(LLMClient):
                 **({"seed": self.seed} if self.seed is not None else {}),
             },
         }
+        prefix_chars = self._prefix_chars(prompt)
+        if prefix_chars:
+            payload["options"]["num_keep"] = int(prefix_chars / CHARS_PER_TOKEN)
+        if schema is not None:
+            # Decodificação restrita pela gramática do schema (Ollama >= 0.5)
+            payload["format"] = schema
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def _load(self, keep_alive: str | int | None) -> dict[str, Any]:
+        """Requisição sem prompt: só carrega o modelo (ou ajusta a residência)."""
+        payload: dict[str, Any] = {"model": self.model, "prompt": "", "stream": False}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        r = self._http().post(f"{self.base_url}/api/generate", json=payload)
+        r.raise_for_status()
+        return r.json()
+
+    def warm_up(self) -> float | None:
+        """Carrega o modelo na memória; retorna o tempo de carga em segundos.
+
+        Falhas (Ollama fora do ar) só geram aviso: a primeira chamada real
+        vai reportar o erro.
+        """
+        t0 = time.monotonic()
+        try:
+            body = self._load(self.keep_alive)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Aquecimento do modelo %s falhou: %s", self.model, e)
+            return None
+        load_ns = body.get("load_duration")
+        self.warmup_load_s = load_ns / 1e9 if load_ns else time.monotonic() - t0
+        logger.info("Modelo %s carregado em %.2fs", self.model, self.warmup_load_s)
+        return self.warmup_load_s
+
+    def pin(self) -> None:
+        """Mantém o modelo carregado indefinidamente (``keep_alive=-1``)."""
+        self.keep_alive = -1
+        self.warm_up()
+
+    def unpin(self) -> None:
+        """Volta ao ``keep_alive`` configurado, que passa a contar a partir de agora."""
+        self.keep_alive = self._configured_keep_alive
+        try:
+            self._load(self.keep_alive if self.keep_alive is not None else "5m")
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Não foi possível liberar o modelo %s: %s", self.model, e)
 
     def complete(self, prompt: str) -> LLMResponse:
+        return self._generate(prompt)
+
+    def complete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        return self._generate(prompt, schema)
+
+    async def acomplete(self, prompt: str) -> LLMResponse:
+        """Versão assíncrona de ``complete`` (sem spinner), via ``httpx.AsyncClient``."""
+        return await self._agenerate(prompt)
+
+    async def acomplete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        return await self._agenerate(prompt, schema)
+
+    def _generate(self, prompt: str, schema: dict[str, Any] | None = None) -> LLMResponse:
         from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 
         request_id = f"ollama_{uuid.uuid4().hex}"
         t0 = time.monotonic()
 
         url = f"{self.base_url}/api/generate"
-        payload = self._payload(prompt)
+        payload = self._payload(prompt, schema)
 
         full_text = []
         full_response_debug = {}
+        tracker = JsonStreamTracker() if self.stop_on_json else None
+        ttft: float | None = None
 
         # Contexto de progresso visual
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            TimeElapsedColumn(),
-            transient=True,
-        ) as progress:
-            task = progress.add_task(f"[cyan]Gerando com {self.model}...", total=None)
-
-            try:
-                with httpx.Client(timeout=self.timeout_s) as client:
-                    with client.stream("POST", url, json=payload) as r:
+        show_progress = self._progress_lock.acquire(blocking=False)
+        progress_ctx = (
+            Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                TimeElapsedColumn(),
+                transient=True,
+            )
+            if show_progress
+            else nullcontext()
+        )
+        try:
+            with progress_ctx as progress:
+                if progress is not None:
+                    progress.add_task(f"[cyan]Gerando com {self.model}...", total=None)
+
+                try:
+                    with self._http().stream("POST", url, json=payload) as r:
                         r.raise_for_status()
 
                         for line in r.iter_lines():
-                            if not line:
-                                continue
-                            try:
-                                chunk = json.loads(line)
-                                # Capta o pedaço de texto
-                                content = chunk.get("response", "")
-                                if content:
-                                    full_text.append(content)
-                                    # Atualiza spinner com contagem parcial (opcional)
-                                    # progress.update(task, description=f"[cyan]Gerando... ({len(full_text)} tokens)")
-                                
-                                if chunk.get("done"):
-                                    full_response_debug = chunk
-                            except json.JSONDecodeError:
-                                pass
-            except httpx.ReadTimeout:
-                # Se estourar o timeout, retornamos o que temos ou erro
-                raise TimeoutError(f"Ollama excedeu o tempo limite de {self.timeout_s}s")
-
-        text = "".join(full_text).strip()
+                            last = self._consume_line(line, full_text, tracker)
+                            if ttft is None and full_text:
+                                ttft = time.monotonic() - t0
+                            if last is not None:
+                                full_response_debug = last
+                            if tracker is not None and tracker.complete:
+                                break
+                except httpx.ReadTimeout:
+                    # Se estourar o timeout, retornamos o que temos ou erro
+                    raise TimeoutError(f"Ollama excedeu o tempo limite de {self.timeout_s}s")
+        finally:
+            if show_progress:
+                self._progress_lock.release()
+
+        return self._build_response(
+            request_id,
+            t0,
+            full_text,
+            full_response_debug,
+            tracker,
+            ttft,
+            len(prompt),
+            self._prefix_chars(prompt),
+        )
+
+    async def _agenerate(
+        self, prompt: str, schema: dict[str, Any] | None = None
+    ) -> LLMResponse:
+        request_id = f"ollama_{uuid.uuid4().hex}"
+        t0 = time.monotonic()
+
+        url = f"{self.base_url}/api/generate"
+        payload = self._payload(prompt, schema)
+
+        full_text: list[str] = []
+        full_response_debug: dict[str, Any] = {}
+        tracker = JsonStreamTracker() if self.stop_on_json else None
+        ttft: float | None = None
+
+        try:
+            async with self._ahttp().stream("POST", url, json=payload) as r:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    last = self._consume_line(line, full_text, tracker)
+                    if ttft is None and full_text:
+                        ttft = time.monotonic() - t0
+                    if last is not None:
+                        full_response_debug = last
+                    if tracker is not None and tracker.complete:
+                        break
+        except httpx.ReadTimeout:
+            raise TimeoutError(f"Ollama excedeu o tempo limite de {self.timeout_s}s")
+
+        return self._build_response(
+            request_id,
+            t0,
+            full_text,
+            full_response_debug,
+            tracker,
+            ttft,
+            len(prompt),
+            self._prefix_chars(prompt),
+        )
+
+    @staticmethod
+    def _consume_line(
+        line: str, full_text: list[str], tracker: JsonStreamTracker | None = None
+    ) -> Optional[dict[str, Any]]:
+        """Processa uma linha NDJSON do stream; retorna o chunk final quando ``done``."""
+        if not line:
+            return None
+        try:
+            chunk = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        # Capta o pedaço de texto
+        content = chunk.get("response", "")
+        if content:
+            full_text.append(content)
+            if tracker is not None:
+                tracker.feed(content)
+        return chunk if chunk.get("done") else None
+
+    def _build_response(
+        self,
+        request_id: str,
+        t0: float,
+        full_text: list[str],
+        last_chunk: dict[str, Any],
+        tracker: JsonStreamTracker | None = None,
+        ttft: float | None = None,
+        prompt_chars: int = 0,
+        prefix_chars: int = 0,
+    ) -> LLMResponse:
+        text = "".join(full_text)
+        # Encerrado antes do ``done``: descarta o que veio depois do JSON
+        stopped_early = not last_chunk and tracker is not None and tracker.complete
+        if stopped_early:
+            text = text[: tracker.end]  # type: ignore[union-attr]
+        text = text.strip()
 
         raw = {
             "id": request_id,
             "provider": "ollama",
             "model": self.model,
             "elapsed_s": round(time.monotonic() - t0, 3),
-            "ollama_last_chunk": full_response_debug,
+            "ollama_last_chunk": last_chunk,
+            "stopped_early": stopped_early,
+            "prompt_chars": prompt_chars,
+            "prefix_chars": prefix_chars,
+            "ttft_s": round(ttft, 3) if ttft is not None else None,
+            # Cada linha do stream traz um token; serve de contagem sem o ``done``
+            "tokens_streamed": len(full_text),
         }
         return LLMResponse(text=text, raw=raw)
 
     def ping(self) -> bool:
         """Verifica se o Ollama está acessível."""
         try:
-            with httpx.Client(timeout=3.0) as client:
-                r = client.get(f"{self.base_url}/api/tags")
-                return r.status_code == 200
+            r = self._http().get(f"{self.base_url}/api/tags", timeout=3.0)
+            return r.status_code == 200
         except Exception:
             return False
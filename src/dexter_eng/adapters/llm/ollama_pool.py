@@ -0,0 +1,252 @@
+"""Balanceamento de carga entre vários servidores Ollama.
+
+Cada requisição vai para o host saudável menos carregado: o custo estimado é
+o número de requisições em voo dividido pela vazão recente do host (tokens/s
+por média móvel), de modo que uma GPU mais rápida recebe mais chunks. Um host
+que falha (conexão recusada/caída ou HTTP 5xx) sai do rodízio e a requisição
+é refeita em outro; timeouts e erros causados pelo próprio prompt (4xx,
+resposta inválida) são repassados sem tirar o host. Uma thread de fundo usa
+``ping()`` para tirar e devolver hosts ao rodízio.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.adapters.llm.local_ollama_client import LocalOllamaClient
+from dexter_eng.adapters.llm.usage import usage_from_raw
+
+logger = logging.getLogger(__name__)
+
+# Peso da última medição na média móvel de tokens/s
+_EWMA_ALPHA = 0.3
+
+
+@dataclass
+class _Host:
+    client: LocalOllamaClient
+    in_flight: int = 0
+    tokens_per_s: float | None = None
+    healthy: bool = True
+    requests: int = 0
+
+    @property
+    def url(self) -> str:
+        return self.client.base_url
+
+
+def _is_host_failure(exc: BaseException) -> bool:
+    """Falha do servidor (vale tentar outro host), e não da requisição."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    if isinstance(exc, httpx.TimeoutException):
+        # Só o timeout de conexão indica host fora; leitura lenta é do prompt
+        return isinstance(exc, httpx.ConnectTimeout)
+    return isinstance(exc, httpx.TransportError)
+
+
+class OllamaPoolClient(LLMClient):
+    """``LLMClient`` sobre vários ``LocalOllamaClient`` (um por host).
+
+    ``client_options`` é repassado a cada ``LocalOllamaClient`` (timeout,
+    ``num_ctx``, ``keep_alive``...). Com ``health_interval_s > 0`` uma thread
+    daemon verifica os hosts periodicamente; ``close()`` a encerra.
+    """
+
+    def __init__(
+        self,
+        endpoints: list[str],
+        model: str = "mistral",
+        health_interval_s: float = 15.0,
+        **client_options: Any,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("O pool do Ollama precisa de pelo menos um endpoint")
+        super().__init__(model=model)
+        warm_up = client_options.pop("warm_up", False)
+        self.hosts = [
+            _Host(LocalOllamaClient(model=model, base_url=url, **client_options))
+            for url in endpoints
+        ]
+        if warm_up:
+            self.warm_up()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread: threading.Thread | None = None
+        if health_interval_s > 0:
+            self._health_thread = threading.Thread(
+                target=self._health_loop,
+                args=(health_interval_s,),
+                name="dexter-ollama-health",
+                daemon=True,
+            )
+            self._health_thread.start()
+
+    # -- Roteamento -------------------------------------------------------
+
+    def _speed(self, host: _Host) -> float:
+        if host.tokens_per_s:
+            return host.tokens_per_s
+        # Host ainda sem medição: assume a média dos demais
+        known = [h.tokens_per_s for h in self.hosts if h.tokens_per_s]
+        return sum(known) / len(known) if known else 1.0
+
+    def _acquire(self, tried: set[str]) -> _Host | None:
+        """Escolhe o host de menor carga relativa e reserva uma vaga nele."""
+        with self._lock:
+            candidates = [h for h in self.hosts if h.url not in tried]
+            healthy = [h for h in candidates if h.healthy]
+            # Todos fora do rodízio: tenta mesmo assim em vez de falhar direto
+            pool = healthy or candidates
+            if not pool:
+                return None
+            host = min(pool, key=lambda h: ((h.in_flight + 1) / self._speed(h), h.requests))
+            host.in_flight += 1
+            host.requests += 1
+            return host
+
+    def _release(self, host: _Host, response: LLMResponse | None, error: Exception | None) -> None:
+        with self._lock:
+            host.in_flight -= 1
+            if error is not None:
+                if _is_host_failure(error):
+                    if host.healthy:
+                        logger.warning("Ollama %s fora do rodízio: %s", host.url, error)
+                    host.healthy = False
+                return
+            usage = usage_from_raw(response.raw if response else None)
+            speed = usage.tokens_per_s if usage else None
+            if speed:
+                host.tokens_per_s = (
+                    speed
+                    if host.tokens_per_s is None
+                    else _EWMA_ALPHA * speed + (1 - _EWMA_ALPHA) * host.tokens_per_s
+                )
+
+    @staticmethod
+    def _tag(response: LLMResponse, host: _Host) -> LLMResponse:
+        raw = dict(response.raw or {})
+        raw["host"] = host.url
+        return LLMResponse(text=response.text, raw=raw)
+
+    def _run(self, call: Callable[[LocalOllamaClient], LLMResponse]) -> LLMResponse:
+        tried: set[str] = set()
+        last_error: Exception | None = None
+        while (host := self._acquire(tried)) is not None:
+            tried.add(host.url)
+            response, error = None, None
+            try:
+                response = call(host.client)
+            except Exception as e:  # noqa: BLE001 — classificada em _release
+                error = last_error = e
+            self._release(host, response, error)
+            if error is None:
+                return self._tag(response, host)  # type: ignore[arg-type]
+            if not _is_host_failure(error):
+                raise error
+        raise last_error or RuntimeError("Nenhum host Ollama disponível")
+
+    async def _arun(
+        self, call: Callable[[LocalOllamaClient], Awaitable[LLMResponse]]
+    ) -> LLMResponse:
+        tried: set[str] = set()
+        last_error: Exception | None = None
+        while (host := self._acquire(tried)) is not None:
+            tried.add(host.url)
+            response, error = None, None
+            try:
+                response = await call(host.client)
+            except Exception as e:  # noqa: BLE001 — classificada em _release
+                error = last_error = e
+            self._release(host, response, error)
+            if error is None:
+                return self._tag(response, host)  # type: ignore[arg-type]
+            if not _is_host_failure(error):
+                raise error
+        raise last_error or RuntimeError("Nenhum host Ollama disponível")
+
+    def complete(self, prompt: str) -> LLMResponse:
+        return self._run(lambda client: client.complete(prompt))
+
+    async def acomplete(self, prompt: str) -> LLMResponse:
+        return await self._arun(lambda client: client.acomplete(prompt))
+
+    def complete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        return self._run(lambda client: client.complete_json(prompt, schema))
+
+    async def acomplete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        return await self._arun(lambda client: client.acomplete_json(prompt, schema))
+
+    # -- Saúde dos hosts --------------------------------------------------
+
+    def check_health(self) -> None:
+        """Pinga todos os hosts e atualiza o rodízio."""
+        for host in self.hosts:
+            ok = host.client.ping()
+            with self._lock:
+                if ok and not host.healthy:
+                    logger.info("Ollama %s de volta ao rodízio", host.url)
+                elif not ok and host.healthy:
+                    logger.warning("Ollama %s não responde ao ping; fora do rodízio", host.url)
+                host.healthy = ok
+
+    def _health_loop(self, interval_s: float) -> None:
+        while not self._stop.wait(interval_s):
+            try:
+                self.check_health()
+            except Exception as e:  # noqa: BLE001 — a thread não pode morrer
+                logger.warning("Verificação de saúde do Ollama falhou: %s", e)
+
+    def ping(self) -> bool:
+        return any(host.client.ping() for host in self.hosts)
+
+    # -- Repasses para todos os hosts -------------------------------------
+
+    def cache_prefix(self, prefix: str) -> None:
+        for host in self.hosts:
+            host.client.cache_prefix(prefix)
+
+    def max_input_tokens(self) -> int | None:
+        limits = [host.client.max_input_tokens() for host in self.hosts]
+        known = [limit for limit in limits if limit is not None]
+        return min(known) if known else None
+
+    def _each_host(self, method: Callable[[LocalOllamaClient], Any]) -> None:
+        """Executa ``method`` em todos os hosts ao mesmo tempo (carga de modelo)."""
+        with ThreadPoolExecutor(len(self.hosts), thread_name_prefix="dexter-ollama-load") as pool:
+            list(pool.map(lambda host: method(host.client), self.hosts))
+
+    def warm_up(self) -> None:
+        self._each_host(LocalOllamaClient.warm_up)
+
+    def pin(self) -> None:
+        self._each_host(LocalOllamaClient.pin)
+
+    def unpin(self) -> None:
+        for host in self.hosts:
+            host.client.unpin()
+
+    @property
+    def warmup_load_s(self) -> float | None:
+        # warm_up/pin carregam os hosts em paralelo: vale o mais lento
+        loads = [h.client.warmup_load_s for h in self.hosts if h.client.warmup_load_s is not None]
+        return max(loads) if loads else None
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._health_thread is not None and self._health_thread is not threading.current_thread():
+            self._health_thread.join(timeout=5.0)
+        for host in self.hosts:
+            host.client.close()
+
+    async def aclose(self) -> None:
+        for host in self.hosts:
+            await host.client.aclose()
+        self.close()
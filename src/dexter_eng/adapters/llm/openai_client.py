@@ -1,28 +1,150 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
+import re
+import time
+from typing import Any
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
 
 logger = logging.getLogger(__name__)
 
+# Palavras-chave de validação que o modo estrito de structured outputs recusa
+_UNSUPPORTED_KEYWORDS = frozenset(
+    {
+        "default",
+        "format",
+        "pattern",
+        "minLength",
+        "maxLength",
+        "minimum",
+        "maximum",
+        "exclusiveMinimum",
+        "exclusiveMaximum",
+        "minItems",
+        "maxItems",
+    }
+)
+
+
+def strict_json_schema(schema: Any, _properties: bool = False) -> Any:
+    """Adapta um JSON Schema (ex.: do pydantic) ao modo ``strict`` da OpenAI.
+
+    Todo objeto passa a listar todas as propriedades em ``required`` e a
+    proibir propriedades extras; palavras-chave não suportadas são removidas
+    (a validação completa continua no pydantic).
+    """
+    if isinstance(schema, list):
+        return [strict_json_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    if _properties:
+        # Chaves aqui são nomes de campos, não palavras-chave
+        return {name: strict_json_schema(sub) for name, sub in schema.items()}
+    out = {
+        key: strict_json_schema(value, _properties=key in ("properties", "$defs"))
+        for key, value in schema.items()
+        if key not in _UNSUPPORTED_KEYWORDS
+    }
+    if out.get("type") == "object" and "properties" in out:
+        out["required"] = list(out["properties"])
+        out["additionalProperties"] = False
+    return out
+
+
+def _response_format(schema: dict[str, Any]) -> dict[str, Any]:
+    name = re.sub(r"[^a-zA-Z0-9_-]", "_", str(schema.get("title") or "response"))[:64]
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": strict_json_schema(schema), "strict": True},
+    }
+
 
 class OpenAILLMClient(LLMClient):
-    def __init__(self, model: str, api_key: str | None = None):
+    def __init__(self, model: str, api_key: str | None = None, max_retries: int = 2):
         resolved_key = api_key or os.environ.get("OPENAI_API_KEY")
         super().__init__(model=model, api_key=resolved_key)
-        self.client = OpenAI(api_key=resolved_key)
+        # max_retries=0 quando as novas tentativas ficam a cargo do RateLimitedClient
+        self.client = OpenAI(api_key=resolved_key, max_retries=max_retries)
+        self.async_client = AsyncOpenAI(api_key=resolved_key, max_retries=max_retries)
+        self._prompt_cache_key: str | None = None
         logger.info("OpenAI client inicializado (model=%s)", model)
 
+    def cache_prefix(self, prefix: str) -> None:
+        # O prompt caching é automático para prefixos idênticos (>= 1024
+        # tokens); a chave agrupa as requisições com o mesmo template no
+        # mesmo servidor, o que aumenta a taxa de acerto do cache.
+        digest = hashlib.sha256(prefix.encode()).hexdigest()[:16]
+        self._prompt_cache_key = f"dexter-{digest}"
+
+    def _extra(self) -> dict[str, Any]:
+        if self._prompt_cache_key is None:
+            return {}
+        return {"extra_body": {"prompt_cache_key": self._prompt_cache_key}}
+
+    @staticmethod
+    def _response(text: str, resp: Any, t0: float) -> LLMResponse:
+        raw = resp.model_dump()
+        raw["elapsed_s"] = round(time.monotonic() - t0, 3)
+        return LLMResponse(text=text, raw=raw)
+
     def complete(self, prompt: str) -> LLMResponse:
         logger.debug("Enviando prompt para OpenAI (%d chars)", len(prompt))
+        t0 = time.monotonic()
         resp = self.client.chat.completions.create(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
+            **self._extra(),
+        )
+        text = resp.choices[0].message.content or ""
+        logger.info("Resposta recebida da OpenAI (%d chars)", len(text))
+        return self._response(text, resp, t0)
+
+    async def acomplete(self, prompt: str) -> LLMResponse:
+        logger.debug("Enviando prompt para OpenAI async (%d chars)", len(prompt))
+        t0 = time.monotonic()
+        resp = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            **self._extra(),
         )
         text = resp.choices[0].message.content or ""
         logger.info("Resposta recebida da OpenAI (%d chars)", len(text))
-        return LLMResponse(text=text, raw=resp.model_dump())
+        return self._response(text, resp, t0)
+
+    def complete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        logger.debug("Enviando prompt para OpenAI com schema (%d chars)", len(prompt))
+        t0 = time.monotonic()
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            response_format=_response_format(schema),
+            **self._extra(),
+        )
+        text = resp.choices[0].message.content or ""
+        logger.info("Resposta estruturada recebida da OpenAI (%d chars)", len(text))
+        return self._response(text, resp, t0)
+
+    async def acomplete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        logger.debug("Enviando prompt para OpenAI async com schema (%d chars)", len(prompt))
+        t0 = time.monotonic()
+        resp = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            response_format=_response_format(schema),
+            **self._extra(),
+        )
+        text = resp.choices[0].message.content or ""
+        logger.info("Resposta estruturada recebida da OpenAI (%d chars)", len(text))
+        return self._response(text, resp, t0)
+
+    def close(self) -> None:
+        self.client.close()
+
+    async def aclose(self) -> None:
+        await self.async_client.close()
+        self.close()
@@ -0,0 +1,295 @@
+"""Agendamento de chamadas à LLM dentro dos limites de RPM/TPM da conta.
+
+``RateLimiter`` mantém dois baldes (requisições e tokens por minuto) que
+se reabastecem continuamente e serve os pedidos numa fila justa: cada
+documento (``request_lane``) tem sua fila e as filas são atendidas em
+rodízio, para que um edital com centenas de chunks não monopolize a cota.
+``RateLimitedClient`` envolve qualquer ``LLMClient``: reserva a cota antes
+de cada chamada, acerta os tokens pelo ``usage`` real da resposta e, em
+429/5xx, respeita o ``Retry-After`` ou recua exponencialmente com jitter,
+pausando todo o agendador (não só a chamada que falhou).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+# Fração dos limites da conta efetivamente usada (margem para outros clientes)
+HEADROOM = 0.9
+
+# Estimativa de tokens para reservar a cota antes da chamada (~3,5 chars/token)
+CHARS_PER_TOKEN = 3.5
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+_lane: contextvars.ContextVar[str] = contextvars.ContextVar("dexter_llm_lane", default="")
+
+
+@contextmanager
+def request_lane(key: str) -> Iterator[None]:
+    """Associa as chamadas à LLM feitas neste contexto à fila ``key`` (ex.: o documento)."""
+    token = _lane.set(key)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class RateLimiter:
+    """Baldes de RPM/TPM com fila justa entre ``request_lane``.
+
+    ``rpm``/``tpm`` iguais a 0 desativam o respectivo limite. Seguro entre
+    threads; ``acquire`` bloqueia a thread, ``aacquire`` só o event loop atual.
+    """
+
+    def __init__(
+        self,
+        rpm: int = 0,
+        tpm: int = 0,
+        headroom: float = HEADROOM,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.request_capacity = rpm * headroom
+        self.token_capacity = tpm * headroom
+        self._clock = clock
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lanes: OrderedDict[str, deque[int]] = OrderedDict()
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if self.request_capacity:
+            self._requests = min(
+                self.request_capacity, self._requests + elapsed * self.request_capacity / 60
+            )
+        if self.token_capacity:
+            self._tokens = min(
+                self.token_capacity, self._tokens + elapsed * self.token_capacity / 60
+            )
+
+    def _enqueue(self, lane: str) -> int:
+        with self._cond:
+            ticket = next(self._tickets)
+            self._lanes.setdefault(lane, deque()).append(ticket)
+            return ticket
+
+    def _try_take(self, ticket: int, lane: str, tokens: int) -> float:
+        """Concede a cota se for a vez de ``ticket``; senão, segundos até tentar de novo."""
+        now = self._clock()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        head_lane, queue = next(iter(self._lanes.items()))
+        if head_lane != lane or queue[0] != ticket:
+            return 0.05
+        if self.token_capacity:
+            tokens = min(tokens, int(self.token_capacity))
+        wait = 0.0
+        if self.request_capacity and self._requests < 1:
+            wait = (1 - self._requests) * 60 / self.request_capacity
+        if self.token_capacity and self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60 / self.token_capacity)
+        if wait > 0:
+            return wait
+        self._requests -= 1
+        self._tokens -= tokens
+        # Rodízio: a fila atendida vai para o fim
+        queue.popleft()
+        self._lanes.move_to_end(lane)
+        if not queue:
+            del self._lanes[lane]
+        self._cond.notify_all()
+        return 0.0
+
+    def _cancel(self, ticket: int, lane: str) -> None:
+        with self._cond:
+            queue = self._lanes.get(lane)
+            if queue is not None and ticket in queue:
+                queue.remove(ticket)
+                if not queue:
+                    del self._lanes[lane]
+                self._cond.notify_all()
+
+    def acquire(self, tokens: int, lane: str | None = None) -> None:
+        """Bloqueia até haver cota para uma requisição de ``tokens``."""
+        lane = _lane.get() if lane is None else lane
+        ticket = self._enqueue(lane)
+        try:
+            with self._cond:
+                while (wait := self._try_take(ticket, lane, tokens)) > 0:
+                    self._cond.wait(timeout=wait)
+        except BaseException:
+            self._cancel(ticket, lane)
+            raise
+
+    async def aacquire(self, tokens: int, lane: str | None = None) -> None:
+        """Versão assíncrona de ``acquire``."""
+        lane = _lane.get() if lane is None else lane
+        ticket = self._enqueue(lane)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(ticket, lane, tokens)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(min(wait, 1.0))
+        except BaseException:
+            self._cancel(ticket, lane)
+            raise
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Acerta o balde de tokens pelo consumo real informado pelo provider."""
+        if not self.token_capacity:
+            return
+        with self._cond:
+            self._tokens += estimated - actual
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Suspende todas as concessões por ``seconds`` (ex.: após um 429)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    """Segundos indicados pelo servidor (``retry-after-ms`` ou ``retry-after``)."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+class RateLimitedClient(LLMClient):
+    """``LLMClient`` que passa pelo ``RateLimiter`` e refaz chamadas limitadas."""
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        limiter: RateLimiter,
+        max_output_tokens: int = 1024,
+        max_retries: int = 5,
+        base_delay_s: float = 1.0,
+        max_delay_s: float = 60.0,
+    ) -> None:
+        super().__init__(model=inner.model, api_key=inner.api_key)
+        self.inner = inner
+        self.limiter = limiter
+        self.max_output_tokens = max_output_tokens
+        self.max_retries = max_retries
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+
+    def estimate_tokens(self, prompt: str) -> int:
+        return int(len(prompt) / CHARS_PER_TOKEN) + 1 + self.max_output_tokens
+
+    def _backoff(self, exc: BaseException, attempt: int) -> float | None:
+        """Espera antes da próxima tentativa, ou ``None`` se não vale repetir."""
+        if attempt >= self.max_retries or _status_code(exc) not in RETRYABLE_STATUS:
+            return None
+        delay = _retry_after(exc)
+        if delay is None:
+            # Backoff exponencial com jitter ("equal jitter")
+            cap = min(self.max_delay_s, self.base_delay_s * 2**attempt)
+            delay = cap / 2 + random.uniform(0, cap / 2)
+        logger.warning(
+            "LLM limitada (HTTP %s); nova tentativa %d/%d em %.1fs",
+            _status_code(exc),
+            attempt + 1,
+            self.max_retries,
+            delay,
+        )
+        self.limiter.pause(delay)
+        return delay
+
+    def _settle(self, estimated: int, response: LLMResponse) -> None:
+        usage: Any = (response.raw or {}).get("usage") if isinstance(response.raw, dict) else None
+        if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+            self.limiter.settle(estimated, usage["total_tokens"])
+
+    def _call(self, prompt: str, call: Callable[[], LLMResponse]) -> LLMResponse:
+        estimated = self.estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            self.limiter.acquire(estimated)
+            try:
+                response = call()
+            except Exception as e:
+                if self._backoff(e, attempt) is None:
+                    raise
+                attempt += 1
+                continue
+            self._settle(estimated, response)
+            return response
+
+    async def _acall(
+        self, prompt: str, call: Callable[[], Awaitable[LLMResponse]]
+    ) -> LLMResponse:
+        estimated = self.estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            await self.limiter.aacquire(estimated)
+            try:
+                response = await call()
+            except Exception as e:
+                if self._backoff(e, attempt) is None:
+                    raise
+                attempt += 1
+                continue
+            self._settle(estimated, response)
+            return response
+
+    def complete(self, prompt: str) -> LLMResponse:
+        return self._call(prompt, lambda: self.inner.complete(prompt))
+
+    async def acomplete(self, prompt: str) -> LLMResponse:
+        return await self._acall(prompt, lambda: self.inner.acomplete(prompt))
+
+    def complete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        return self._call(prompt, lambda: self.inner.complete_json(prompt, schema))
+
+    async def acomplete_json(self, prompt: str, schema: dict[str, Any]) -> LLMResponse:
+        return await self._acall(prompt, lambda: self.inner.acomplete_json(prompt, schema))
+
+    def cache_prefix(self, prefix: str) -> None:
+        self.inner.cache_prefix(prefix)
+
+    def max_input_tokens(self) -> int | None:
+        return self.inner.max_input_tokens()
+
+    def close(self) -> None:
+        self.inner.close()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
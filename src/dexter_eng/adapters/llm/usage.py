@@ -0,0 +1,167 @@
+"""Consumo de tokens, latência e custo por chamada à LLM.
+
+Cada provider devolve as métricas num formato próprio em ``LLMResponse.raw``:
+a OpenAI em ``usage`` (tokens) e o Ollama no último chunk do stream
+(contagens e durações em nanossegundos). ``usage_from_raw`` normaliza ambos
+em ``LLMUsage``; ``summarize_usage`` agrega as chamadas de uma run,
+inclusive as respostas recusadas pela cascata (``raw["attempts"]``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+# USD por 1M de tokens: (entrada, entrada em cache, saída)
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+}
+
+_NS = 1e9
+
+# Estimativa de tokens de entrada quando o provider não informa (~3,5 chars/token)
+CHARS_PER_TOKEN = 3.5
+
+
+@dataclass
+class LLMUsage:
+    """Métricas normalizadas de uma chamada (tempos em segundos)."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    elapsed_s: float | None = None
+    ttft_s: float | None = None
+    generation_s: float | None = None
+    load_s: float | None = None
+    cost_usd: float | None = None
+    # Chamadas a níveis da cascata cuja resposta foi recusada (mesmo chunk)
+    attempts: list[LLMUsage] = field(default_factory=list)
+
+    @property
+    def tokens_per_s(self) -> float | None:
+        if not self.generation_s or not self.output_tokens:
+            return None
+        return self.output_tokens / self.generation_s
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["attempts"] = [a.as_dict() for a in self.attempts]
+        return {**data, "tokens_per_s": self.tokens_per_s}
+
+
+def estimate_cost(model: str, input_tokens: int, cached: int, output_tokens: int) -> float | None:
+    """Custo em USD pela tabela ``MODEL_PRICES`` (prefixo mais longo); ``None`` se desconhecido."""
+    matches = [name for name in MODEL_PRICES if model == name or model.startswith(name + "-")]
+    if not matches:
+        return None
+    price_in, price_cached, price_out = MODEL_PRICES[max(matches, key=len)]
+    uncached = max(0, input_tokens - cached)
+    return (uncached * price_in + cached * price_cached + output_tokens * price_out) / 1e6
+
+
+def _openai_usage(raw: dict[str, Any]) -> LLMUsage:
+    usage = raw.get("usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    input_tokens = int(usage.get("prompt_tokens") or 0)
+    output_tokens = int(usage.get("completion_tokens") or 0)
+    cached = int(details.get("cached_tokens") or 0)
+    return LLMUsage(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cached_input_tokens=cached,
+        elapsed_s=raw.get("elapsed_s"),
+        # Sem streaming não há TTFT; a vazão é medida sobre a chamada inteira
+        generation_s=raw.get("elapsed_s"),
+        cost_usd=estimate_cost(str(raw.get("model") or ""), input_tokens, cached, output_tokens),
+    )
+
+
+def _ollama_cached_prefix(raw: dict[str, Any], evaluated: int) -> int:
+    """Tokens do prefixo servidos pelo KV cache do Ollama (estimativa).
+
+    ``prompt_eval_count`` conta só os tokens processados de fato; a diferença
+    para o tamanho estimado do prompt, limitada ao prefixo, veio do cache.
+    """
+    prefix_tokens = int((raw.get("prefix_chars") or 0) / CHARS_PER_TOKEN)
+    if not prefix_tokens or not evaluated:
+        return 0
+    prompt_tokens = int((raw.get("prompt_chars") or 0) / CHARS_PER_TOKEN)
+    return min(prefix_tokens, max(0, prompt_tokens - evaluated))
+
+
+def _ollama_usage(raw: dict[str, Any]) -> LLMUsage:
+    last = raw.get("ollama_last_chunk") or {}
+    elapsed = raw.get("elapsed_s")
+    ttft = raw.get("ttft_s")
+    if last:
+        generation = last.get("eval_duration")
+        load = last.get("load_duration")
+        evaluated = int(last.get("prompt_eval_count") or 0)
+        cached = _ollama_cached_prefix(raw, evaluated)
+        return LLMUsage(
+            input_tokens=evaluated + cached,
+            cached_input_tokens=cached,
+            output_tokens=int(last.get("eval_count") or 0),
+            elapsed_s=elapsed,
+            ttft_s=ttft,
+            generation_s=generation / _NS if generation else None,
+            load_s=load / _NS if load else None,
+            cost_usd=0.0,
+        )
+    # Stream encerrado antes do ``done``: sem contadores do servidor. Cada
+    # pedaço do stream corresponde a um token gerado; a entrada é estimada
+    generation = (elapsed - ttft) if elapsed is not None and ttft is not None else None
+    return LLMUsage(
+        input_tokens=int((raw.get("prompt_chars") or 0) / CHARS_PER_TOKEN),
+        output_tokens=int(raw.get("tokens_streamed") or 0),
+        elapsed_s=elapsed,
+        ttft_s=ttft,
+        generation_s=generation or None,
+        cost_usd=0.0,
+    )
+
+
+def usage_from_raw(raw: Any) -> LLMUsage | None:
+    """Extrai ``LLMUsage`` do ``raw`` de uma resposta; ``None`` se não houver métricas."""
+    if not isinstance(raw, dict):
+        return None
+    attempts = [u for u in map(usage_from_raw, raw.get("attempts") or ()) if u is not None]
+    if raw.get("provider") == "ollama":
+        usage = _ollama_usage(raw)
+    elif isinstance(raw.get("usage"), dict):
+        usage = _openai_usage(raw)
+    elif attempts:
+        # Sem métricas da resposta final, mas as tentativas custaram
+        usage = LLMUsage()
+    else:
+        return None
+    usage.attempts = attempts
+    return usage
+
+
+def _flatten(usages: list[LLMUsage]) -> list[LLMUsage]:
+    return [call for u in usages for call in (*_flatten(u.attempts), u)]
+
+
+def summarize_usage(usages: list[LLMUsage]) -> dict[str, Any]:
+    """Totais e médias de uma run (só chamadas que foram de fato à LLM)."""
+    usages = _flatten(usages)
+    generation = sum(u.generation_s or 0.0 for u in usages)
+    timed_output = sum(u.output_tokens for u in usages if u.generation_s)
+    ttfts = [u.ttft_s for u in usages if u.ttft_s is not None]
+    costs = [u.cost_usd for u in usages if u.cost_usd is not None]
+    loads = [u.load_s for u in usages if u.load_s is not None]
+    return {
+        "llm_calls": len(usages),
+        "input_tokens": sum(u.input_tokens for u in usages),
+        "output_tokens": sum(u.output_tokens for u in usages),
+        "cached_input_tokens": sum(u.cached_input_tokens for u in usages),
+        "ttft_s": round(sum(ttfts) / len(ttfts), 3) if ttfts else None,
+        "tokens_per_s": round(timed_output / generation, 2) if generation else None,
+        "load_s": round(sum(loads), 3) if loads else None,
+        "cost_usd": round(sum(costs), 6) if costs else None,
+    }
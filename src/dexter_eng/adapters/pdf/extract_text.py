@@ -1,28 +1,228 @@
 from __future__ import annotations
 
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Protocol
 
 import fitz  # pymupdf
 
+from dexter_eng.adapters.pdf.extract_tables import extract_page_with_tables
+from dexter_eng.adapters.pdf.ocr import DEFAULT_DPI, DEFAULT_LANGUAGE, OcrPageCache, ocr_pages
+from dexter_eng.adapters.pdf.source import PdfSource
+
 logger = logging.getLogger(__name__)
 
+# Abaixo disso o custo de subir o pool de processos supera o ganho
+PARALLEL_MIN_PAGES = 64
+
+# Identifica o extrator usado em cada página no cache de páginas; mude ao
+# alterar a forma de extrair para invalidar o texto já armazenado.
+TEXT_EXTRACTOR = "text-1"
+TABLES_EXTRACTOR = "tables-1"
+
+
+@dataclass
+class ExtractStats:
+    """Números da extração, gravados no ``meta.json`` da run."""
+
+    pages: int = 0
+    pages_cached: int = 0
+    table_chars_saved: int = 0
+    ocr_pages: int = 0
+
+
+class PageTextCache(Protocol):
+    """Cache de texto por página de um documento (já vinculado ao SHA-256 dele)."""
+
+    def get_pages(self, plan: dict[int, str]) -> dict[int, tuple[str, int]]:
+        """Recebe ``{página: extrator}`` e devolve ``{página: (texto, chars economizados)}``."""
+        ...
+
+    def put_pages(self, pages: list[tuple[int, str, str, int]]) -> None:
+        """Grava ``(página, extrator, texto, chars economizados)``."""
+        ...
+
+
+# Conteúdo do PDF recebido uma vez por processo worker (ver ``_init_worker``)
+_worker_data: bytes | None = None
+
+
+def _init_worker(data: bytes | None) -> None:
+    global _worker_data
+    _worker_data = data
+
+
+def _extract_doc_pages(
+    doc: fitz.Document, indices: list[int], tables: bool
+) -> list[tuple[str, int]]:
+    """``(texto, chars economizados com tabelas)`` de cada página indicada."""
+    if tables:
+        return [extract_page_with_tables(doc.load_page(i)) for i in indices]
+    return [(doc.load_page(i).get_text("text"), 0) for i in indices]
+
+
+def _extract_page_list(pdf_path: str, indices: list[int], tables: bool) -> list[tuple[str, int]]:
+    """Worker: abre o próprio documento e extrai as páginas indicadas."""
+    source = PdfSource(path=pdf_path, sha256="", data=_worker_data)
+    with source.open() as doc:
+        return _extract_doc_pages(doc, indices, tables)
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+
+def _split_ranges(page_count: int, parts: int) -> list[tuple[int, int]]:
+    """Divide ``range(page_count)`` em até ``parts`` faixas contíguas de tamanho similar."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _resolve_workers(workers: int | None) -> int:
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def extract_pages_from_pdf(
+    pdf_path: str,
+    workers: int | None = None,
+    parallel_min_pages: int = PARALLEL_MIN_PAGES,
+    page_cache: PageTextCache | None = None,
+    source: PdfSource | None = None,
+    tables: bool = False,
+    stats: ExtractStats | None = None,
+) -> list[str]:
+    """Extrai o texto de cada página, em ordem.
+
+    Com ``source`` já carregado em memória, o documento é aberto a partir do
+    buffer (e enviado uma vez a cada worker), sem reler o arquivo. Com
+    ``page_cache``, só as páginas ausentes do cache são extraídas (e
+    gravadas em seguida). Quando há ``parallel_min_pages`` páginas ou mais a
+    extrair, elas são divididas em faixas processadas por um pool de
+    processos (cada worker abre o próprio documento fitz). ``workers``
+    ``None``/``0`` usa o nº de CPUs; ``1`` força o modo serial.
+
+    Com ``tables``, as tabelas detectadas são compactadas (ver
+    ``extract_tables``); ``stats``, se fornecido, recebe os números da extração.
+    """
     p = Path(pdf_path)
-    if not p.exists():
+    if source is None:
+        source = PdfSource(path=str(p), sha256="")
+    if source.data is None and not p.exists():
         raise FileNotFoundError(f"PDF não encontrado: {pdf_path}")
 
-    logger.info("Extraindo texto de: %s", p.name)
-    parts: list[str] = []
-    with fitz.open(str(p)) as doc:
-        logger.info("PDF aberto: %d páginas", doc.page_count)
-        for i in range(doc.page_count):
-            page = doc.load_page(i)
-            txt = page.get_text("text")
-            parts.append(f"\n\n=== PAGE {i + 1} ===\n{txt}")
-            logger.debug("Página %d: %d chars extraídos", i + 1, len(txt))
-
-    full_text = "".join(parts).strip()
+    with source.open() as doc:
+        page_count = doc.page_count
+        logger.info("PDF aberto: %d páginas", page_count)
+
+        extractor = TABLES_EXTRACTOR if tables else TEXT_EXTRACTOR
+        plan = {i: extractor for i in range(page_count)}
+        pages = page_cache.get_pages(plan) if page_cache is not None else {}
+        missing = [i for i in range(page_count) if i not in pages]
+        if stats is not None:
+            stats.pages = page_count
+            stats.pages_cached = len(pages)
+        if page_cache is not None:
+            logger.info("Cache de páginas: %d/%d reaproveitadas", len(pages), page_count)
+
+        n_workers = _resolve_workers(workers)
+        if not missing:
+            fresh = []
+        elif n_workers <= 1 or len(missing) < parallel_min_pages:
+            logger.debug("Extração serial (%d páginas)", len(missing))
+            fresh = _extract_doc_pages(doc, missing, tables)
+        else:
+            fresh = None
+
+    if fresh is None:
+        # Mais faixas que workers para equilibrar páginas "pesadas"
+        ranges = _split_ranges(len(missing), n_workers * 4)
+        logger.info(
+            "Extração paralela: %d páginas, %d workers, %d faixas",
+            len(missing),
+            n_workers,
+            len(ranges),
+        )
+        fresh = []
+        with ProcessPoolExecutor(
+            max_workers=n_workers, initializer=_init_worker, initargs=(source.data,)
+        ) as pool:
+            futures = [
+                pool.submit(_extract_page_list, str(p), missing[start:stop], tables)
+                for start, stop in ranges
+            ]
+            for future in futures:
+                fresh.extend(future.result())
+
+    pages.update(zip(missing, fresh))
+    if page_cache is not None and missing:
+        page_cache.put_pages([(i, plan[i], *pages[i]) for i in missing])
+    if stats is not None:
+        stats.table_chars_saved = sum(saved for _text, saved in pages.values())
+    return [pages[i][0] for i in range(page_count)]
+
+
+def format_pages(pages: list[str]) -> str:
+    """Monta o texto final com os marcadores ``=== PAGE n ===`` usados nas citações."""
+    parts = [f"\n\n=== PAGE {i + 1} ===\n{txt}" for i, txt in enumerate(pages)]
+    return "".join(parts).strip()
+
+
+def extract_text_from_pdf(
+    pdf_path: str,
+    workers: int | None = None,
+    parallel_min_pages: int = PARALLEL_MIN_PAGES,
+    page_cache: PageTextCache | None = None,
+    source: PdfSource | None = None,
+    ocr: str = "off",
+    ocr_backend: str = "auto",
+    ocr_language: str = DEFAULT_LANGUAGE,
+    ocr_dpi: int = DEFAULT_DPI,
+    ocr_cache: OcrPageCache | None = None,
+    tables: bool = False,
+    stats: ExtractStats | None = None,
+) -> str:
+    """Extrai o texto com marcadores de página.
+
+    Com ``ocr="auto"``, as páginas que a triagem identifica como escaneadas
+    têm o texto substituído pelo OCR (ver ``ocr.ocr_pages``).
+    """
+    if ocr not in ("auto", "off"):
+        raise ValueError(f"Modo de OCR inválido: {ocr} (use auto|off)")
+    logger.info("Extraindo texto de: %s", Path(pdf_path).name)
+    pages = extract_pages_from_pdf(
+        pdf_path,
+        workers=workers,
+        parallel_min_pages=parallel_min_pages,
+        page_cache=page_cache,
+        source=source,
+        tables=tables,
+        stats=stats,
+    )
+    if ocr == "auto":
+        pages, ocr_indices = ocr_pages(
+            source or PdfSource(path=pdf_path, sha256=""),
+            pages,
+            backend=ocr_backend,
+            language=ocr_language,
+            dpi=ocr_dpi,
+            workers=_resolve_workers(workers),
+            cache=ocr_cache,
+        )
+        if ocr_indices:
+            logger.info("OCR aplicado em %d páginas", len(ocr_indices))
+        if stats is not None:
+            stats.ocr_pages = len(ocr_indices)
+    for i, txt in enumerate(pages):
+        logger.debug("Página %d: %d chars extraídos", i + 1, len(txt))
+
+    full_text = format_pages(pages)
     logger.info("Extração concluída: %d chars totais", len(full_text))
     return full_text
@@ -0,0 +1,222 @@
+"""Triagem de páginas escaneadas e OCR paralelo com backend plugável.
+
+A triagem usa sinais baratos do fitz (quantidade de texto e fração da página
+coberta por imagens) para decidir quais páginas precisam de OCR; só essas
+passam pelo backend, num pool de processos. O texto reconhecido é
+guardado por hash da página (conteúdo + imagens), então cada página é
+processada uma única vez, mesmo entre documentos diferentes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Protocol
+
+import fitz  # pymupdf
+
+from dexter_eng.adapters.pdf.source import PdfSource
+
+logger = logging.getLogger(__name__)
+
+# Página com menos caracteres que isso e coberta por imagem é tratada como escaneada
+MIN_TEXT_CHARS = 50
+MIN_IMAGE_COVERAGE = 0.3
+
+DEFAULT_LANGUAGE = "por"
+DEFAULT_DPI = 300
+
+# Abaixo disso as páginas são reconhecidas no próprio processo: subir o pool
+# e reabrir o PDF em cada worker não compensa para um punhado de páginas
+PARALLEL_MIN_PAGES = 4
+
+
+@dataclass
+class PageSignals:
+    index: int
+    text_chars: int
+    image_coverage: float
+
+    def needs_ocr(
+        self, min_text_chars: int = MIN_TEXT_CHARS, min_image_coverage: float = MIN_IMAGE_COVERAGE
+    ) -> bool:
+        return self.text_chars < min_text_chars and self.image_coverage >= min_image_coverage
+
+
+class OcrPageCache(Protocol):
+    """Cache de texto reconhecido, chaveado por ``(hash da página, engine)``."""
+
+    def get_texts(self, page_hashes: list[str], engine: str) -> dict[str, str]: ...
+
+    def put_texts(self, items: list[tuple[str, str]], engine: str) -> None: ...
+
+
+def _ocr_fitz(page: fitz.Page, language: str, dpi: int) -> str:
+    """OCR embutido do PyMuPDF (requer Tesseract e tessdata instalados)."""
+    textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True)
+    return page.get_text("text", textpage=textpage)
+
+
+def _ocr_tesseract(page: fitz.Page, language: str, dpi: int) -> str:
+    """Renderiza a página e chama o binário ``tesseract`` via stdin/stdout."""
+    png = page.get_pixmap(dpi=dpi).tobytes("png")
+    proc = subprocess.run(
+        ["tesseract", "stdin", "stdout", "-l", language],
+        input=png,
+        capture_output=True,
+        check=True,
+    )
+    return proc.stdout.decode("utf-8", "replace")
+
+
+def _fitz_available() -> bool:
+    try:
+        return bool(fitz.get_tessdata())
+    except Exception:  # noqa: BLE001 — get_tessdata levanta quando não há Tesseract
+        return False
+
+
+# nome -> (função de OCR, verificação de disponibilidade)
+BACKENDS: dict[str, tuple[Callable[[fitz.Page, str, int], str], Callable[[], bool]]] = {
+    "fitz": (_ocr_fitz, _fitz_available),
+    "tesseract": (_ocr_tesseract, lambda: shutil.which("tesseract") is not None),
+}
+
+
+def resolve_backend(name: str = "auto") -> str | None:
+    """Escolhe o backend: ``auto`` usa o primeiro disponível; ``None`` se nenhum estiver."""
+    candidates = list(BACKENDS) if name == "auto" else [name]
+    for candidate in candidates:
+        if candidate not in BACKENDS:
+            raise ValueError(f"Backend de OCR desconhecido: {candidate}")
+        if BACKENDS[candidate][1]():
+            return candidate
+    return None
+
+
+def image_coverage(page: fitz.Page) -> float:
+    """Fração da área da página coberta por imagens (limitada a 1.0)."""
+    area = page.rect.get_area()
+    if area <= 0:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        covered += bbox.get_area()
+    return min(1.0, covered / area)
+
+
+def page_signals(doc: fitz.Document, pages: list[str]) -> list[PageSignals]:
+    """Sinais de triagem por página a partir do texto já extraído."""
+    return [
+        PageSignals(
+            index=i,
+            text_chars=len(text.strip()),
+            image_coverage=image_coverage(doc.load_page(i)),
+        )
+        for i, text in enumerate(pages)
+    ]
+
+
+def page_hash(doc: fitz.Document, index: int) -> str:
+    """Hash do conteúdo da página: stream de desenho + bytes de cada imagem."""
+    page = doc.load_page(index)
+    h = hashlib.sha256(page.read_contents())
+    for image in page.get_images(full=True):
+        h.update(doc.xref_stream_raw(image[0]) or b"")
+    h.update(repr(tuple(page.rect)).encode())
+    return h.hexdigest()
+
+
+# Conteúdo do PDF recebido uma vez por processo worker
+_worker_data: bytes | None = None
+
+
+def _init_worker(data: bytes | None) -> None:
+    global _worker_data
+    _worker_data = data
+
+
+def _ocr_page_list(
+    pdf_path: str, backend: str, language: str, dpi: int, indices: list[int]
+) -> list[str]:
+    """Worker: abre o próprio documento e aplica o OCR nas páginas indicadas."""
+    source = PdfSource(path=pdf_path, sha256="", data=_worker_data)
+    with source.open() as doc:
+        return _ocr_doc_pages(doc, backend, language, dpi, indices)
+
+
+def _ocr_doc_pages(
+    doc: fitz.Document, backend: str, language: str, dpi: int, indices: list[int]
+) -> list[str]:
+    fn = BACKENDS[backend][0]
+    return [fn(doc.load_page(i), language, dpi) for i in indices]
+
+
+def ocr_pages(
+    source: PdfSource,
+    pages: list[str],
+    backend: str = "auto",
+    language: str = DEFAULT_LANGUAGE,
+    dpi: int = DEFAULT_DPI,
+    workers: int = 1,
+    cache: OcrPageCache | None = None,
+    parallel_min_pages: int = PARALLEL_MIN_PAGES,
+) -> tuple[list[str], list[int]]:
+    """Substitui o texto das páginas escaneadas pelo resultado do OCR.
+
+    Retorna ``(páginas, índices que passaram por OCR)``. Sem backend
+    disponível, registra um aviso e devolve as páginas inalteradas.
+    """
+    with source.open() as doc:
+        targets = [s.index for s in page_signals(doc, pages) if s.needs_ocr()]
+        if not targets:
+            return pages, []
+        hashes = {i: page_hash(doc, i) for i in targets}
+
+    resolved = resolve_backend(backend)
+    if resolved is None:
+        logger.warning(
+            "%d páginas parecem escaneadas, mas nenhum backend de OCR está disponível", len(targets)
+        )
+        return pages, []
+
+    engine = f"{resolved}:{language}:{dpi}"
+    cached = cache.get_texts(list(hashes.values()), engine) if cache is not None else {}
+    missing = [i for i in targets if hashes[i] not in cached]
+    logger.info(
+        "OCR (%s): %d páginas escaneadas, %d em cache", engine, len(targets), len(targets) - len(missing)
+    )
+
+    fresh: dict[int, str] = {}
+    if missing:
+        n_workers = max(1, min(workers, len(missing)))
+        if n_workers == 1 or len(missing) < parallel_min_pages:
+            with source.open() as doc:
+                texts = _ocr_doc_pages(doc, resolved, language, dpi, missing)
+        else:
+            groups = [missing[w::n_workers] for w in range(n_workers)]
+            order = [i for group in groups for i in group]
+            texts = []
+            with ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_init_worker, initargs=(source.data,)
+            ) as pool:
+                futures = [
+                    pool.submit(_ocr_page_list, source.path, resolved, language, dpi, group)
+                    for group in groups
+                ]
+                for future in futures:
+                    texts.extend(future.result())
+            missing = order
+        fresh = dict(zip(missing, texts))
+        if cache is not None:
+            cache.put_texts([(hashes[i], fresh[i]) for i in missing], engine)
+
+    out = list(pages)
+    for i in targets:
+        out[i] = fresh[i] if i in fresh else cached[hashes[i]]
+    return out, targets
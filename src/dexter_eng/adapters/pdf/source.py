@@ -0,0 +1,57 @@
+"""Leitura única do PDF: o mesmo buffer serve para o hash e para o fitz."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+import fitz  # pymupdf
+
+logger = logging.getLogger(__name__)
+
+# Acima disso o arquivo não é mantido em memória: o hash é calculado em
+# streaming e o fitz abre o arquivo pelo caminho (segunda leitura).
+IN_MEMORY_MAX_BYTES = 256 * 1024 * 1024
+
+_HASH_BLOCK = 1024 * 1024
+
+
+@dataclass
+class PdfSource:
+    """PDF identificado pelo SHA-256, com o conteúdo em memória quando couber."""
+
+    path: str
+    sha256: str
+    data: bytes | None = None
+
+    def open(self) -> fitz.Document:
+        if self.data is not None:
+            return fitz.open(stream=self.data, filetype="pdf")
+        return fitz.open(self.path)
+
+
+def load_pdf_source(path: str, in_memory_max_bytes: int = IN_MEMORY_MAX_BYTES) -> PdfSource:
+    """Lê o arquivo uma única vez, calculando o hash do mesmo buffer entregue ao fitz.
+
+    Arquivos maiores que ``in_memory_max_bytes`` têm o hash calculado em
+    blocos, sem reter o conteúdo. Se o arquivo não puder ser lido, o hash é
+    o do caminho (a extração falha depois com a mensagem apropriada).
+    """
+    try:
+        size = Path(path).stat().st_size
+        if size <= in_memory_max_bytes:
+            with open(path, "rb") as f:
+                data = f.read()
+            logger.debug("PDF lido em memória: %d bytes", len(data))
+            return PdfSource(path=path, sha256=hashlib.sha256(data).hexdigest(), data=data)
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                h.update(block)
+        logger.info("PDF de %d bytes acima do limite em memória; hash em streaming", size)
+        return PdfSource(path=path, sha256=h.hexdigest())
+    except OSError:
+        return PdfSource(path=path, sha256=hashlib.sha256(path.encode()).hexdigest())
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
+from functools import partial
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 
@@ -10,10 +12,21 @@ load_dotenv()
 
 import typer
 
+from dexter_eng.adapters.llm.cascade import CascadeLLMClient
+from dexter_eng.adapters.llm.client import LLMClient
 from dexter_eng.adapters.llm.openai_client import OpenAILLMClient
+from dexter_eng.adapters.llm.rate_limit import RateLimitedClient, RateLimiter
 from dexter_eng.config.settings import Settings
-from dexter_eng.persistence.db import get_cache_stats, get_run_history, init_db
-from dexter_eng.pipeline.edital_pipeline import run_edital_pipeline
+from dexter_eng.persistence.db import (
+    configure_memory_cache,
+    gc_llm_cache,
+    get_cache_stats,
+    get_run_history,
+    init_db,
+)
+from dexter_eng.pipeline.batch import BatchItem, discover_pdfs, run_batch
+from dexter_eng.pipeline.edital_pipeline import PipelineOptions, run_edital_pipeline
+from dexter_eng.pipeline.steps.step_llm_structured import edital_rejection
 
 logger = logging.getLogger(__name__)
 
@@ -48,48 +61,207 @@ def _elapsed_display(started_at: str | None, ended_at: str | None) -> str:
         return "-"
 
 
-def _run_edital(pdf: str, prompt: Path, verbose: bool, ocr: str, local_model: str) -> None:
+def _build_local_llm(settings: Settings, local_model: str, timeout_s: float = 300.0) -> LLMClient:
+    from dexter_eng.adapters.llm.local_ollama_client import LocalOllamaClient
+
+    # Instancia com defaults seguros conforme solicitado
+    options = dict(
+        timeout_s=timeout_s,
+        max_connections=settings.ollama_max_connections,
+        keepalive_expiry_s=settings.ollama_keepalive_s,
+        stop_on_json=settings.ollama_stop_on_json,
+        keep_alive=settings.ollama_keep_alive,
+        warm_up=settings.ollama_warm_up,
+    )
+    if settings.ollama_hosts:
+        from dexter_eng.adapters.llm.ollama_pool import OllamaPoolClient
+
+        logger.info(
+            "Usando modelo local via Ollama: %s em %d hosts (%s)",
+            local_model,
+            len(settings.ollama_hosts),
+            ", ".join(settings.ollama_hosts),
+        )
+        return OllamaPoolClient(
+            settings.ollama_hosts,
+            model=local_model,
+            health_interval_s=settings.ollama_health_interval_s,
+            **options,
+        )
+
+    logger.info("Usando modelo local via Ollama: %s", local_model)
+    return LocalOllamaClient(model=local_model, **options)
+
+
+def _build_openai_llm(settings: Settings) -> LLMClient:
+    if not (settings.openai_rpm or settings.openai_tpm):
+        return OpenAILLMClient(model=settings.llm_model, api_key=settings.llm_api_key)
+    logger.info(
+        "Limites OpenAI: %d req/min, %d tokens/min", settings.openai_rpm, settings.openai_tpm
+    )
+    return RateLimitedClient(
+        OpenAILLMClient(model=settings.llm_model, api_key=settings.llm_api_key, max_retries=0),
+        RateLimiter(rpm=settings.openai_rpm, tpm=settings.openai_tpm),
+        max_retries=settings.llm_max_retries,
+    )
+
+
+def _build_llm(settings: Settings, local_model: str) -> LLMClient:
+    if not local_model or local_model == "off":
+        return _build_openai_llm(settings)
+    if not settings.llm_cascade:
+        return _build_local_llm(settings, local_model)
+
+    logger.info("Cascata: %s (local) -> %s (OpenAI)", local_model, settings.llm_model)
+    return CascadeLLMClient(
+        [
+            ("local", _build_local_llm(settings, local_model, settings.cascade_local_timeout_s)),
+            ("openai", _build_openai_llm(settings)),
+        ],
+        reject=partial(edital_rejection, max_pendencias=settings.cascade_max_pendencias),
+    )
+
+
+def _pinnable(llm: LLMClient) -> list:
+    """Clientes locais (Ollama) que aceitam ``pin()``, inclusive dentro da cascata."""
+    clients = [client for _name, client in getattr(llm, "tiers", [("", llm)])]
+    return [client for client in clients if hasattr(client, "pin")]
+
+
+def _pipeline_options(settings: Settings) -> PipelineOptions:
+    return PipelineOptions(
+        pdf_workers=settings.pdf_workers,
+        pdf_parallel_min_pages=settings.pdf_parallel_min_pages,
+        pdf_in_memory_max_bytes=settings.pdf_in_memory_max_mb * 1024 * 1024,
+        pdf_tables=settings.pdf_tables,
+        strip_boilerplate_lines=settings.strip_boilerplate,
+        chunk_tokens=settings.chunk_tokens,
+        chunk_overlap_tokens=settings.chunk_overlap_tokens,
+        select_token_budget=settings.select_token_budget,
+        dedup_threshold=settings.dedup_threshold,
+        ocr_backend=settings.ocr_backend,
+        ocr_language=settings.ocr_language,
+        ocr_dpi=settings.ocr_dpi,
+    )
+
+
+def _run_edital(
+    pdf: str, prompt: Path, verbose: bool, ocr: str, local_model: str, force: bool
+) -> None:
     _setup_logging(verbose)
     logger.info("Iniciando processamento: %s", pdf)
 
     if ocr != "off" or local_model != "off":
-        logger.info("Flags futuras recebidas (ainda desativadas): ocr=%s, local_model=%s", ocr, local_model)
+        logger.info("Flags recebidas: ocr=%s, local_model=%s", ocr, local_model)
 
     settings = Settings()
-    if local_model and local_model != "off":
-        from dexter_eng.adapters.llm.local_ollama_client import LocalOllamaClient
-
-        logger.info("Usando modelo local via Ollama: %s", local_model)
-        # Instancia com defaults seguros conforme solicitado
-        llm = LocalOllamaClient(model=local_model)
-    else:
-        llm = OpenAILLMClient(model=settings.llm_model, api_key=settings.llm_api_key)
     prompt_template = _read_prompt(prompt)
+    configure_memory_cache(settings.llm_cache_memory_mb * 1024 * 1024)
 
-    out = run_edital_pipeline(
-        pdf_path=pdf,
-        llm=llm,
-        prompt_template=prompt_template,
-        out_dir=settings.out_dir,
-        max_chars=settings.max_chars_per_chunk,
-        ocr=ocr,
-        local_model=local_model,
-    )
+    with _build_llm(settings, local_model) as llm:
+        out = run_edital_pipeline(
+            pdf_path=pdf,
+            llm=llm,
+            prompt_template=prompt_template,
+            out_dir=settings.out_dir,
+            max_chars=settings.max_chars_per_chunk,
+            ocr=ocr,
+            local_model=local_model,
+            llm_workers=settings.llm_concurrency,
+            force=force,
+            options=_pipeline_options(settings),
+        )
     logger.info("Arquivo gerado: %s", out)
     typer.echo(f"[OK] Gerado: {out}")
 
 
+def _run_batch(
+    source: str | None,
+    prompt: Path,
+    verbose: bool,
+    ocr: str,
+    local_model: str,
+    workers: int | None,
+    force: bool,
+    pin_model: bool = False,
+) -> None:
+    _setup_logging(verbose)
+    if not source:
+        raise typer.BadParameter("Informe o diretório ou glob: dexter batch <origem>")
+    pdfs = discover_pdfs(source)
+    if not pdfs:
+        raise typer.BadParameter(f"Nenhum PDF encontrado em: {source}")
+
+    settings = Settings()
+    prompt_template = _read_prompt(prompt)
+    configure_memory_cache(settings.llm_cache_memory_mb * 1024 * 1024)
+
+    def _report(item: BatchItem) -> None:
+        if item.ok:
+            typer.echo(f"[OK] {item.pdf_path} -> {item.result.output_path}")  # type: ignore[union-attr]
+        else:
+            typer.echo(f"[ERRO] {item.pdf_path}: {item.error}")
+
+    with _build_llm(settings, local_model) as llm:
+        pinned = _pinnable(llm) if pin_model else []
+        for client in pinned:
+            client.pin()
+            logger.info("Modelo %s fixado na memória durante o batch", client.model)
+        try:
+            summary = run_batch(
+                pdfs,
+                llm=llm,
+                prompt_template=prompt_template,
+                out_dir=settings.out_dir,
+                max_chars=settings.max_chars_per_chunk,
+                workers=workers or settings.batch_workers,
+                llm_workers=settings.llm_concurrency,
+                ocr=ocr,
+                local_model=local_model,
+                force=force,
+                options=_pipeline_options(settings),
+                on_item=_report,
+            )
+        finally:
+            for client in pinned:
+                client.unpin()
+
+    typer.echo("-" * 60)
+    typer.echo(f"documentos: {len(summary.items)}")
+    typer.echo(f"sucesso: {len(summary.succeeded)}")
+    typer.echo(f"falhas: {len(summary.failed)}")
+    typer.echo(f"tempo_total: {summary.elapsed_seconds:.1f}s")
+    typer.echo(f"docs_por_min: {summary.docs_per_minute:.2f}")
+    typer.echo(f"cache_hit_rate: {summary.cache_hit_rate:.2%}")
+    for client in pinned:
+        # Carga do modelo fora do tempo de geração (medida no aquecimento)
+        typer.echo(f"carga_modelo[{client.model}]: {_fmt(client.warmup_load_s, '.2f', 's')}")
+    for item in summary.failed:
+        typer.echo(f"  - {item.pdf_path}: {item.error}")
+
+
+def _fmt(value: float | int | None, spec: str = "", unit: str = "") -> str:
+    return "-" if value is None else format(value, spec) + unit
+
+
 def _show_history(limit: int) -> None:
     init_db()
     rows = get_run_history(limit=limit)
-    typer.echo("id | status | cache_hit | prompt_chars | response_chars | model | started_at | elapsed")
-    typer.echo("-" * 98)
+    typer.echo(
+        "id | status | cache_hit | prompt_chars | response_chars | model | started_at | elapsed"
+        " | tokens_in | tokens_cache | tokens_out | ttft | tok/s | load | custo_usd"
+    )
+    typer.echo("-" * 165)
     for row in rows:
         elapsed = _elapsed_display(row["started_at"], row["ended_at"])
         typer.echo(
             f"{row['id']} | {row['status'] or '-'} | {row['cache_hit']} | "
             f"{row['prompt_chars']} | {row['response_chars']} | {row['model'] or '-'} | "
-            f"{row['started_at'] or '-'} | {elapsed}"
+            f"{row['started_at'] or '-'} | {elapsed} | "
+            f"{_fmt(row['input_tokens'])} | {_fmt(row['cached_input_tokens'])} | "
+            f"{_fmt(row['output_tokens'])} | "
+            f"{_fmt(row['ttft_s'], '.2f', 's')} | {_fmt(row['tokens_per_s'], '.1f')} | "
+            f"{_fmt(row['load_s'], '.2f', 's')} | {_fmt(row['cost_usd'], '.4f')}"
         )
 
 
@@ -100,25 +272,88 @@ def _show_cache_stats() -> None:
     typer.echo(f"total_runs: {stats['total_runs']}")
     typer.echo(f"cache_hits: {stats['cache_hits']}")
     typer.echo(f"hit_rate: {stats['hit_rate']:.2%}")
+    typer.echo(f"result_cache_entries: {stats['result_entries']}")
+    typer.echo(f"result_cache_hits: {stats['result_hits']}")
+    typer.echo(f"llm_cache_bytes: {stats['cache_bytes']}")
+    typer.echo(f"llm_cache_lookups: {stats['lookups']}")
+    typer.echo(f"memory_hits: {stats['memory_hits']} ({stats['memory_hit_rate']:.2%})")
+    typer.echo(f"disk_hits: {stats['disk_hits']} ({stats['disk_hit_rate']:.2%})")
+
+
+def _run_cache_gc(max_mb: int | None, max_age_days: float | None) -> None:
+    init_db()
+    settings = Settings()
+    # Valores explícitos na linha de comando valem como estão (0 esvazia o
+    # cache); nas variáveis de ambiente, 0 significa "sem política"
+    if max_mb is None and settings.llm_cache_max_mb:
+        max_mb = settings.llm_cache_max_mb
+    if max_age_days is None and settings.llm_cache_max_age_days:
+        max_age_days = settings.llm_cache_max_age_days
+    if max_mb is None and max_age_days is None:
+        raise typer.BadParameter(
+            "Nenhuma política definida: use --max-mb/--max-age-days "
+            "ou LLM_CACHE_MAX_MB/LLM_CACHE_MAX_AGE_DAYS"
+        )
+    result = gc_llm_cache(
+        max_bytes=max_mb * 1024 * 1024 if max_mb is not None else None,
+        max_age_days=max_age_days,
+    )
+    typer.echo(f"removidas_por_idade: {result['removed_by_age']}")
+    typer.echo(f"removidas_por_tamanho: {result['removed_by_size']}")
+    typer.echo(f"entradas_restantes: {result['remaining_entries']}")
+    typer.echo(f"bytes_restantes: {result['remaining_bytes']}")
 
 
 @app.command()
 def main(
-    target: str = typer.Argument(..., help="PDF para processar ou comando: history|cache-stats"),
+    target: str = typer.Argument(..., help="PDF para processar ou comando: history|cache-stats|cache-gc|batch"),
+    source: Optional[str] = typer.Argument(None, help="Diretório ou glob de PDFs (para batch)"),
     prompt: Path = typer.Option(DEFAULT_PROMPT, help="Caminho para o template de prompt"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Ativa logs detalhados"),
     limit: int = typer.Option(20, "--limit", min=1, help="Limite para history"),
-    ocr: str = typer.Option("off", "--ocr", help="Modo OCR futuro: auto|off"),
-    local_model: str = typer.Option("off", "--local-model", help="Modelo local futuro: auto|off"),
+    ocr: str = typer.Option("off", "--ocr", help="OCR das páginas escaneadas: auto|off"),
+    local_model: str = typer.Option("off", "--local-model", help="Modelo do Ollama (off = OpenAI); LLM_CASCADE=1 escala para a OpenAI"),
+    workers: Optional[int] = typer.Option(None, "--workers", min=1, help="PDFs em paralelo no batch"),
+    force: bool = typer.Option(False, "--force", help="Ignora os caches de resultado e de etapas e reprocessa"),
+    pin_model: bool = typer.Option(False, "--pin-model", help="Mantém o modelo local carregado durante todo o batch"),
+    max_mb: Optional[int] = typer.Option(None, "--max-mb", min=0, help="cache-gc: tamanho máximo do cache LLM (MB)"),
+    max_age_days: Optional[float] = typer.Option(None, "--max-age-days", min=0, help="cache-gc: remove entradas sem uso há mais dias que isso"),
 ) -> None:
-    """Entrada principal: processa PDF ou mostra relatórios de histórico/cache."""
+    """Entrada principal: processa PDF(s) ou mostra relatórios de histórico/cache."""
+    if source is not None and target != "batch":
+        # Evita processar só o primeiro de "dexter a.pdf b.pdf" sem aviso
+        raise typer.BadParameter(
+            f"Argumento inesperado: {source!r}. Para vários PDFs use: dexter batch <origem>"
+        )
     if target == "history":
         _show_history(limit=limit)
         return
     if target == "cache-stats":
         _show_cache_stats()
         return
-    _run_edital(pdf=target, prompt=prompt, verbose=verbose, ocr=ocr, local_model=local_model)
+    if target == "cache-gc":
+        _run_cache_gc(max_mb=max_mb, max_age_days=max_age_days)
+        return
+    if target == "batch":
+        _run_batch(
+            source=source,
+            prompt=prompt,
+            verbose=verbose,
+            ocr=ocr,
+            local_model=local_model,
+            workers=workers,
+            force=force,
+            pin_model=pin_model,
+        )
+        return
+    _run_edital(
+        pdf=target,
+        prompt=prompt,
+        verbose=verbose,
+        ocr=ocr,
+        local_model=local_model,
+        force=force,
+    )
 
 
 if __name__ == "__main__":
@@ -5,6 +5,16 @@ import os
 from pydantic import BaseModel, Field
 
 
+def _keep_alive(value: str | None) -> str | int | None:
+    """``OLLAMA_KEEP_ALIVE``: duração (``"10m"``) ou segundos (``"-1"`` = sempre)."""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
 class Settings(BaseModel):
     """Configurações do sistema carregadas do ambiente.
 
@@ -16,6 +26,36 @@ class Settings(BaseModel):
     llm_api_key: str = ""
     out_dir: str = "out"
     max_chars_per_chunk: int = 8000
+    llm_concurrency: int = 4
+    batch_workers: int = 2
+    pdf_workers: int = 0
+    pdf_parallel_min_pages: int = 64
+    pdf_in_memory_max_mb: int = 256
+    pdf_tables: bool = False
+    strip_boilerplate: bool = True
+    chunk_tokens: int = 0
+    chunk_overlap_tokens: int = 0
+    select_token_budget: int = 0
+    dedup_threshold: float = 0.9
+    ocr_backend: str = "auto"
+    ocr_language: str = "por"
+    ocr_dpi: int = 300
+    openai_rpm: int = 0
+    openai_tpm: int = 0
+    llm_max_retries: int = 5
+    llm_cascade: bool = False
+    cascade_max_pendencias: int = 3
+    cascade_local_timeout_s: float = 120.0
+    ollama_max_connections: int = 16
+    ollama_keepalive_s: float = 30.0
+    ollama_stop_on_json: bool = True
+    ollama_keep_alive: str | int | None = None
+    ollama_warm_up: bool = True
+    ollama_hosts: list[str] = Field(default_factory=list)
+    ollama_health_interval_s: float = 15.0
+    llm_cache_memory_mb: int = 64
+    llm_cache_max_mb: int = 0
+    llm_cache_max_age_days: float = 0.0
 
     def __init__(self, **overrides):
         defaults = {
@@ -24,6 +64,41 @@ class Settings(BaseModel):
             "llm_api_key": os.getenv("LLM_API_KEY") or os.getenv("OPENAI_API_KEY", ""),
             "out_dir": os.getenv("OUT_DIR", "out"),
             "max_chars_per_chunk": int(os.getenv("MAX_CHARS_PER_CHUNK", "8000")),
+            "llm_concurrency": int(os.getenv("LLM_CONCURRENCY", "4")),
+            "batch_workers": int(os.getenv("BATCH_WORKERS", "2")),
+            "pdf_workers": int(os.getenv("PDF_WORKERS", "0")),
+            "pdf_parallel_min_pages": int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64")),
+            "pdf_in_memory_max_mb": int(os.getenv("PDF_IN_MEMORY_MAX_MB", "256")),
+            "pdf_tables": os.getenv("PDF_TABLES", "0").lower() in ("1", "true", "on"),
+            "strip_boilerplate": os.getenv("STRIP_BOILERPLATE", "1").lower()
+            not in ("0", "false", "off"),
+            "chunk_tokens": int(os.getenv("CHUNK_TOKENS", "0")),
+            "chunk_overlap_tokens": int(os.getenv("CHUNK_OVERLAP_TOKENS", "0")),
+            "select_token_budget": int(os.getenv("SELECT_TOKEN_BUDGET", "0")),
+            "dedup_threshold": float(os.getenv("DEDUP_THRESHOLD", "0.9")),
+            "ocr_backend": os.getenv("OCR_BACKEND", "auto"),
+            "ocr_language": os.getenv("OCR_LANGUAGE", "por"),
+            "ocr_dpi": int(os.getenv("OCR_DPI", "300")),
+            "openai_rpm": int(os.getenv("OPENAI_RPM", "0")),
+            "openai_tpm": int(os.getenv("OPENAI_TPM", "0")),
+            "llm_max_retries": int(os.getenv("LLM_MAX_RETRIES", "5")),
+            "llm_cascade": os.getenv("LLM_CASCADE", "0").lower() in ("1", "true", "on"),
+            "cascade_max_pendencias": int(os.getenv("CASCADE_MAX_PENDENCIAS", "3")),
+            "cascade_local_timeout_s": float(os.getenv("CASCADE_LOCAL_TIMEOUT_S", "120")),
+            "ollama_max_connections": int(os.getenv("OLLAMA_MAX_CONNECTIONS", "16")),
+            "ollama_keepalive_s": float(os.getenv("OLLAMA_KEEPALIVE_S", "30")),
+            "ollama_stop_on_json": os.getenv("OLLAMA_STOP_ON_JSON", "1").lower()
+            not in ("0", "false", "off"),
+            "ollama_keep_alive": _keep_alive(os.getenv("OLLAMA_KEEP_ALIVE")),
+            "ollama_warm_up": os.getenv("OLLAMA_WARM_UP", "1").lower()
+            not in ("0", "false", "off"),
+            "ollama_hosts": [
+                host.strip() for host in os.getenv("OLLAMA_HOSTS", "").split(",") if host.strip()
+            ],
+            "ollama_health_interval_s": float(os.getenv("OLLAMA_HEALTH_INTERVAL_S", "15")),
+            "llm_cache_memory_mb": int(os.getenv("LLM_CACHE_MEMORY_MB", "64")),
+            "llm_cache_max_mb": int(os.getenv("LLM_CACHE_MAX_MB", "0")),
+            "llm_cache_max_age_days": float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "0")),
         }
         defaults.update(overrides)
         super().__init__(**defaults)
@@ -0,0 +1,113 @@
+"""Índice invertido BM25 em memória com análise simples para português.
+
+A análise remove acentos, caixa e stopwords e aplica um stemmer leve de
+sufixos (plural, gênero e sufixos nominais comuns), suficiente para que
+"prazos"/"prazo" e "habilitação"/"habilitações" caiam no mesmo termo.
+O índice é composto só de dicts e listas, então pode ser serializado
+(pickle) e guardado no cache de etapas.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    """
+    a ao aos aquela aquelas aquele aqueles aquilo as ate com como da das de dela delas dele deles
+    depois do dos e ela elas ele eles em entre era eram essa essas esse esses esta estas este
+    estes eu foi foram ha isso isto ja la lhe lhes mais mas me mesmo meu meus minha minhas muito
+    na nao nas nem no nos nossa nossas nosso nossos num numa o os ou para pela pelas pelo pelos
+    por qual quando que quem se sem ser sera seu seus so sua suas tambem te tem ter teu tu tua um
+    uma umas uns voce voces vos art inciso item subitem alinea paragrafo
+    """.split()
+)
+
+# Sufixos em ordem de tentativa (do mais longo para o mais curto)
+_SUFFIXES = (
+    ("amentos", ""), ("imentos", ""), ("amento", ""), ("imento", ""),
+    ("acoes", "a"), ("icoes", "i"), ("coes", "c"), ("acao", "a"), ("icao", "i"), ("cao", "c"),
+    ("mente", ""), ("idades", ""), ("idade", ""), ("ismos", ""), ("ismo", ""),
+    ("aveis", ""), ("iveis", ""), ("avel", ""), ("ivel", ""),
+    ("ados", ""), ("adas", ""), ("idos", ""), ("idas", ""),
+    ("ado", ""), ("ada", ""), ("ido", ""), ("ida", ""),
+    ("encias", ""), ("encia", ""), ("ancias", ""), ("ancia", ""),
+    ("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"),
+    ("res", "r"), ("zes", "z"), ("ses", "s"), ("s", ""),
+)
+
+_MIN_STEM = 3
+
+
+def _strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def stem(word: str) -> str:
+    """Remove o primeiro sufixo conhecido, mantendo ao menos ``_MIN_STEM`` letras."""
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            word = word[: -len(suffix)] + replacement
+            break
+    # Vogal temática final (prazo/prazos -> praz)
+    if len(word) > _MIN_STEM + 1 and word[-1] in "aeo":
+        word = word[:-1]
+    return word
+
+
+def analyze(text: str) -> list[str]:
+    """Tokens normalizados e com stem, sem stopwords nem tokens de 1 caractere."""
+    words = _WORD.findall(_strip_accents(text.lower()))
+    return [stem(w) for w in words if len(w) > 1 and w not in STOPWORDS]
+
+
+@dataclass
+class BM25Index:
+    """Índice BM25 (Okapi) sobre uma lista de documentos (aqui, chunks)."""
+
+    postings: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
+    doc_lengths: list[int] = field(default_factory=list)
+    k1: float = 1.5
+    b: float = 0.75
+
+    @classmethod
+    def build(cls, docs: list[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        index = cls(k1=k1, b=b)
+        for doc_id, doc in enumerate(docs):
+            terms = Counter(analyze(doc))
+            index.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                index.postings.setdefault(term, []).append((doc_id, tf))
+        return index
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> list[float]:
+        """Score BM25 de cada documento para a consulta."""
+        out = [0.0] * len(self)
+        if not out:
+            return out
+        avg_len = (sum(self.doc_lengths) / len(self)) or 1.0
+        for term in set(analyze(query)):
+            idf = self.idf(term)
+            for doc_id, tf in self.postings.get(term, ()):
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_len)
+                out[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return out
+
+    def rank(self, query: str) -> list[int]:
+        """Documentos com score positivo, do mais ao menos relevante."""
+        scores = self.scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: (-scores[i], i))
+        return [i for i in ranked if scores[i] > 0]
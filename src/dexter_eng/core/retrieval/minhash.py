@@ -0,0 +1,106 @@
+"""Detecção de trechos quase duplicados com MinHash + LSH.
+
+As assinaturas usam *one permutation hashing*: cada shingle (sequência de
+``k`` palavras normalizadas) é hasheado uma única vez e o hash cai num dos
+``num_perm`` compartimentos, que guardam o menor valor visto. Isso mantém o
+custo linear no tamanho do texto. Compartimentos vazios são preenchidos
+por rotação (densificação) para que textos curtos continuem comparáveis.
+O LSH agrupa as assinaturas por faixas; só pares que colidem em alguma
+faixa têm a similaridade estimada e comparada com o limiar.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+
+_WORD = re.compile(r"\w+")
+_MAX_HASH = (1 << 64) - 1
+_EMPTY = -1
+
+SHINGLE_WORDS = 5
+NUM_PERM = 64
+BANDS = 16
+
+
+def _words(text: str) -> list[str]:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _WORD.findall(text)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def signature(text: str, num_perm: int = NUM_PERM, k: int = SHINGLE_WORDS) -> list[int]:
+    """Assinatura MinHash (one permutation hashing densificado) do texto."""
+    words = _words(text)
+    bins = [_EMPTY] * num_perm
+    if not words:
+        return bins
+    width = _MAX_HASH // num_perm + 1
+    for i in range(max(1, len(words) - k + 1)):
+        h = _hash(" ".join(words[i : i + k]))
+        b, value = divmod(h, width)
+        if bins[b] == _EMPTY or value < bins[b]:
+            bins[b] = value
+    # Densificação por rotação: compartimento vazio herda o próximo preenchido
+    out = list(bins)
+    for b in range(num_perm):
+        distance = 0
+        j = b
+        while bins[j] == _EMPTY:
+            j = (j + 1) % num_perm
+            distance += 1
+        out[b] = bins[j] + distance * width
+    return out
+
+
+def estimate_jaccard(a: list[int], b: list[int]) -> float:
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def near_duplicate_clusters(
+    texts: list[str],
+    threshold: float = 0.9,
+    num_perm: int = NUM_PERM,
+    bands: int = BANDS,
+) -> list[list[int]]:
+    """Agrupa os textos quase duplicados (Jaccard estimado >= ``threshold``).
+
+    Retorna todos os grupos, inclusive os unitários, cada um em ordem
+    crescente; o primeiro índice do grupo é o representante.
+    """
+    signatures = [signature(t, num_perm=num_perm) for t in texts]
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = max(1, num_perm // bands)
+    for band in range(bands):
+        buckets: dict[tuple[int, ...], list[int]] = {}
+        for i, sig in enumerate(signatures):
+            if sig[0] == _EMPTY:
+                continue
+            buckets.setdefault(tuple(sig[band * rows : (band + 1) * rows]), []).append(i)
+        for members in buckets.values():
+            for pos, i in enumerate(members):
+                for j in members[pos + 1 :]:
+                    root_i, root_j = find(i), find(j)
+                    if root_i == root_j:
+                        continue
+                    if estimate_jaccard(signatures[i], signatures[j]) >= threshold:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters: dict[int, list[int]] = {}
+    for i in range(len(texts)):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values())
@@ -17,3 +17,19 @@ def apply_edital_rules(ex: EditalExtraction) -> EditalExtraction:
     else:
         logger.info("Regras aplicadas: nenhuma alteração necessária")
     return ex
+
+
+def coverage_problems(ex: EditalExtraction, max_pendencias: int = 3) -> list[str]:
+    """Sinais de extração de baixa qualidade (usados para escalar de modelo).
+
+    Extração vazia é aceita (trechos sem cláusulas relevantes existem); o que
+    reprova é excesso de pendências ou itens sem citação de página.
+    """
+    problems = []
+    if len(ex.pendencias) > max_pendencias:
+        problems.append(f"{len(ex.pendencias)} pendências")
+    items = [*ex.prazos, *ex.documentos_exigidos, *ex.criterios_habilitacao, *ex.penalidades]
+    uncited = sum(1 for item in items if not item.citations)
+    if items and uncited * 2 > len(items):
+        problems.append(f"{uncited}/{len(items)} itens sem citação")
+    return problems
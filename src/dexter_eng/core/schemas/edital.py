@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic import BaseModel, Field, BeforeValidator
 from typing import List, Optional, Any
 from typing_extensions import Annotated
@@ -40,4 +41,10 @@ class EditalExtraction(BaseModel):
     criterios_habilitacao: List[Requirement] = Field(default_factory=list)
     penalidades: List[Requirement] = Field(default_factory=list)
 
-    pendencias: List[RobustString] = Field(default_factory=list)  # coisas que faltaram/ambíguas
\ No newline at end of file
+    pendencias: List[RobustString] = Field(default_factory=list)  # coisas que faltaram/ambíguas
+
+
+@lru_cache(maxsize=1)
+def edital_json_schema() -> dict[str, Any]:
+    """JSON Schema de ``EditalExtraction``, usado na decodificação restrita dos providers."""
+    return EditalExtraction.model_json_schema()
@@ -2,18 +2,37 @@
 
 from __future__ import annotations
 
+import atexit
 import logging
 import sqlite3
+import threading
 from hashlib import sha256
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
+
+from dexter_eng.persistence.memory_cache import ByteLRU
 
 logger = logging.getLogger(__name__)
 
 _DB_PATH: Path = Path("dexter.db")
 _conn: Optional[sqlite3.Connection] = None
 _initialized: bool = False
+# Serializa o acesso à conexão compartilhada entre threads (map-reduce, batch)
+_lock = threading.RLock()
+# Espera máxima por um lock do SQLite mantido por outro processo
+_BUSY_TIMEOUT_S = 30.0
+# Itens por consulta ``IN (...)``; o SQLite limita o nº de parâmetros
+_IN_BATCH = 500
+
+# Camada em memória do llm_cache (LRU por bytes), à frente do SQLite
+_memory_cache = ByteLRU(64 * 1024 * 1024)
+# Acertos ainda não gravados: por entrada (LFU do cache-gc) e por camada
+# (cache-stats). Gravados em lote para que um acerto em memória não custe
+# uma escrita no SQLite.
+_pending_hits: dict[tuple[str, str], int] = {}
+_pending_counts: dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+_FLUSH_EVERY = 64
 
 _RUNS_ADDITIONAL_COLUMNS = {
     "prompt_chars": "INTEGER",
@@ -21,12 +40,25 @@ _RUNS_ADDITIONAL_COLUMNS = {
     "cache_hit": "INTEGER",
     "llm_model": "TEXT",
     "request_id": "TEXT",
+    "result_cache_hit": "INTEGER",
+    "llm_tier": "TEXT",
+    "llm_escalations": "INTEGER",
+    "llm_calls": "INTEGER",
+    "input_tokens": "INTEGER",
+    "output_tokens": "INTEGER",
+    "cached_input_tokens": "INTEGER",
+    "ttft_s": "REAL",
+    "tokens_per_s": "REAL",
+    "load_s": "REAL",
+    "cost_usd": "REAL",
 }
 
 _LLM_CACHE_ADDITIONAL_COLUMNS = {
     "prompt_chars": "INTEGER",
     "response_chars": "INTEGER",
     "response_sha256": "TEXT",
+    "hits": "INTEGER DEFAULT 0",
+    "last_hit_at": "TEXT",
 }
 
 _CREATE_TABLES_SQL = """
@@ -57,20 +89,91 @@ CREATE TABLE IF NOT EXISTS llm_cache (
     response_text TEXT,
     created_at TEXT
 );
+
+CREATE TABLE IF NOT EXISTS result_cache (
+    id INTEGER PRIMARY KEY,
+    document_sha256 TEXT,
+    prompt_hash TEXT,
+    model TEXT,
+    pipeline_version TEXT,
+    max_chars INTEGER,
+    options TEXT,
+    validated_json TEXT,
+    result_md TEXT,
+    created_at TEXT,
+    UNIQUE (document_sha256, prompt_hash, model, pipeline_version, max_chars, options)
+);
+
+CREATE TABLE IF NOT EXISTS step_cache (
+    id INTEGER PRIMARY KEY,
+    cache_key TEXT UNIQUE,
+    step TEXT,
+    payload BLOB,
+    payload_bytes INTEGER,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS page_text_cache (
+    sha256 TEXT,
+    page_index INTEGER,
+    extractor TEXT,
+    text TEXT,
+    chars_saved INTEGER DEFAULT 0,
+    created_at TEXT,
+    PRIMARY KEY (sha256, page_index, extractor)
+);
+
+CREATE TABLE IF NOT EXISTS ocr_page_cache (
+    page_hash TEXT,
+    engine TEXT,
+    text TEXT,
+    created_at TEXT,
+    PRIMARY KEY (page_hash, engine)
+);
+
+CREATE TABLE IF NOT EXISTS cache_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS llm_lease (
+    prompt_hash TEXT,
+    model TEXT,
+    owner TEXT,
+    expires_at TEXT,
+    PRIMARY KEY (prompt_hash, model)
+);
+
+CREATE TABLE IF NOT EXISTS run_steps (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER,
+    step TEXT,
+    position INTEGER,
+    elapsed_ms REAL,
+    cache_hit INTEGER
+);
 """
 
 
 def _get_conn() -> sqlite3.Connection:
     global _conn, _initialized
-    if _conn is None:
-        _conn = sqlite3.connect(str(_DB_PATH), check_same_thread=False)
-        _conn.row_factory = sqlite3.Row
-    if not _initialized:
-        _conn.executescript(_CREATE_TABLES_SQL)
-        migrate_db_if_needed(_conn)
-        _conn.commit()
-        _initialized = True
-    return _conn
+    with _lock:
+        if _conn is None:
+            _conn = sqlite3.connect(
+                str(_DB_PATH), check_same_thread=False, timeout=_BUSY_TIMEOUT_S
+            )
+            _conn.row_factory = sqlite3.Row
+            # Vários processos (workers de batch, reservas de chamadas à LLM)
+            # escrevem no mesmo banco: WAL deixa leitores e escritor em paralelo
+            # e o busy_timeout espera o lock em vez de "database is locked".
+            _conn.execute(f"PRAGMA busy_timeout = {int(_BUSY_TIMEOUT_S * 1000)}")
+            _conn.execute("PRAGMA journal_mode = WAL")
+        if not _initialized:
+            _conn.executescript(_CREATE_TABLES_SQL)
+            migrate_db_if_needed(_conn)
+            _conn.commit()
+            _initialized = True
+        return _conn
 
 
 def _get_table_columns(conn: sqlite3.Connection, table_name: str) -> set[str]:
@@ -98,64 +201,75 @@ def migrate_db_if_needed(conn: sqlite3.Connection | None = None) -> None:
 def init_db(db_path: str | Path | None = None) -> None:
     """Inicializa o banco e cria tabelas se não existirem."""
     global _DB_PATH, _conn, _initialized
-    if db_path is not None:
-        _DB_PATH = Path(db_path)
-    # Fecha conexão anterior se houver
-    if _conn is not None:
-        _conn.close()
-        _conn = None
-        _initialized = False
+    with _lock:
+        if db_path is not None:
+            _DB_PATH = Path(db_path)
+        # Fecha conexão anterior se houver
+        if _conn is not None:
+            _flush_cache_counters(_conn)
+            _conn.close()
+            _conn = None
+            _initialized = False
+        _reset_memory_cache()
+
+        _get_conn()  # Abre conexão e cria tabelas automaticamente
+        logger.info("Banco SQLite inicializado: %s", _DB_PATH)
 
-    _get_conn()  # Abre conexão e cria tabelas automaticamente
-    logger.info("Banco SQLite inicializado: %s", _DB_PATH)
+
+def ensure_db() -> None:
+    """Garante o banco aberto sem fechar uma conexão já em uso por outras threads."""
+    _get_conn()
 
 
 def get_or_create_document(
     path: str, sha256: str, pages: int, chars: int
 ) -> int:
     """Retorna ID do documento, criando se não existir."""
-    conn = _get_conn()
-    row = conn.execute(
-        "SELECT id FROM documents WHERE sha256 = ?", (sha256,)
-    ).fetchone()
-    if row:
-        return row["id"]
-
-    now = datetime.now(timezone.utc).isoformat()
-    cur = conn.execute(
-        "INSERT INTO documents (path, sha256, pages, chars, created_at) VALUES (?, ?, ?, ?, ?)",
-        (path, sha256, pages, chars, now),
-    )
-    conn.commit()
-    return cur.lastrowid  # type: ignore[return-value]
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute(
+            "SELECT id FROM documents WHERE sha256 = ?", (sha256,)
+        ).fetchone()
+        if row:
+            return row["id"]
+
+        now = datetime.now(timezone.utc).isoformat()
+        cur = conn.execute(
+            "INSERT INTO documents (path, sha256, pages, chars, created_at) VALUES (?, ?, ?, ?, ?)",
+            (path, sha256, pages, chars, now),
+        )
+        conn.commit()
+        return cur.lastrowid  # type: ignore[return-value]
 
 
 def create_run(document_id: int, model: str, pipeline_version: str) -> int:
     """Cria um registro de execução e retorna o ID."""
-    conn = _get_conn()
-    now = datetime.now(timezone.utc).isoformat()
-    cur = conn.execute(
-        """
-        INSERT INTO runs (document_id, pipeline_version, model, llm_model, started_at, status)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        (document_id, pipeline_version, model, model, now, "running"),
-    )
-    conn.commit()
-    logger.info("Run #%d criado (doc_id=%d, model=%s)", cur.lastrowid, document_id, model)
-    return cur.lastrowid  # type: ignore[return-value]
+    with _lock:
+        conn = _get_conn()
+        now = datetime.now(timezone.utc).isoformat()
+        cur = conn.execute(
+            """
+            INSERT INTO runs (document_id, pipeline_version, model, llm_model, started_at, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (document_id, pipeline_version, model, model, now, "running"),
+        )
+        conn.commit()
+        logger.info("Run #%d criado (doc_id=%d, model=%s)", cur.lastrowid, document_id, model)
+        return cur.lastrowid  # type: ignore[return-value]
 
 
 def finish_run(run_id: int, status: str, error: str | None = None) -> None:
     """Finaliza uma execução com status e possível erro."""
-    conn = _get_conn()
-    now = datetime.now(timezone.utc).isoformat()
-    conn.execute(
-        "UPDATE runs SET ended_at = ?, status = ?, error = ? WHERE id = ?",
-        (now, status, error, run_id),
-    )
-    conn.commit()
-    logger.info("Run #%d finalizado (status=%s)", run_id, status)
+    with _lock:
+        conn = _get_conn()
+        now = datetime.now(timezone.utc).isoformat()
+        conn.execute(
+            "UPDATE runs SET ended_at = ?, status = ?, error = ? WHERE id = ?",
+            (now, status, error, run_id),
+        )
+        conn.commit()
+        logger.info("Run #%d finalizado (status=%s)", run_id, status)
 
 
 def record_run_metrics(
@@ -165,72 +279,281 @@ def record_run_metrics(
     response_chars: int,
     cache_hit: bool,
     request_id: str | None,
+    result_cache_hit: bool = False,
+    llm_tier: str | None = None,
+    llm_escalations: int = 0,
 ) -> None:
-    """Atualiza métricas de uso/custo da etapa de LLM na run."""
-    conn = _get_conn()
-    conn.execute(
-        """
-        UPDATE runs
-        SET prompt_chars = ?, response_chars = ?, cache_hit = ?, request_id = ?
-        WHERE id = ?
-        """,
-        (prompt_chars, response_chars, int(cache_hit), request_id, run_id),
-    )
-    conn.commit()
+    """Atualiza métricas de uso/custo da etapa de LLM na run.
+
+    ``llm_tier`` é o nível da cascata que respondeu ("mixed" se mais de um).
+    """
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            """
+            UPDATE runs
+            SET prompt_chars = ?, response_chars = ?, cache_hit = ?, request_id = ?,
+                result_cache_hit = ?, llm_tier = ?, llm_escalations = ?
+            WHERE id = ?
+            """,
+            (
+                prompt_chars,
+                response_chars,
+                int(cache_hit),
+                request_id,
+                int(result_cache_hit),
+                llm_tier,
+                llm_escalations,
+                run_id,
+            ),
+        )
+        conn.commit()
+
+
+_RUN_USAGE_FIELDS = (
+    "llm_calls",
+    "input_tokens",
+    "output_tokens",
+    "cached_input_tokens",
+    "ttft_s",
+    "tokens_per_s",
+    "load_s",
+    "cost_usd",
+)
+
+
+def record_run_usage(run_id: int, usage: dict[str, Any]) -> None:
+    """Grava tokens, latência e custo agregados das chamadas à LLM da run.
+
+    ``usage`` segue as chaves de ``_RUN_USAGE_FIELDS``; as ausentes ficam NULL.
+    """
+    with _lock:
+        conn = _get_conn()
+        assignments = ", ".join(f"{field} = ?" for field in _RUN_USAGE_FIELDS)
+        conn.execute(
+            f"UPDATE runs SET {assignments} WHERE id = ?",
+            (*(usage.get(field) for field in _RUN_USAGE_FIELDS), run_id),
+        )
+        conn.commit()
 
 
 def get_run_history(limit: int = 20) -> list[sqlite3.Row]:
     """Retorna histórico de runs recentes para relatórios CLI."""
-    conn = _get_conn()
-    rows = conn.execute(
-        """
-        SELECT
-            id,
-            status,
-            cache_hit,
-            prompt_chars,
-            response_chars,
-            COALESCE(llm_model, model) AS model,
-            started_at,
-            ended_at
-        FROM runs
-        ORDER BY id DESC
-        LIMIT ?
-        """,
-        (limit,),
-    ).fetchall()
-    return list(rows)
+    with _lock:
+        conn = _get_conn()
+        rows = conn.execute(
+            """
+            SELECT
+                id,
+                status,
+                cache_hit,
+                prompt_chars,
+                response_chars,
+                COALESCE(llm_model, model) AS model,
+                started_at,
+                ended_at,
+                input_tokens,
+                cached_input_tokens,
+                output_tokens,
+                ttft_s,
+                tokens_per_s,
+                load_s,
+                cost_usd
+            FROM runs
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        return list(rows)
 
 
 def get_cache_stats() -> dict[str, float | int]:
     """Retorna estatísticas do cache com base nas runs registradas."""
-    conn = _get_conn()
-    cache_entries = conn.execute("SELECT COUNT(*) AS total FROM llm_cache").fetchone()["total"]
-    total_runs = conn.execute("SELECT COUNT(*) AS total FROM runs").fetchone()["total"]
-    cache_hits = conn.execute(
-        "SELECT COUNT(*) AS total FROM runs WHERE cache_hit = 1"
-    ).fetchone()["total"]
-    hit_rate = (cache_hits / total_runs) if total_runs else 0.0
+    with _lock:
+        conn = _get_conn()
+        _flush_cache_counters(conn)
+        counters = {
+            row["name"]: row["value"]
+            for row in conn.execute("SELECT name, value FROM cache_counters").fetchall()
+        }
+        lookups = sum(counters.get(name, 0) for name in ("memory_hits", "disk_hits", "misses"))
+        cache_bytes = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(CAST(response_text AS BLOB))), 0) AS total FROM llm_cache"
+        ).fetchone()["total"]
+        cache_entries = conn.execute("SELECT COUNT(*) AS total FROM llm_cache").fetchone()["total"]
+        total_runs = conn.execute("SELECT COUNT(*) AS total FROM runs").fetchone()["total"]
+        cache_hits = conn.execute(
+            "SELECT COUNT(*) AS total FROM runs WHERE cache_hit = 1"
+        ).fetchone()["total"]
+        hit_rate = (cache_hits / total_runs) if total_runs else 0.0
+        result_entries = conn.execute(
+            "SELECT COUNT(*) AS total FROM result_cache"
+        ).fetchone()["total"]
+        result_hits = conn.execute(
+            "SELECT COUNT(*) AS total FROM runs WHERE result_cache_hit = 1"
+        ).fetchone()["total"]
+        return {
+            "total_entries": int(cache_entries),
+            "total_runs": int(total_runs),
+            "cache_hits": int(cache_hits),
+            "hit_rate": float(hit_rate),
+            "result_entries": int(result_entries),
+            "result_hits": int(result_hits),
+            "cache_bytes": int(cache_bytes),
+            "lookups": int(lookups),
+            "memory_hits": int(counters.get("memory_hits", 0)),
+            "disk_hits": int(counters.get("disk_hits", 0)),
+            "memory_hit_rate": counters.get("memory_hits", 0) / lookups if lookups else 0.0,
+            "disk_hit_rate": counters.get("disk_hits", 0) / lookups if lookups else 0.0,
+        }
+
+
+def configure_memory_cache(max_bytes: int) -> None:
+    """Define o limite da camada em memória do cache LLM (0 desliga)."""
+    _memory_cache.resize(max_bytes)
+
+
+def _reset_memory_cache() -> None:
+    _memory_cache.clear()
+    _pending_hits.clear()
+    for name in _pending_counts:
+        _pending_counts[name] = 0
+
+
+def _count_lookup(tier: str, key: tuple[str, str] | None = None) -> None:
+    """Registra uma consulta ao cache (chamar com ``_lock``)."""
+    _pending_counts[tier] += 1
+    if key is not None:
+        _pending_hits[key] = _pending_hits.get(key, 0) + 1
+    if sum(_pending_counts.values()) >= _FLUSH_EVERY and _conn is not None:
+        _flush_cache_counters(_conn)
+
+
+def _flush_cache_counters(conn: sqlite3.Connection) -> None:
+    """Grava os acertos pendentes em ``llm_cache.hits`` e ``cache_counters``."""
+    if not _pending_hits and not any(_pending_counts.values()):
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    conn.executemany(
+        """
+        UPDATE llm_cache SET hits = COALESCE(hits, 0) + ?, last_hit_at = ?
+        WHERE prompt_hash = ? AND model = ?
+        """,
+        [(hits, now, prompt_hash, model) for (prompt_hash, model), hits in _pending_hits.items()],
+    )
+    conn.executemany(
+        """
+        INSERT INTO cache_counters (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+        """,
+        [(name, value) for name, value in _pending_counts.items() if value],
+    )
+    conn.commit()
+    _pending_hits.clear()
+    for name in _pending_counts:
+        _pending_counts[name] = 0
+
+
+def flush_cache_counters() -> None:
+    """Grava os contadores de acerto pendentes (no-op sem conexão aberta)."""
+    with _lock:
+        if _conn is not None:
+            _flush_cache_counters(_conn)
+
+
+atexit.register(flush_cache_counters)
+
+
+def get_cached_response(prompt_hash: str, model: str, *, record: bool = True) -> Optional[str]:
+    """Consulta cache de resposta LLM por hash de prompt (memória, depois SQLite).
+
+    ``record=False`` não conta a consulta nas estatísticas (releituras internas).
+    """
+    key = (prompt_hash, model)
+    cached = _memory_cache.get(key)
+    with _lock:
+        if cached is not None:
+            if record:
+                _count_lookup("memory_hits", key)
+            return cached
+        conn = _get_conn()
+        row = conn.execute(
+            "SELECT response_text FROM llm_cache WHERE prompt_hash = ? AND model = ?",
+            (prompt_hash, model),
+        ).fetchone()
+        if not row:
+            if record:
+                _count_lookup("misses")
+            return None
+        if record:
+            _count_lookup("disk_hits", key)
+    _memory_cache.put(key, row["response_text"])
+    return row["response_text"]
+
+
+def gc_llm_cache(
+    *, max_bytes: int | None = None, max_age_days: float | None = None
+) -> dict[str, int]:
+    """Aplica as políticas de retenção à camada SQLite do cache LLM.
+
+    - ``max_age_days``: remove entradas sem acerto (ou criadas, se nunca
+      usadas) há mais tempo que isso;
+    - ``max_bytes``: remove as entradas menos acessadas (LFU por ``hits``,
+      desempate pelo uso mais antigo) até o total de respostas caber.
+    """
+    with _lock:
+        conn = _get_conn()
+        _flush_cache_counters(conn)
+        removed_by_age = removed_by_size = 0
+        if max_age_days is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+            cur = conn.execute(
+                "DELETE FROM llm_cache WHERE COALESCE(last_hit_at, created_at) < ?",
+                (cutoff.isoformat(),),
+            )
+            removed_by_age = cur.rowcount
+        if max_bytes is not None:
+            rows = conn.execute(
+                """
+                SELECT id, LENGTH(CAST(response_text AS BLOB)) AS size FROM llm_cache
+                ORDER BY COALESCE(hits, 0), COALESCE(last_hit_at, created_at)
+                """
+            ).fetchall()
+            total = sum(row["size"] or 0 for row in rows)
+            evicted: list[tuple[int]] = []
+            for row in rows:
+                if total <= max_bytes:
+                    break
+                evicted.append((row["id"],))
+                total -= row["size"] or 0
+            conn.executemany("DELETE FROM llm_cache WHERE id = ?", evicted)
+            removed_by_size = len(evicted)
+        conn.commit()
+        remaining = conn.execute(
+            """
+            SELECT COUNT(*) AS entries,
+                   COALESCE(SUM(LENGTH(CAST(response_text AS BLOB))), 0) AS bytes
+            FROM llm_cache
+            """
+        ).fetchone()
+        # Entradas removidas não podem continuar respondendo pela memória
+        _memory_cache.clear()
+    logger.info(
+        "cache-gc: %d removidas por idade, %d por tamanho; restam %d (%d bytes)",
+        removed_by_age,
+        removed_by_size,
+        remaining["entries"],
+        remaining["bytes"],
+    )
     return {
-        "total_entries": int(cache_entries),
-        "total_runs": int(total_runs),
-        "cache_hits": int(cache_hits),
-        "hit_rate": float(hit_rate),
+        "removed_by_age": removed_by_age,
+        "removed_by_size": removed_by_size,
+        "remaining_entries": int(remaining["entries"]),
+        "remaining_bytes": int(remaining["bytes"]),
     }
 
 
-def get_cached_response(prompt_hash: str, model: str) -> Optional[str]:
-    """Consulta cache de resposta LLM por hash de prompt."""
-    conn = _get_conn()
-    row = conn.execute(
-        "SELECT response_text FROM llm_cache WHERE prompt_hash = ? AND model = ?",
-        (prompt_hash, model),
-    ).fetchone()
-    if row:
-        return row["response_text"]
-    return None
-
-
 def save_cached_response(
     prompt_hash: str,
     model: str,
@@ -240,34 +563,261 @@ def save_cached_response(
     response_chars: int | None = None,
 ) -> None:
     """Salva resposta da LLM no cache."""
-    conn = _get_conn()
-    now = datetime.now(timezone.utc).isoformat()
-    resolved_prompt_chars = prompt_chars
-    resolved_response_chars = response_chars if response_chars is not None else len(response_text)
-    response_digest = sha256(response_text.encode("utf-8")).hexdigest()
-    conn.execute(
-        """
-        INSERT OR IGNORE INTO llm_cache
-        (prompt_hash, model, response_text, created_at, prompt_chars, response_chars, response_sha256)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            prompt_hash,
-            model,
-            response_text,
-            now,
-            resolved_prompt_chars,
-            resolved_response_chars,
-            response_digest,
-        ),
-    )
-    conn.commit()
+    with _lock:
+        conn = _get_conn()
+        now = datetime.now(timezone.utc).isoformat()
+        resolved_prompt_chars = prompt_chars
+        resolved_response_chars = response_chars if response_chars is not None else len(response_text)
+        response_digest = sha256(response_text.encode("utf-8")).hexdigest()
+        cur = conn.execute(
+            """
+            INSERT OR IGNORE INTO llm_cache
+            (prompt_hash, model, response_text, created_at, prompt_chars, response_chars, response_sha256)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                prompt_hash,
+                model,
+                response_text,
+                now,
+                resolved_prompt_chars,
+                resolved_response_chars,
+                response_digest,
+            ),
+        )
+        conn.commit()
+    # Entrada já existente prevalece (INSERT OR IGNORE); só a nova vai à memória
+    if cur.rowcount == 1:
+        _memory_cache.put((prompt_hash, model), response_text)
+
+
+def acquire_llm_lease(prompt_hash: str, model: str, owner: str, ttl_s: float) -> bool:
+    """Tenta reservar a chamada à LLM de ``(prompt_hash, model)`` para ``owner``.
+
+    Só um processo por vez segura a reserva; os demais esperam a resposta
+    aparecer no ``llm_cache``. Reservas vencidas (dono morto) são descartadas.
+    """
+    with _lock:
+        conn = _get_conn()
+        now = datetime.now(timezone.utc)
+        conn.execute(
+            "DELETE FROM llm_lease WHERE prompt_hash = ? AND model = ? AND expires_at < ?",
+            (prompt_hash, model, now.isoformat()),
+        )
+        cur = conn.execute(
+            """
+            INSERT OR IGNORE INTO llm_lease (prompt_hash, model, owner, expires_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (prompt_hash, model, owner, (now + timedelta(seconds=ttl_s)).isoformat()),
+        )
+        conn.commit()
+        return cur.rowcount == 1
+
+
+def release_llm_lease(prompt_hash: str, model: str, owner: str) -> None:
+    """Libera a reserva de ``owner`` (no-op se já venceu ou é de outro)."""
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "DELETE FROM llm_lease WHERE prompt_hash = ? AND model = ? AND owner = ?",
+            (prompt_hash, model, owner),
+        )
+        conn.commit()
+
+
+def get_cached_result(
+    *,
+    document_sha256: str,
+    prompt_hash: str,
+    model: str,
+    pipeline_version: str,
+    max_chars: int,
+    options: str,
+) -> Optional[sqlite3.Row]:
+    """Consulta o cache de resultado final (JSON validado + Markdown) de uma execução."""
+    with _lock:
+        conn = _get_conn()
+        return conn.execute(
+            """
+            SELECT validated_json, result_md, created_at FROM result_cache
+            WHERE document_sha256 = ? AND prompt_hash = ? AND model = ?
+              AND pipeline_version = ? AND max_chars = ? AND options = ?
+            """,
+            (document_sha256, prompt_hash, model, pipeline_version, max_chars, options),
+        ).fetchone()
+
+
+def save_cached_result(
+    *,
+    document_sha256: str,
+    prompt_hash: str,
+    model: str,
+    pipeline_version: str,
+    max_chars: int,
+    options: str,
+    validated_json: str,
+    result_md: str,
+) -> None:
+    """Salva o resultado final de uma execução; substitui a entrada anterior (``--force``)."""
+    with _lock:
+        conn = _get_conn()
+        now = datetime.now(timezone.utc).isoformat()
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO result_cache
+            (document_sha256, prompt_hash, model, pipeline_version, max_chars, options,
+             validated_json, result_md, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                document_sha256,
+                prompt_hash,
+                model,
+                pipeline_version,
+                max_chars,
+                options,
+                validated_json,
+                result_md,
+                now,
+            ),
+        )
+        conn.commit()
+
+
+def get_step_artifact(cache_key: str) -> Optional[bytes]:
+    """Consulta as saídas serializadas de uma etapa pela chave de conteúdo."""
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute(
+            "SELECT payload FROM step_cache WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        if row:
+            return bytes(row["payload"])
+        return None
+
+
+def save_step_artifact(cache_key: str, step: str, payload: bytes) -> None:
+    """Salva as saídas serializadas de uma etapa."""
+    with _lock:
+        conn = _get_conn()
+        now = datetime.now(timezone.utc).isoformat()
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO step_cache (cache_key, step, payload, payload_bytes, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (cache_key, step, payload, len(payload), now),
+        )
+        conn.commit()
+
+
+def record_run_steps(run_id: int, steps: list[tuple[str, float, bool]]) -> None:
+    """Registra o tempo de parede de cada etapa da run: ``(nome, segundos, cache_hit)``."""
+    with _lock:
+        conn = _get_conn()
+        conn.executemany(
+            """
+            INSERT INTO run_steps (run_id, step, position, elapsed_ms, cache_hit)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (run_id, name, position, elapsed * 1000.0, int(cache_hit))
+                for position, (name, elapsed, cache_hit) in enumerate(steps)
+            ],
+        )
+        conn.commit()
+
+
+def get_run_steps(run_id: int) -> list[sqlite3.Row]:
+    """Retorna as etapas de uma run na ordem de execução."""
+    with _lock:
+        conn = _get_conn()
+        rows = conn.execute(
+            """
+            SELECT step, elapsed_ms, cache_hit FROM run_steps
+            WHERE run_id = ? ORDER BY position
+            """,
+            (run_id,),
+        ).fetchall()
+        return list(rows)
+
+
+def get_cached_pages(sha256: str, plan: dict[int, str]) -> dict[int, tuple[str, int]]:
+    """Retorna ``{página: (texto, chars economizados)}`` cujo extrator confere com ``plan``."""
+    with _lock:
+        conn = _get_conn()
+        rows = conn.execute(
+            "SELECT page_index, extractor, text, chars_saved FROM page_text_cache WHERE sha256 = ?",
+            (sha256,),
+        ).fetchall()
+    return {
+        row["page_index"]: (row["text"], row["chars_saved"] or 0)
+        for row in rows
+        if plan.get(row["page_index"]) == row["extractor"]
+    }
+
+
+def save_cached_pages(sha256: str, pages: list[tuple[int, str, str, int]]) -> None:
+    """Grava ``(página, extrator, texto, chars economizados)`` no cache do documento."""
+    with _lock:
+        conn = _get_conn()
+        now = datetime.now(timezone.utc).isoformat()
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO page_text_cache
+                (sha256, page_index, extractor, text, chars_saved, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (sha256, index, extractor, text, saved, now)
+                for index, extractor, text, saved in pages
+            ],
+        )
+        conn.commit()
+
+
+def get_ocr_texts(page_hashes: list[str], engine: str) -> dict[str, str]:
+    """Retorna ``{hash da página: texto}`` já reconhecido pelo ``engine``."""
+    if not page_hashes:
+        return {}
+    texts: dict[str, str] = {}
+    with _lock:
+        conn = _get_conn()
+        for start in range(0, len(page_hashes), _IN_BATCH):
+            batch = page_hashes[start : start + _IN_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                "SELECT page_hash, text FROM ocr_page_cache "
+                f"WHERE engine = ? AND page_hash IN ({placeholders})",
+                (engine, *batch),
+            ).fetchall()
+            texts.update((row["page_hash"], row["text"]) for row in rows)
+    return texts
+
+
+def save_ocr_texts(items: list[tuple[str, str]], engine: str) -> None:
+    """Grava ``(hash da página, texto)`` reconhecidos pelo ``engine``."""
+    with _lock:
+        conn = _get_conn()
+        now = datetime.now(timezone.utc).isoformat()
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO ocr_page_cache (page_hash, engine, text, created_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(page_hash, engine, text, now) for page_hash, text in items],
+        )
+        conn.commit()
 
 
 def close_db() -> None:
     """Fecha a conexão com o banco."""
     global _conn, _initialized
-    if _conn is not None:
-        _conn.close()
-        _conn = None
-        _initialized = False
+    with _lock:
+        if _conn is not None:
+            _flush_cache_counters(_conn)
+            _conn.close()
+            _conn = None
+            _initialized = False
+        _reset_memory_cache()
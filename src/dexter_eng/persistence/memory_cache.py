@@ -0,0 +1,61 @@
+"""Cache LRU em memória limitado por bytes (camada à frente do SQLite)."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+# Custo fixo estimado por entrada (chave, objetos Python, nó do OrderedDict)
+_ENTRY_OVERHEAD_BYTES = 128
+
+
+class ByteLRU:
+    """Mapa ``chave -> texto`` que descarta os menos usados acima de ``max_bytes``.
+
+    ``max_bytes=0`` desliga o cache. Seguro entre threads.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[Hashable, tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: str) -> None:
+        size = len(value.encode("utf-8")) + _ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            # Entradas maiores que o limite inteiro não entram
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _key, (_value, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def resize(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and self.bytes > self.max_bytes:
+                _key, (_value, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
@@ -0,0 +1,189 @@
+"""Motor mínimo de etapas com cache de artefatos por hash de conteúdo.
+
+Cada ``Step`` declara as entradas que lê e as saídas que produz. Antes de
+executar uma etapa cacheável, o motor calcula a chave
+``sha256(nome, versão, hash de cada entrada)`` e procura as saídas no
+cache (tabela ``step_cache``); só recalcula quando alguma entrada mudou.
+O tempo de cada etapa é medido e devolvido em ``StepTiming``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import json
+import logging
+import pickle
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+
+from dexter_eng.persistence.db import get_step_artifact, save_step_artifact
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(value: Any) -> str:
+    """Hash SHA-256 estável do conteúdo de um valor (str, bytes, JSON, pydantic, dataclass)."""
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    if isinstance(value, str):
+        return hashlib.sha256(value.encode("utf-8", "surrogatepass")).hexdigest()
+    canonical = json.dumps(
+        _to_canonical(value), sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _to_canonical(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: _to_canonical(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, dict):
+        return {str(k): _to_canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_canonical(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    return repr(value)
+
+
+@dataclass
+class Step:
+    """Uma etapa do pipeline.
+
+    - ``inputs``: valores lidos do contexto que compõem a chave de cache;
+    - ``uses``: recursos passados à função mas fora da chave (cliente LLM,
+      caminho do arquivo, nº de workers);
+    - ``outputs``: nomes das saídas; ``fn`` devolve um dict com exatamente essas chaves;
+    - ``afn``: variante assíncrona opcional (sem ela, ``fn`` roda no executor);
+    - ``version``: mude ao alterar a lógica da etapa para invalidar o cache.
+    """
+
+    name: str
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+    fn: Callable[..., dict[str, Any]]
+    afn: Optional[Callable[..., Awaitable[dict[str, Any]]]] = None
+    uses: tuple[str, ...] = ()
+    version: str = "1"
+    cacheable: bool = True
+
+
+@dataclass
+class StepTiming:
+    name: str
+    elapsed_seconds: float
+    cache_hit: bool
+
+
+@dataclass
+class EngineRun:
+    values: dict[str, Any]
+    timings: list[StepTiming] = field(default_factory=list)
+
+    def as_meta(self) -> list[dict[str, Any]]:
+        return [
+            {"step": t.name, "elapsed_seconds": round(t.elapsed_seconds, 4), "cache_hit": t.cache_hit}
+            for t in self.timings
+        ]
+
+
+class PipelineEngine:
+    """Executa uma sequência de ``Step`` sobre um contexto de valores nomeados."""
+
+    def __init__(self, steps: list[Step], use_cache: bool = True) -> None:
+        self.steps = steps
+        self.use_cache = use_cache
+
+    def run(self, initial: dict[str, Any]) -> EngineRun:
+        state = _RunState(initial)
+        for step in self.steps:
+            key, cached = self._lookup(step, state)
+            t0 = time.monotonic()
+            if cached is not None:
+                outputs = cached
+            else:
+                outputs = step.fn(**state.kwargs(step))
+            self._finish(step, state, key, outputs, t0, cache_hit=cached is not None)
+        return EngineRun(values=state.values, timings=state.timings)
+
+    async def arun(self, initial: dict[str, Any]) -> EngineRun:
+        loop = asyncio.get_running_loop()
+        state = _RunState(initial)
+        for step in self.steps:
+            key, cached = self._lookup(step, state)
+            t0 = time.monotonic()
+            if cached is not None:
+                outputs = cached
+            elif step.afn is not None:
+                outputs = await step.afn(**state.kwargs(step))
+            else:
+                outputs = await loop.run_in_executor(
+                    None, functools.partial(step.fn, **state.kwargs(step))
+                )
+            self._finish(step, state, key, outputs, t0, cache_hit=cached is not None)
+        return EngineRun(values=state.values, timings=state.timings)
+
+    def _lookup(self, step: Step, state: "_RunState") -> tuple[str | None, dict[str, Any] | None]:
+        if not (self.use_cache and step.cacheable):
+            return None, None
+        key = state.cache_key(step)
+        payload = get_step_artifact(key)
+        if payload is None:
+            logger.debug("Etapa %s: cache MISS (%s…)", step.name, key[:12])
+            return key, None
+        logger.info("Etapa %s: cache HIT (%s…)", step.name, key[:12])
+        return key, pickle.loads(payload)
+
+    def _finish(
+        self,
+        step: Step,
+        state: "_RunState",
+        key: str | None,
+        outputs: dict[str, Any],
+        t0: float,
+        cache_hit: bool,
+    ) -> None:
+        missing = set(step.outputs) - set(outputs)
+        if missing:
+            raise RuntimeError(f"Etapa {step.name} não produziu: {sorted(missing)}")
+        if key is not None and not cache_hit:
+            save_step_artifact(key, step.name, pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL))
+        state.values.update(outputs)
+        for name in step.outputs:
+            state.hashes.pop(name, None)
+        elapsed = time.monotonic() - t0
+        state.timings.append(StepTiming(name=step.name, elapsed_seconds=elapsed, cache_hit=cache_hit))
+        logger.info("Etapa %s concluída em %.3fs%s", step.name, elapsed, " (cache)" if cache_hit else "")
+
+
+class _RunState:
+    def __init__(self, initial: dict[str, Any]) -> None:
+        self.values: dict[str, Any] = dict(initial)
+        self.hashes: dict[str, str] = {}
+        self.timings: list[StepTiming] = []
+
+    def kwargs(self, step: Step) -> dict[str, Any]:
+        names = (*step.inputs, *step.uses)
+        missing = [n for n in names if n not in self.values]
+        if missing:
+            raise KeyError(f"Etapa {step.name} requer valores ausentes: {missing}")
+        return {n: self.values[n] for n in names}
+
+    def hash_of(self, name: str) -> str:
+        if name not in self.hashes:
+            self.hashes[name] = content_hash(self.values[name])
+        return self.hashes[name]
+
+    def cache_key(self, step: Step) -> str:
+        self.kwargs(step)  # valida presença das entradas
+        parts = [step.name, step.version, *(f"{n}={self.hash_of(n)}" for n in step.inputs)]
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
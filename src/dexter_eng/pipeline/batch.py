@@ -0,0 +1,152 @@
+"""Processamento em lote de vários PDFs com um pool de workers."""
+
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from dexter_eng.adapters.llm.client import LLMClient
+from dexter_eng.persistence.db import ensure_db
+from dexter_eng.pipeline.edital_pipeline import (
+    PipelineOptions,
+    PipelineResult,
+    run_edital_pipeline_detailed,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItem:
+    pdf_path: Path
+    result: Optional[PipelineResult] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.result is not None
+
+
+@dataclass
+class BatchSummary:
+    items: list[BatchItem] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> list[BatchItem]:
+        return [i for i in self.items if i.ok]
+
+    @property
+    def failed(self) -> list[BatchItem]:
+        return [i for i in self.items if not i.ok]
+
+    @property
+    def docs_per_minute(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return len(self.succeeded) * 60.0 / self.elapsed_seconds
+
+    @property
+    def cache_hit_rate(self) -> float:
+        ok = self.succeeded
+        if not ok:
+            return 0.0
+        return sum(1 for i in ok if i.result and i.result.cache_hit) / len(ok)
+
+
+def discover_pdfs(source: str) -> list[Path]:
+    """Resolve um diretório (busca recursiva por ``*.pdf``) ou um padrão glob."""
+    root = Path(source)
+    if root.is_dir():
+        found = [p for p in root.rglob("*") if p.is_file() and p.suffix.lower() == ".pdf"]
+    else:
+        found = [Path(p) for p in glob.glob(source, recursive=True) if Path(p).is_file()]
+    return sorted(found)
+
+
+def _output_dirs(pdfs: list[Path], out_dir: str) -> dict[Path, str]:
+    """Espelha a estrutura de origem no diretório de saída.
+
+    Evita que dois ``edital.pdf`` em pastas diferentes sobrescrevam o mesmo ``.md``.
+    """
+    if not pdfs:
+        return {}
+    parents = [str(p.resolve().parent) for p in pdfs]
+    base = os.path.commonpath(parents)
+    out = {}
+    for pdf, parent in zip(pdfs, parents):
+        rel = os.path.relpath(parent, base)
+        out[pdf] = str(Path(out_dir) / rel) if rel != "." else out_dir
+    return out
+
+
+def run_batch(
+    pdf_paths: list[Path],
+    llm: LLMClient,
+    prompt_template: str,
+    out_dir: str,
+    max_chars: int,
+    workers: int = 2,
+    llm_workers: int = 4,
+    ocr: str = "off",
+    local_model: str = "off",
+    force: bool = False,
+    options: PipelineOptions | None = None,
+    on_item: Callable[[BatchItem], None] | None = None,
+) -> BatchSummary:
+    """Processa vários PDFs em paralelo compartilhando o cliente LLM e o banco.
+
+    Cada documento roda o pipeline completo numa thread do pool; até
+    ``workers * llm_workers`` chamadas à LLM podem estar em voo. A falha de
+    um PDF é registrada no ``BatchItem`` e não interrompe os demais.
+    """
+    ensure_db()
+    out_dirs = _output_dirs(pdf_paths, out_dir)
+    summary = BatchSummary()
+    t0 = time.monotonic()
+
+    def _process(pdf: Path) -> BatchItem:
+        try:
+            result = run_edital_pipeline_detailed(
+                pdf_path=str(pdf),
+                llm=llm,
+                prompt_template=prompt_template,
+                out_dir=out_dirs[pdf],
+                max_chars=max_chars,
+                ocr=ocr,
+                local_model=local_model,
+                llm_workers=llm_workers,
+                force=force,
+                options=options,
+            )
+            return BatchItem(pdf_path=pdf, result=result)
+        except Exception as e:  # noqa: BLE001 — um PDF ruim não derruba o lote
+            logger.error("Falha ao processar %s: %s", pdf, e)
+            return BatchItem(pdf_path=pdf, error=f"{type(e).__name__}: {e}")
+
+    logger.info("Batch: %d PDFs, %d workers", len(pdf_paths), workers)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="dexter-batch") as pool:
+        futures = [pool.submit(_process, pdf) for pdf in pdf_paths]
+        for future in as_completed(futures):
+            item = future.result()
+            summary.items.append(item)
+            if on_item is not None:
+                on_item(item)
+
+    order = {pdf: n for n, pdf in enumerate(pdf_paths)}
+    summary.items.sort(key=lambda i: order[i.pdf_path])
+    summary.elapsed_seconds = time.monotonic() - t0
+    logger.info(
+        "Batch concluído: %d ok, %d falhas em %.1fs (%.1f docs/min)",
+        len(summary.succeeded),
+        len(summary.failed),
+        summary.elapsed_seconds,
+        summary.docs_per_minute,
+    )
+    return summary
@@ -1,66 +1,98 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import logging
 import time
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
 
 from dexter_eng.adapters.llm.client import LLMClient
-from dexter_eng.adapters.pdf.extract_text import extract_text_from_pdf
-from dexter_eng.core.rules.edital_rules import apply_edital_rules
+from dexter_eng.adapters.llm.rate_limit import request_lane
+from dexter_eng.adapters.llm.usage import summarize_usage
+from dexter_eng.adapters.pdf.extract_text import PARALLEL_MIN_PAGES
+from dexter_eng.adapters.pdf.ocr import DEFAULT_DPI, DEFAULT_LANGUAGE
+from dexter_eng.adapters.pdf.source import IN_MEMORY_MAX_BYTES, PdfSource, load_pdf_source
 from dexter_eng.persistence.db import (
     create_run,
     finish_run,
+    ensure_db,
+    get_cached_result,
     get_or_create_document,
-    init_db,
     record_run_metrics,
+    record_run_steps,
+    record_run_usage,
+    save_cached_result,
 )
-from dexter_eng.pipeline.steps.step_chunk import chunk_text
-from dexter_eng.pipeline.steps import step_llm_structured
-from dexter_eng.pipeline.steps.step_llm_structured import extract_edital_structured
-from dexter_eng.renderers.markdown import to_markdown
+from dexter_eng.pipeline.base import EngineRun, PipelineEngine, Step
+from dexter_eng.pipeline.steps.step_audit import save_outcome_artifacts
+from dexter_eng.pipeline.steps.step_boilerplate import BOILERPLATE_STEP
+from dexter_eng.pipeline.steps.step_chunk import CHARS_PER_TOKEN, CHUNK_STEP, estimate_tokens
+from dexter_eng.pipeline.steps.step_dedup import DEDUP_STEP
+from dexter_eng.pipeline.steps.step_extract import EXTRACT_STEP
+from dexter_eng.pipeline.steps.step_llm_structured import LLM_MAP_STEP
+from dexter_eng.pipeline.steps.step_reduce import REDUCE_STEP
+from dexter_eng.pipeline.steps.step_render import RENDER_STEP
+from dexter_eng.pipeline.steps.step_select import SELECT_STEP
+from dexter_eng.pipeline.steps.step_validate import VALIDATE_STEP
 
 logger = logging.getLogger(__name__)
 
-PIPELINE_VERSION = "0.2"
+PIPELINE_VERSION = "0.3"
 
+# Ordem das etapas; o motor só recalcula as cacheáveis cujas entradas mudaram
+EDITAL_STEPS: list[Step] = [
+    EXTRACT_STEP,
+    BOILERPLATE_STEP,
+    CHUNK_STEP,
+    SELECT_STEP,
+    DEDUP_STEP,
+    LLM_MAP_STEP,
+    REDUCE_STEP,
+    VALIDATE_STEP,
+    RENDER_STEP,
+]
 
-def _file_sha256(path: str) -> str:
-    """Calcula SHA-256 do arquivo. Retorna hash do path se arquivo não existir."""
-    try:
-        h = hashlib.sha256()
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        return h.hexdigest()
-    except OSError:
-        return hashlib.sha256(path.encode()).hexdigest()
-
-
-def _save_artifacts(
-    run_dir: Path,
-    extracted_text: str,
-    prompt: str,
-    llm_raw: str,
-    validated_json: dict,
-    result_md: str,
-    meta: dict,
-) -> None:
-    """Salva artefatos de uma execução no diretório da run."""
-    run_dir.mkdir(parents=True, exist_ok=True)
-    (run_dir / "extracted.txt").write_text(extracted_text, encoding="utf-8")
-    (run_dir / "prompt_structured.txt").write_text(prompt, encoding="utf-8")
-    (run_dir / "llm_raw.txt").write_text(llm_raw, encoding="utf-8")
-    (run_dir / "validated.json").write_text(
-        json.dumps(validated_json, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
-    (run_dir / "result.md").write_text(result_md, encoding="utf-8")
-    (run_dir / "meta.json").write_text(
-        json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
-    logger.info("Artefatos salvos em: %s", run_dir)
+
+@dataclass
+class PipelineOptions:
+    """Ajustes finos do pipeline; na CLI vêm do ``Settings``."""
+
+    pdf_workers: int = 0  # 0 = nº de CPUs
+    pdf_parallel_min_pages: int = PARALLEL_MIN_PAGES
+    # Acima deste tamanho o PDF não é lido para a memória (hash em streaming)
+    pdf_in_memory_max_bytes: int = IN_MEMORY_MAX_BYTES
+    # Compacta tabelas detectadas em linhas "a | b | c"; desligado por padrão
+    # porque find_tables custa ~50 ms por página e raramente encurta o texto
+    pdf_tables: bool = False
+    # Remove cabeçalhos/rodapés repetidos entre páginas antes do chunking
+    strip_boilerplate_lines: bool = True
+    # Orçamento de tokens por chunk; 0 = deriva de max_chars
+    chunk_tokens: int = 0
+    chunk_overlap_tokens: int = 0
+    # Tokens de chunks enviados à LLM, escolhidos por BM25; 0 = todos
+    select_token_budget: int = 0
+    # Jaccard estimado a partir do qual chunks viram um grupo só no map; 0 = desativa
+    dedup_threshold: float = 0.9
+    # Usados só com ocr="auto"; "auto" escolhe o primeiro backend instalado
+    ocr_backend: str = "auto"
+    ocr_language: str = DEFAULT_LANGUAGE
+    ocr_dpi: int = DEFAULT_DPI
+
+
+@dataclass
+class PipelineResult:
+    """Resumo de uma execução do pipeline (usado pelo modo batch)."""
+
+    output_path: Path
+    run_id: int
+    cache_hit: bool
+    chunks: int
+    elapsed_seconds: float
+    result_cache_hit: bool = False
 
 
 def run_edital_pipeline(
@@ -71,91 +103,410 @@ def run_edital_pipeline(
     max_chars: int,
     ocr: str = "off",
     local_model: str = "off",
+    llm_workers: int = 4,
+    force: bool = False,
+    options: PipelineOptions | None = None,
 ) -> Path:
-    logger.info("=== Pipeline v%s iniciado para: %s ===", PIPELINE_VERSION, pdf_path)
-    logger.info("Flags futuras: ocr=%s, local_model=%s (desativadas nesta fase)", ocr, local_model)
+    return run_edital_pipeline_detailed(
+        pdf_path=pdf_path,
+        llm=llm,
+        prompt_template=prompt_template,
+        out_dir=out_dir,
+        max_chars=max_chars,
+        ocr=ocr,
+        local_model=local_model,
+        llm_workers=llm_workers,
+        force=force,
+        options=options,
+    ).output_path
+
+
+def run_edital_pipeline_detailed(
+    pdf_path: str,
+    llm: LLMClient,
+    prompt_template: str,
+    out_dir: str,
+    max_chars: int,
+    ocr: str = "off",
+    local_model: str = "off",
+    llm_workers: int = 4,
+    force: bool = False,
+    options: PipelineOptions | None = None,
+) -> PipelineResult:
+    """Executa o pipeline e devolve o resumo da run junto com o caminho gerado."""
+    _log_start(pdf_path, ocr, local_model)
     t0 = time.monotonic()
 
-    # Inicializar persistência
-    init_db()
+    # Inicializar persistência (reaproveita a conexão aberta, ex.: no batch)
+    ensure_db()
 
     # Registrar documento e run
-    file_hash = _file_sha256(pdf_path)
-    doc_id = get_or_create_document(path=pdf_path, sha256=file_hash, pages=0, chars=0)
-    run_id = create_run(document_id=doc_id, model=llm.model, pipeline_version=PIPELINE_VERSION)
+    source = load_pdf_source(pdf_path, _in_memory_max_bytes(options))
+    file_hash = source.sha256
+    run_id = _register_run(pdf_path, llm, file_hash)
+    result_key = _result_cache_key(file_hash, prompt_template, llm, max_chars, ocr, options)
 
     try:
-        # 1. Extrair texto do PDF
-        text = extract_text_from_pdf(pdf_path)
-
-        # 2. Dividir em chunks
-        chunks = chunk_text(text, max_chars=max_chars)
-        merged = "\n\n".join(chunks[:4])  # v1 pragmático; depois vira map-reduce
-        logger.info("Usando %d/%d chunks (total %d chars)", min(4, len(chunks)), len(chunks), len(merged))
-
-        # 3. Extrair dados estruturados via LLM
-        extraction = extract_edital_structured(llm, prompt_template, merged)
-
-        # 3b. Registrar métricas da etapa LLM
-        prompt_chars = len(step_llm_structured._last_prompt)
-        response_chars = len(step_llm_structured._last_raw_response)
-        cache_hit = step_llm_structured._last_cache_hit
-        request_id = step_llm_structured._last_request_id
-        record_run_metrics(
-            run_id,
-            prompt_chars=prompt_chars,
-            response_chars=response_chars,
-            cache_hit=cache_hit,
-            request_id=request_id,
-        )
+        # 0. Resultado completo já calculado para este documento/prompt/modelo?
+        if not force:
+            cached = _serve_cached_result(run_id, result_key, pdf_path, out_dir, t0)
+            if cached is not None:
+                return cached
 
-        # 4. Aplicar regras de negócio
-        extraction = apply_edital_rules(extraction)
-
-        # 5. Renderizar Markdown
-        md = to_markdown(extraction)
-
-        # 6. Salvar resultado principal
-        out = Path(out_dir)
-        out.mkdir(parents=True, exist_ok=True)
-        out_md = out / (Path(pdf_path).stem + "_edital.md")
-        out_md.write_text(md, encoding="utf-8")
-
-        # 7. Salvar artefatos da execução
-        elapsed = time.monotonic() - t0
-        ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        pdf_stem = Path(pdf_path).stem
-        run_dir = out / "runs" / f"{ts}_{pdf_stem}"
-
-        meta = {
-            "pipeline_version": PIPELINE_VERSION,
-            "model": llm.model,
-            "pdf_path": pdf_path,
-            "chars_extracted": len(text),
-            "chars_prompt": len(step_llm_structured._last_prompt),
-            "prompt_chars": prompt_chars,
-            "response_chars": response_chars,
-            "cache_hit": cache_hit,
-            "request_id": request_id,
-            "ocr": ocr,
-            "local_model": local_model,
-            "elapsed_seconds": round(elapsed, 2),
-        }
-
-        _save_artifacts(
-            run_dir=run_dir,
-            extracted_text=text,
-            prompt=step_llm_structured._last_prompt,
-            llm_raw=step_llm_structured._last_raw_response,
-            validated_json=extraction.model_dump(),
-            result_md=md,
-            meta=meta,
+        # 1..6. Extração, chunking, map (LLM), reduce, regras e renderização
+        engine = PipelineEngine(EDITAL_STEPS, use_cache=not force)
+        with request_lane(file_hash):
+            engine_run = engine.run(
+                _initial_values(
+                    source, llm, prompt_template, max_chars, ocr, llm_workers, options
+                )
+            )
+
+        return _complete_run(
+            run_id=run_id,
+            t0=t0,
+            pdf_path=pdf_path,
+            llm=llm,
+            out_dir=out_dir,
+            engine_run=engine_run,
+            result_key=result_key,
+            meta_extra={"ocr": ocr, "local_model": local_model, "llm_workers": llm_workers},
         )
 
-        finish_run(run_id, status="success")
-        logger.info("=== Pipeline concluído: %s (%.1fs) ===", out_md, elapsed)
-        return out_md
+    except Exception as e:
+        finish_run(run_id, status="error", error=str(e))
+        raise
+
+
+async def arun_edital_pipeline(
+    pdf_path: str,
+    llm: LLMClient,
+    prompt_template: str,
+    out_dir: str,
+    max_chars: int,
+    ocr: str = "off",
+    local_model: str = "off",
+    llm_concurrency: int = 16,
+    force: bool = False,
+    options: PipelineOptions | None = None,
+) -> Path:
+    result = await arun_edital_pipeline_detailed(
+        pdf_path=pdf_path,
+        llm=llm,
+        prompt_template=prompt_template,
+        out_dir=out_dir,
+        max_chars=max_chars,
+        ocr=ocr,
+        local_model=local_model,
+        llm_concurrency=llm_concurrency,
+        force=force,
+        options=options,
+    )
+    return result.output_path
+
+
+async def arun_edital_pipeline_detailed(
+    pdf_path: str,
+    llm: LLMClient,
+    prompt_template: str,
+    out_dir: str,
+    max_chars: int,
+    ocr: str = "off",
+    local_model: str = "off",
+    llm_concurrency: int = 16,
+    force: bool = False,
+    options: PipelineOptions | None = None,
+) -> PipelineResult:
+    """Variante asyncio do pipeline.
+
+    Hash e etapas síncronas (extração do PDF etc.) rodam no executor padrão
+    do loop; o map usa
+    ``llm.acomplete`` com até ``llm_concurrency`` requisições em voo, de modo
+    que vários documentos podem ser processados no mesmo processo com
+    ``asyncio.gather``.
+    """
+    _log_start(pdf_path, ocr, local_model)
+    t0 = time.monotonic()
+    loop = asyncio.get_running_loop()
+
+    ensure_db()
+    source = await loop.run_in_executor(
+        None, load_pdf_source, pdf_path, _in_memory_max_bytes(options)
+    )
+    file_hash = source.sha256
+    run_id = _register_run(pdf_path, llm, file_hash)
+    result_key = _result_cache_key(file_hash, prompt_template, llm, max_chars, ocr, options)
+
+    try:
+        if not force:
+            cached = _serve_cached_result(run_id, result_key, pdf_path, out_dir, t0)
+            if cached is not None:
+                return cached
+
+        engine = PipelineEngine(EDITAL_STEPS, use_cache=not force)
+        with request_lane(file_hash):
+            engine_run = await engine.arun(
+                _initial_values(
+                    source, llm, prompt_template, max_chars, ocr, llm_concurrency, options
+                )
+            )
+
+        return _complete_run(
+            run_id=run_id,
+            t0=t0,
+            pdf_path=pdf_path,
+            llm=llm,
+            out_dir=out_dir,
+            engine_run=engine_run,
+            result_key=result_key,
+            meta_extra={"ocr": ocr, "local_model": local_model, "llm_concurrency": llm_concurrency},
+        )
 
     except Exception as e:
         finish_run(run_id, status="error", error=str(e))
         raise
+
+
+def _log_start(pdf_path: str, ocr: str, local_model: str) -> None:
+    logger.info("=== Pipeline v%s iniciado para: %s ===", PIPELINE_VERSION, pdf_path)
+    logger.info("Flags: ocr=%s, local_model=%s", ocr, local_model)
+
+
+def _register_run(pdf_path: str, llm: LLMClient, file_hash: str) -> int:
+    doc_id = get_or_create_document(path=pdf_path, sha256=file_hash, pages=0, chars=0)
+    return create_run(document_id=doc_id, model=llm.model, pipeline_version=PIPELINE_VERSION)
+
+
+def _in_memory_max_bytes(options: PipelineOptions | None) -> int:
+    return (options or PipelineOptions()).pdf_in_memory_max_bytes
+
+
+def _initial_values(
+    source: PdfSource,
+    llm: LLMClient,
+    prompt_template: str,
+    max_chars: int,
+    ocr: str,
+    llm_concurrency: int,
+    options: PipelineOptions | None,
+) -> dict[str, Any]:
+    """Contexto inicial do motor de etapas."""
+    opts = options or PipelineOptions()
+    return {
+        **asdict(opts),
+        "chunk_tokens": _chunk_token_budget(llm, prompt_template, max_chars, opts),
+        "pdf_path": source.path,
+        "pdf_source": source,
+        "document_sha256": source.sha256,
+        "ocr": ocr,
+        "max_chars": max_chars,
+        "prompt_template": prompt_template,
+        "llm_model": llm.model,
+        "llm": llm,
+        "llm_concurrency": llm_concurrency,
+    }
+
+
+def _chunk_token_budget(
+    llm: LLMClient, prompt_template: str, max_chars: int, options: PipelineOptions
+) -> int:
+    """Tokens por chunk: o configurado (ou ``max_chars`` convertido), limitado
+    ao que cabe na janela do modelo depois do template do prompt."""
+    budget = options.chunk_tokens or int(max_chars / CHARS_PER_TOKEN)
+    window = llm.max_input_tokens()
+    if window is not None:
+        template_tokens = estimate_tokens(prompt_template.replace("{{TEXT}}", ""))
+        fit = window - template_tokens - options.chunk_overlap_tokens
+        if fit < budget:
+            logger.info("Chunks limitados a %d tokens pela janela do modelo (%d)", fit, window)
+            budget = fit
+    return max(1, budget)
+
+
+def _result_cache_key(
+    file_hash: str,
+    prompt_template: str,
+    llm: LLMClient,
+    max_chars: int,
+    ocr: str,
+    options: PipelineOptions | None = None,
+) -> dict[str, Any]:
+    """Chave do cache de resultado: documento, prompt, modelo, versão e parâmetros."""
+    opts = options or PipelineOptions()
+    key_options: dict[str, Any] = {
+        "ocr": ocr,
+        "tables": opts.pdf_tables,
+        "strip_boilerplate": opts.strip_boilerplate_lines,
+        "chunk_tokens": opts.chunk_tokens,
+        "chunk_overlap_tokens": opts.chunk_overlap_tokens,
+        "select_token_budget": opts.select_token_budget,
+        "dedup_threshold": opts.dedup_threshold,
+    }
+    if ocr != "off":
+        key_options.update(
+            ocr_backend=opts.ocr_backend, ocr_language=opts.ocr_language, ocr_dpi=opts.ocr_dpi
+        )
+    return {
+        "document_sha256": file_hash,
+        "prompt_hash": hashlib.sha256(prompt_template.encode()).hexdigest(),
+        "model": llm.model,
+        "pipeline_version": PIPELINE_VERSION,
+        "max_chars": max_chars,
+        "options": json.dumps(key_options, sort_keys=True),
+    }
+
+
+def _serve_cached_result(
+    run_id: int,
+    result_key: dict[str, Any],
+    pdf_path: str,
+    out_dir: str,
+    t0: float,
+) -> PipelineResult | None:
+    """Atende a run direto do cache de resultado, sem abrir o PDF nem chamar a LLM."""
+    row = get_cached_result(**result_key)
+    if row is None:
+        return None
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    out_md = out / (Path(pdf_path).stem + "_edital.md")
+    out_md.write_text(row["result_md"], encoding="utf-8")
+
+    record_run_metrics(
+        run_id,
+        prompt_chars=0,
+        response_chars=0,
+        cache_hit=True,
+        request_id=None,
+        result_cache_hit=True,
+    )
+    finish_run(run_id, status="success")
+    elapsed = time.monotonic() - t0
+    logger.info(
+        "=== Resultado em cache (gerado em %s): %s (%.2fs) ===",
+        row["created_at"],
+        out_md,
+        elapsed,
+    )
+    return PipelineResult(
+        output_path=out_md,
+        run_id=run_id,
+        cache_hit=True,
+        chunks=0,
+        elapsed_seconds=elapsed,
+        result_cache_hit=True,
+    )
+
+
+def _complete_run(
+    *,
+    run_id: int,
+    t0: float,
+    pdf_path: str,
+    llm: LLMClient,
+    out_dir: str,
+    engine_run: EngineRun,
+    result_key: dict[str, Any],
+    meta_extra: dict,
+) -> PipelineResult:
+    """Métricas, persistência e artefatos — comum às variantes sync/async."""
+    values = engine_run.values
+    text: str = values["text"]
+    chunks: list[str] = values["chunks"]
+    outcomes = values["outcomes"]
+    extraction = values["validated"]
+    md: str = values["markdown"]
+
+    results = [o.result for o in outcomes if o.result is not None]
+    failures = [o for o in outcomes if o.error is not None]
+
+    # Métricas da etapa LLM (agregadas sobre os chunks) e tempos por etapa
+    prompt_chars = sum(len(r.prompt) for r in results)
+    response_chars = sum(len(r.raw_response) for r in results)
+    cache_hit = bool(results) and all(r.cache_hit for r in results)
+    request_id = next((r.request_id for r in results if r.request_id), None)
+    tiers = {r.tier for r in results if r.tier}
+    llm_tier = (tiers.pop() if len(tiers) == 1 else "mixed") if tiers else None
+    escalations = sum(1 for r in results if r.escalated)
+    usage = summarize_usage([r.usage for r in results if r.usage is not None])
+    record_run_metrics(
+        run_id,
+        prompt_chars=prompt_chars,
+        response_chars=response_chars,
+        cache_hit=cache_hit,
+        request_id=request_id,
+        llm_tier=llm_tier,
+        llm_escalations=escalations,
+    )
+    record_run_usage(run_id, usage)
+    record_run_steps(
+        run_id, [(t.name, t.elapsed_seconds, t.cache_hit) for t in engine_run.timings]
+    )
+
+    # Salvar resultado principal
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    out_md = out / (Path(pdf_path).stem + "_edital.md")
+    out_md.write_text(md, encoding="utf-8")
+
+    # Salvar artefatos da execução
+    elapsed = time.monotonic() - t0
+    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    pdf_stem = Path(pdf_path).stem
+    run_dir = out / "runs" / f"{ts}_{pdf_stem}"
+
+    meta = {
+        "pipeline_version": PIPELINE_VERSION,
+        "model": llm.model,
+        "pdf_path": pdf_path,
+        "chars_extracted": len(text),
+        "extraction": values.get("extract_stats", {}),
+        "boilerplate": values.get("boilerplate", {}),
+        "chunks_total": len(chunks),
+        "chunks_failed": len(failures),
+        "selection": values.get("selection", {}),
+        "dedup": values.get("dedup", {}),
+        "prompt_chars": prompt_chars,
+        "response_chars": response_chars,
+        "cache_hit": cache_hit,
+        "request_id": request_id,
+        "llm_tier": llm_tier,
+        "llm_escalations": escalations,
+        "llm_usage": usage,
+        "llm_calls": [
+            {"chunk": o.index, **o.result.usage.as_dict()}
+            for o in outcomes
+            if o.result is not None and o.result.usage is not None
+        ],
+        **meta_extra,
+        "steps": engine_run.as_meta(),
+        "elapsed_seconds": round(elapsed, 2),
+    }
+
+    save_outcome_artifacts(
+        run_dir=run_dir,
+        extracted_text=text,
+        outcomes=outcomes,
+        validated_json=extraction.model_dump(),
+        result_md=md,
+        meta=meta,
+    )
+
+    # Guardar o resultado final (só execuções completas, sem chunks com falha)
+    if not failures:
+        save_cached_result(
+            **result_key,
+            validated_json=json.dumps(extraction.model_dump(), ensure_ascii=False),
+            result_md=md,
+        )
+
+    finish_run(run_id, status="success")
+    logger.info("=== Pipeline concluído: %s (%.1fs) ===", out_md, elapsed)
+    return PipelineResult(
+        output_path=out_md,
+        run_id=run_id,
+        cache_hit=cache_hit,
+        chunks=len(chunks),
+        elapsed_seconds=elapsed,
+    )
@@ -0,0 +1,66 @@
+"""Coalescência de chamadas idênticas em voo ("single-flight").
+
+A primeira chamada de uma chave executa; as concorrentes com a mesma chave
+esperam e recebem o mesmo resultado (ou a mesma exceção), em vez de repetir o
+trabalho. Vale dentro do processo; entre processos a coordenação fica com as
+reservas em SQLite (``acquire_llm_lease``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Agrupa chamadas concorrentes por chave; seguro entre threads e event loops."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        """Retorna ``(future, é_líder)`` para a chave."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def _settle(self, key: Hashable, future: Future, value: Any, error: BaseException | None) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Executa ``fn`` uma vez por chave em voo; retorna ``(valor, compartilhado)``."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(), True
+        try:
+            value = fn()
+        except BaseException as e:
+            self._settle(key, future, None, e)
+            raise
+        self._settle(key, future, value, None)
+        return value, False
+
+    async def ado(self, key: Hashable, afn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Versão assíncrona de ``do``; espera sem bloquear o event loop."""
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future), True
+        try:
+            value = await afn()
+        except BaseException as e:
+            self._settle(key, future, None, e)
+            raise
+        self._settle(key, future, value, None)
+        return value, False
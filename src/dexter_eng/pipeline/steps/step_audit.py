@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+
+from dexter_eng.pipeline.steps.step_llm_structured import ChunkOutcome
+
+logger = logging.getLogger(__name__)
+
+
+def join_by_chunk(items: list[tuple[int, str]]) -> str:
+    """Concatena textos por chunk para os artefatos, identificando cada trecho."""
+    if len(items) == 1:
+        return items[0][1]
+    return "\n\n".join(f"=== CHUNK {i + 1} ===\n{text}" for i, text in items)
+
+
+def save_artifacts(
+    run_dir: Path,
+    extracted_text: str,
+    prompt: str,
+    llm_raw: str,
+    validated_json: dict,
+    result_md: str,
+    meta: dict,
+) -> None:
+    """Salva artefatos de uma execução no diretório da run."""
+    run_dir.mkdir(parents=True, exist_ok=True)
+    (run_dir / "extracted.txt").write_text(extracted_text, encoding="utf-8")
+    (run_dir / "prompt_structured.txt").write_text(prompt, encoding="utf-8")
+    (run_dir / "llm_raw.txt").write_text(llm_raw, encoding="utf-8")
+    (run_dir / "validated.json").write_text(
+        json.dumps(validated_json, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    (run_dir / "result.md").write_text(result_md, encoding="utf-8")
+    (run_dir / "meta.json").write_text(
+        json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    logger.info("Artefatos salvos em: %s", run_dir)
+
+
+def save_outcome_artifacts(
+    run_dir: Path,
+    extracted_text: str,
+    outcomes: list[ChunkOutcome],
+    validated_json: dict,
+    result_md: str,
+    meta: dict,
+) -> None:
+    """Salva os artefatos de uma run map-reduce (prompts/respostas por chunk)."""
+    ok = [o for o in outcomes if o.result is not None]
+    save_artifacts(
+        run_dir=run_dir,
+        extracted_text=extracted_text,
+        prompt=join_by_chunk([(o.index, o.result.prompt) for o in ok]),  # type: ignore[union-attr]
+        llm_raw=join_by_chunk([(o.index, o.result.raw_response) for o in ok]),  # type: ignore[union-attr]
+        validated_json=validated_json,
+        result_md=result_md,
+        meta=meta,
+    )
@@ -0,0 +1,178 @@
+"""Remoção de cabeçalhos, rodapés e avisos repetidos em todas as páginas.
+
+Uma linha é considerada boilerplate quando, normalizada (caixa e espaços),
+aparece em pelo menos ``min_page_ratio`` das páginas. Linhas de numeração
+("Página 3 de 40", "Fls. 12", "- 7 -", ou um número sozinho) têm os números
+trocados por ``#`` para que contem como a mesma linha, mas só quando o número
+acompanha o índice da página (mesmo deslocamento em todas); quantidades,
+dias e valores que variam de página para página não são numeração. Nas
+demais linhas os números são mantidos, para não apagar conteúdo com o mesmo
+formato em páginas diferentes. Um rótulo repetido seguido de um valor que
+muda a cada página ("Valor da multa" / "500") é conteúdo e também fica.
+
+Os marcadores ``=== PAGE n ===`` são preservados, então as citações por
+página continuam valendo; o ``page_map`` relaciona o início de cada página
+no texto limpo e no original.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from dexter_eng.pipeline.base import Step
+
+logger = logging.getLogger(__name__)
+
+_PAGE_MARKER = re.compile(r"^=== PAGE (\d+) ===$", re.M)
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+# Numeração com marcador ("pág. 3", "fls. 12 de 40"), entre traços ("- 7 -")
+# ou "n de total"; um número sozinho só conta se acompanhar a página
+_PAGE_NUMBERING = re.compile(
+    r"^(?:(?:p[aá]g(?:ina)?\.?|fls?\.?|folha|p\.)\s*\d+(?:\s*(?:/|de|of)\s*\d+)?"
+    r"|[-–]\s*\d+\s*[-–]"
+    r"|\d+\s*(?:/|de|of)\s*\d+)$"
+)
+_BARE_NUMBER = re.compile(r"^\d+$")
+# Linha só com um valor (número, data, moeda, percentual)
+_VALUE_LINE = re.compile(r"^[\d\s.,:/%$()r-]*\d[\d\s.,:/%$()r-]*$")
+
+MIN_PAGES = 3
+MIN_PAGE_RATIO = 0.5
+
+
+@dataclass
+class BoilerplateResult:
+    text: str
+    # (página, início no texto limpo, início no texto original)
+    page_map: list[tuple[int, int, int]] = field(default_factory=list)
+    chars_removed: int = 0
+    lines_removed: int = 0
+    patterns: list[str] = field(default_factory=list)
+
+
+def normalize_line(line: str, page: int | None = None) -> str:
+    """Forma canônica da linha para contagem; em linhas de numeração, números viram ``#``.
+
+    Com ``page``, a chave guarda o deslocamento entre o número da linha e a
+    página: só numeração que acompanha as páginas repete a mesma chave.
+    """
+    key = _SPACES.sub(" ", line.lower()).strip()
+    numbering = _PAGE_NUMBERING.match(key)
+    if not numbering and not (page is not None and _BARE_NUMBER.match(key)):
+        return key
+    fuzzy = _DIGITS.sub("#", key)
+    if page is None:
+        return fuzzy if numbering else key
+    offset = int(_DIGITS.search(key).group()) - page  # type: ignore[union-attr]
+    return f"{fuzzy} @{offset:+d}"
+
+
+def _field_labels(page_lines: list[list[str]], pages: list[int], repeated: set[str]) -> set[str]:
+    """Linhas repetidas seguidas de um valor que não se repete: rótulos de campo."""
+    labels: set[str] = set()
+    for page, lines in zip(pages, page_lines):
+        keys = [normalize_line(line, page) for line in lines]
+        filled = [(key, line) for key, line in zip(keys, lines) if key]
+        for (key, _line), (next_key, next_line) in zip(filled, filled[1:]):
+            if (
+                key in repeated
+                and next_key not in repeated
+                and _VALUE_LINE.match(_SPACES.sub(" ", next_line.lower()).strip())
+            ):
+                labels.add(key)
+    return labels
+
+
+def _split_pages(text: str) -> list[tuple[int, int, int]]:
+    """``(página, início, fim)`` de cada página; texto antes do 1º marcador é a página 0."""
+    markers = list(_PAGE_MARKER.finditer(text))
+    if not markers:
+        return [(0, 0, len(text))]
+    pages = []
+    if markers[0].start() > 0:
+        pages.append((0, 0, markers[0].start()))
+    for m, nxt in zip(markers, [*markers[1:], None]):
+        pages.append((int(m.group(1)), m.start(), nxt.start() if nxt else len(text)))
+    return pages
+
+
+def strip_boilerplate(
+    text: str, min_pages: int = MIN_PAGES, min_page_ratio: float = MIN_PAGE_RATIO
+) -> BoilerplateResult:
+    """Remove as linhas repetidas entre páginas; ver docstring do módulo."""
+    pages = _split_pages(text)
+    page_lines = [text[start:end].splitlines(True) for _page, start, end in pages]
+
+    counts: Counter[str] = Counter()
+    for (page, _start, _end), lines in zip(pages, page_lines):
+        counts.update({normalize_line(line, page) for line in lines})
+    threshold = max(min_pages, int(len(pages) * min_page_ratio + 0.5))
+    repeated = {
+        key
+        for key, n in counts.items()
+        if n >= threshold and key and not key.startswith("=== page ")
+    }
+    repeated -= _field_labels(page_lines, [page for page, _s, _e in pages], repeated)
+    if len(pages) < min_pages or not repeated:
+        return BoilerplateResult(
+            text=text, page_map=[(page, start, start) for page, start, _end in pages]
+        )
+
+    out: list[str] = []
+    page_map: list[tuple[int, int, int]] = []
+    clean_len = 0
+    lines_removed = 0
+    for (page, start, _end), lines in zip(pages, page_lines):
+        page_map.append((page, clean_len, start))
+        for line in lines:
+            if normalize_line(line, page) in repeated:
+                lines_removed += 1
+                continue
+            out.append(line)
+            clean_len += len(line)
+
+    clean = "".join(out)
+    result = BoilerplateResult(
+        text=clean,
+        page_map=page_map,
+        chars_removed=len(text) - len(clean),
+        lines_removed=lines_removed,
+        patterns=sorted(repeated),
+    )
+    logger.info(
+        "Boilerplate: %d linhas repetidas removidas (%d chars, %d padrões)",
+        result.lines_removed,
+        result.chars_removed,
+        len(result.patterns),
+    )
+    return result
+
+
+def boilerplate_step(text: str, strip_boilerplate_lines: bool) -> dict[str, Any]:
+    if not strip_boilerplate_lines:
+        result = BoilerplateResult(text=text)
+    else:
+        result = strip_boilerplate(text)
+    return {
+        "clean_text": result.text,
+        "page_map": result.page_map,
+        "boilerplate": {
+            "chars_removed": result.chars_removed,
+            "lines_removed": result.lines_removed,
+            "patterns": result.patterns,
+        },
+    }
+
+
+BOILERPLATE_STEP = Step(
+    name="boilerplate",
+    inputs=("text", "strip_boilerplate_lines"),
+    outputs=("clean_text", "page_map", "boilerplate"),
+    fn=boilerplate_step,
+    version="2",
+)
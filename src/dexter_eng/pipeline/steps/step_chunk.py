@@ -1,9 +1,37 @@
 from __future__ import annotations
 
 import logging
+import re
+from typing import Any, Callable, NamedTuple
+
+from dexter_eng.pipeline.base import Step
 
 logger = logging.getLogger(__name__)
 
+# Média conservadora para português em tokenizadores BPE (~3,5 chars/token)
+CHARS_PER_TOKEN = 3.5
+
+# Só corta numa fronteira de página/parágrafo se o chunk já tiver pelo menos
+# esta fração do orçamento; senão corta na última linha que couber.
+MIN_FILL = 0.5
+
+_PAGE_MARKER = re.compile(r"=== PAGE (\d+) ===")
+
+_LINE, _PARAGRAPH_BREAK, _PAGE_START = 0, 1, 2
+
+
+class ChunkSpan(NamedTuple):
+    """Trecho ``text[start:end]`` e as páginas ``(primeira, última)`` que ele cobre."""
+
+    start: int
+    end: int
+    page_range: tuple[int, int]
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa rápida de tokens, sem tokenizador."""
+    return int(len(text) / CHARS_PER_TOKEN + 0.999)
+
 
 def chunk_text(text: str, max_chars: int) -> list[str]:
     """Quebra texto em chunks respeitando limite de caracteres por bloco."""
@@ -20,3 +48,128 @@ def chunk_text(text: str, max_chars: int) -> list[str]:
         chunks.append("".join(cur))
     logger.info("Texto dividido em %d chunks (max_chars=%d)", len(chunks), max_chars)
     return chunks
+
+
+def _scan_lines(
+    text: str, max_tokens: int, count_tokens: Callable[[str], int]
+) -> tuple[list[int], list[int], list[int], list[int]]:
+    """Uma passada sobre o texto: fim, tokens, tipo e página de cada linha.
+
+    Linhas maiores que o orçamento são divididas em pedaços que cabem nele.
+    """
+    ends: list[int] = []
+    tokens: list[int] = []
+    kinds: list[int] = []
+    pages: list[int] = []
+    page = 1
+    pos = 0
+    n = len(text)
+    while pos < n:
+        nl = text.find("\n", pos)
+        end = n if nl == -1 else nl + 1
+        line = text[pos:end]
+        stripped = line.strip()
+        marker = _PAGE_MARKER.fullmatch(stripped) if stripped.startswith("===") else None
+        if marker:
+            page = int(marker.group(1))
+            kind = _PAGE_START
+        else:
+            kind = _PARAGRAPH_BREAK if not stripped else _LINE
+        n_tokens = count_tokens(line)
+        if n_tokens > max_tokens:
+            # Divide proporcionalmente em pedaços que cabem no orçamento
+            step = max(1, len(line) * max_tokens // n_tokens)
+            for piece_start in range(pos, end, step):
+                piece_end = min(end, piece_start + step)
+                ends.append(piece_end)
+                tokens.append(count_tokens(text[piece_start:piece_end]))
+                kinds.append(_LINE)
+                pages.append(page)
+        else:
+            ends.append(end)
+            tokens.append(n_tokens)
+            kinds.append(kind)
+            pages.append(page)
+        pos = end
+    return ends, tokens, kinds, pages
+
+
+def chunk_spans(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> list[ChunkSpan]:
+    """Divide o texto em trechos de até ``max_tokens``, sem copiar o texto.
+
+    Os cortes preferem, nesta ordem, o início de uma página (``=== PAGE n ===``)
+    e uma linha em branco, desde que o trecho já esteja ao menos
+    ``MIN_FILL`` cheio; caso contrário corta na última linha que couber.
+    Cada trecho (exceto após um corte de página) começa repetindo até
+    ``overlap_tokens`` do final do anterior. Roda em tempo linear: cada linha
+    é lida no máximo algumas vezes, já que o recuo até uma fronteira é
+    limitado a metade do orçamento.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens deve ser positivo")
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    ends, tokens, kinds, pages = _scan_lines(text, max_tokens, count_tokens)
+    starts = [0, *ends[:-1]]
+    n = len(ends)
+    min_fill = max_tokens * MIN_FILL
+
+    spans: list[ChunkSpan] = []
+    i = 0
+    while i < n:
+        used = 0
+        j = i
+        page_cut = para_cut = None
+        while j < n and used + tokens[j] <= max_tokens:
+            if j > i and kinds[j] == _PAGE_START and used >= min_fill:
+                page_cut = j
+            used += tokens[j]
+            if kinds[j] == _PARAGRAPH_BREAK and used >= min_fill:
+                para_cut = j + 1
+            j += 1
+        j = max(j, i + 1)
+
+        cut = j
+        if j < n and kinds[j] != _PAGE_START:
+            if page_cut is not None:
+                cut = page_cut
+            elif para_cut is not None and para_cut < j:
+                cut = para_cut
+
+        spans.append(ChunkSpan(starts[i], ends[cut - 1], (pages[i], pages[cut - 1])))
+        if cut >= n:
+            break
+
+        next_i = cut
+        if overlap_tokens and kinds[cut] != _PAGE_START:
+            back = 0
+            while next_i - 1 > i and back + tokens[next_i - 1] <= overlap_tokens:
+                next_i -= 1
+                back += tokens[next_i]
+        i = next_i
+
+    logger.info(
+        "Texto dividido em %d chunks (max_tokens=%d, overlap=%d)",
+        len(spans),
+        max_tokens,
+        overlap_tokens,
+    )
+    return spans
+
+
+def chunk_step(clean_text: str, chunk_tokens: int, chunk_overlap_tokens: int) -> dict[str, Any]:
+    spans = chunk_spans(clean_text, max_tokens=chunk_tokens, overlap_tokens=chunk_overlap_tokens)
+    return {"chunks": [clean_text[s.start : s.end] for s in spans], "chunk_spans": spans}
+
+
+CHUNK_STEP = Step(
+    name="chunk",
+    inputs=("clean_text", "chunk_tokens", "chunk_overlap_tokens"),
+    outputs=("chunks", "chunk_spans"),
+    fn=chunk_step,
+    version="2",
+)
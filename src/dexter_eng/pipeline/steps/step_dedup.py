@@ -0,0 +1,111 @@
+"""Agrupamento de chunks quase duplicados antes do map.
+
+Anexos como minutas de contrato e termos de referência repetem o corpo do
+edital quase palavra por palavra. Só o representante de cada grupo vai à
+LLM; no reduce, a extração dele é replicada para os demais membros com as
+citações apontando para as páginas de cada um.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any
+
+from dexter_eng.core.retrieval.minhash import near_duplicate_clusters
+from dexter_eng.core.schemas.edital import Citation, EditalExtraction
+from dexter_eng.pipeline.base import Step
+from dexter_eng.pipeline.steps.step_chunk import ChunkSpan
+
+logger = logging.getLogger(__name__)
+
+_PAGE_MARKER = re.compile(r"=== PAGE (\d+) ===")
+
+# Excerto usado para localizar a citação no texto do membro
+_EXCERPT_PROBE = 40
+
+
+def _page_at(chunk: str, span: ChunkSpan, pos: int) -> int:
+    """Página do caractere ``pos`` do chunk: último marcador antes dele."""
+    page = span.page_range[0]
+    for m in _PAGE_MARKER.finditer(chunk, 0, pos):
+        page = int(m.group(1))
+    return page
+
+
+def remap_citation(
+    citation: Citation,
+    rep_span: ChunkSpan,
+    member_chunk: str,
+    member_span: ChunkSpan,
+) -> Citation:
+    """Citação equivalente no membro do grupo.
+
+    Procura o começo do excerto no texto do membro; se não achar, aplica o
+    mesmo deslocamento de página que a citação tem dentro do representante.
+    """
+    probe = citation.excerpt.strip()[:_EXCERPT_PROBE].lower()
+    pos = member_chunk.lower().find(probe) if probe else -1
+    if pos >= 0:
+        page = _page_at(member_chunk, member_span, pos)
+    else:
+        first, last = member_span.page_range
+        page = min(last, first + max(0, citation.page - rep_span.page_range[0]))
+    return Citation(page=max(1, page), excerpt=citation.excerpt)
+
+
+def remap_extraction(
+    extraction: EditalExtraction,
+    rep_span: ChunkSpan,
+    member_chunk: str,
+    member_span: ChunkSpan,
+) -> EditalExtraction:
+    """Cópia da extração com todas as citações remapeadas para o membro."""
+    copy = extraction.model_copy(deep=True)
+    groups = (
+        copy.prazos,
+        copy.documentos_exigidos,
+        copy.criterios_habilitacao,
+        copy.penalidades,
+    )
+    for group in groups:
+        for item in group:
+            item.citations = [
+                remap_citation(c, rep_span, member_chunk, member_span) for c in item.citations
+            ]
+    return copy
+
+
+def dedup_step(chunks: list[str], selected: list[int], dedup_threshold: float) -> dict[str, Any]:
+    """Escolhe um representante por grupo de chunks quase duplicados.
+
+    ``dedup_threshold <= 0`` desativa o agrupamento.
+    """
+    if dedup_threshold <= 0 or len(selected) < 2:
+        groups = [[i] for i in selected]
+    else:
+        clusters = near_duplicate_clusters([chunks[i] for i in selected], threshold=dedup_threshold)
+        groups = [[selected[k] for k in cluster] for cluster in clusters]
+
+    groups.sort(key=lambda g: g[0])
+    clusters_map = {g[0]: g[1:] for g in groups if len(g) > 1}
+    duplicates = sum(len(members) for members in clusters_map.values())
+    if duplicates:
+        logger.info(
+            "Dedup: %d chunks quase duplicados em %d grupos não serão enviados à LLM",
+            duplicates,
+            len(clusters_map),
+        )
+    return {
+        "map_indices": [g[0] for g in groups],
+        "clusters": clusters_map,
+        "dedup": {"groups": len(clusters_map), "chunks_skipped": duplicates},
+    }
+
+
+DEDUP_STEP = Step(
+    name="dedup",
+    inputs=("chunks", "selected", "dedup_threshold"),
+    outputs=("map_indices", "clusters", "dedup"),
+    fn=dedup_step,
+)
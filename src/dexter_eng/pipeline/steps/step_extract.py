@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict
+from typing import Any
+
+from dexter_eng.adapters.pdf.extract_text import ExtractStats, extract_text_from_pdf
+from dexter_eng.adapters.pdf.source import PdfSource
+from dexter_eng.persistence.db import (
+    get_cached_pages,
+    get_ocr_texts,
+    save_cached_pages,
+    save_ocr_texts,
+)
+from dexter_eng.pipeline.base import Step
+
+logger = logging.getLogger(__name__)
+
+
+class DbPageCache:
+    """Cache de texto por página no SQLite, chaveado por ``(sha256, página, extrator)``."""
+
+    def __init__(self, sha256: str) -> None:
+        self.sha256 = sha256
+
+    def get_pages(self, plan: dict[int, str]) -> dict[int, tuple[str, int]]:
+        return get_cached_pages(self.sha256, plan)
+
+    def put_pages(self, pages: list[tuple[int, str, str, int]]) -> None:
+        save_cached_pages(self.sha256, pages)
+
+
+class DbOcrCache:
+    """Cache de OCR no SQLite, chaveado por ``(hash da página, engine)``."""
+
+    def get_texts(self, page_hashes: list[str], engine: str) -> dict[str, str]:
+        return get_ocr_texts(page_hashes, engine)
+
+    def put_texts(self, items: list[tuple[str, str]], engine: str) -> None:
+        save_ocr_texts(items, engine)
+
+
+def extract_step(
+    pdf_path: str,
+    document_sha256: str,
+    ocr: str,
+    ocr_backend: str,
+    ocr_language: str,
+    ocr_dpi: int,
+    pdf_tables: bool,
+    pdf_workers: int,
+    pdf_parallel_min_pages: int,
+    pdf_source: PdfSource | None = None,
+) -> dict[str, Any]:
+    """Extrai o texto do PDF. A chave de cache é o SHA-256 do arquivo, não o caminho.
+
+    ``pdf_source`` traz o conteúdo já lido para o hash, evitando uma segunda leitura.
+    ``extract_stats`` vai para o ``meta.json`` (páginas em cache, economia das
+    tabelas, páginas com OCR).
+    """
+    stats = ExtractStats()
+    text = extract_text_from_pdf(
+        pdf_path,
+        workers=pdf_workers,
+        parallel_min_pages=pdf_parallel_min_pages,
+        page_cache=DbPageCache(document_sha256),
+        source=pdf_source,
+        ocr=ocr,
+        ocr_backend=ocr_backend,
+        ocr_language=ocr_language,
+        ocr_dpi=ocr_dpi,
+        ocr_cache=DbOcrCache(),
+        tables=pdf_tables,
+        stats=stats,
+    )
+    return {"text": text, "extract_stats": asdict(stats)}
+
+
+EXTRACT_STEP = Step(
+    name="extract",
+    inputs=("document_sha256", "ocr", "ocr_backend", "ocr_language", "ocr_dpi", "pdf_tables"),
+    uses=("pdf_path", "pdf_source", "pdf_workers", "pdf_parallel_min_pages"),
+    outputs=("text", "extract_stats"),
+    fn=extract_step,
+    version="2",
+)
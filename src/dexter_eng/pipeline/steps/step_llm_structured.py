@@ -1,15 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import hashlib
 import json
 import logging
+import os
 import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
 
 from pydantic import ValidationError
 
-from dexter_eng.adapters.llm.client import LLMClient
-from dexter_eng.core.schemas.edital import EditalExtraction
-from dexter_eng.persistence.db import get_cached_response, save_cached_response
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.adapters.llm.usage import LLMUsage, usage_from_raw
+from dexter_eng.core.rules.edital_rules import coverage_problems
+from dexter_eng.core.schemas.edital import EditalExtraction, edital_json_schema
+from dexter_eng.persistence.db import (
+    acquire_llm_lease,
+    get_cached_response,
+    release_llm_lease,
+    save_cached_response,
+)
+from dexter_eng.pipeline.base import Step
+from dexter_eng.pipeline.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +36,39 @@ _last_raw_response: str = ""
 _last_cache_hit: bool = False
 _last_request_id: str | None = None
 
+# Chamadas idênticas (mesmo prompt_hash + modelo) em voo viram uma só: entre
+# threads/tarefas pelo SingleFlight e entre processos pela reserva no SQLite.
+_flights = SingleFlight()
+_LEASE_OWNER = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+# Validade da reserva: cobre a chamada mais lenta; depois disso o dono é dado como morto
+_LEASE_TTL_S = 600.0
+_LEASE_POLL_S = 0.25
+
+
+@dataclass
+class StructuredResult:
+    """Resultado de uma chamada de extração estruturada sobre um trecho."""
+
+    extraction: EditalExtraction
+    prompt: str
+    raw_response: str
+    cache_hit: bool
+    request_id: str | None = None
+    # Nível da cascata que respondeu (None fora da cascata ou em cache hit)
+    tier: str | None = None
+    escalated: bool = False
+    # Tokens/latência/custo da chamada (None em cache hit)
+    usage: LLMUsage | None = None
+
+
+@dataclass
+class ChunkOutcome:
+    """Resultado do map para um chunk: sucesso (``result``) ou falha (``error``)."""
+
+    index: int
+    result: StructuredResult | None = None
+    error: Exception | None = None
+
 
 def _extract_json(text: str) -> str:
     """Extrai bloco JSON da resposta da LLM, suportando markdown code blocks."""
@@ -38,42 +88,7 @@ def _extract_json(text: str) -> str:
     return text[start : end + 1]
 
 
-def extract_edital_structured(
-    llm: LLMClient, prompt_template: str, text: str
-) -> EditalExtraction:
-    global _last_prompt, _last_raw_response, _last_cache_hit, _last_request_id
-
-    prompt = prompt_template.replace("{{TEXT}}", text)
-    _last_prompt = prompt
-    logger.info("Enviando texto para extração estruturada (%d chars no prompt)", len(prompt))
-
-    # Cache por hash do prompt
-    prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
-    cached = get_cached_response(prompt_hash, llm.model)
-
-    if cached is not None:
-        logger.info("Cache HIT (hash=%s…)", prompt_hash[:12])
-        resp = cached
-        _last_cache_hit = True
-        _last_request_id = None
-    else:
-        logger.info("Cache MISS (hash=%s…)", prompt_hash[:12])
-        llm_response = llm.complete(prompt)
-        resp = llm_response.text.strip()
-        raw = llm_response.raw or {}
-        _last_request_id = raw.get("id") if isinstance(raw, dict) else None
-        save_cached_response(
-            prompt_hash,
-            llm.model,
-            resp,
-            prompt_chars=len(prompt),
-            response_chars=len(resp),
-        )
-        _last_cache_hit = False
-
-    _last_raw_response = resp
-    logger.debug("Resposta bruta da LLM (%d chars)", len(resp))
-
+def _parse_extraction(resp: str) -> EditalExtraction:
     json_str = _extract_json(resp)
     payload = json.loads(json_str)
     logger.info("JSON parseado com sucesso")
@@ -92,3 +107,316 @@ def extract_edital_structured(
         logger.error("Falha na validação do schema: %s", e)
         logger.debug("Payload rejeitado: %s", json.dumps(payload, ensure_ascii=False)[:1000])
         raise
+
+
+def edital_rejection(text: str, max_pendencias: int = 3) -> str | None:
+    """Motivo para recusar a resposta de um modelo, ou ``None`` se ela serve.
+
+    Usado pela cascata de providers: JSON válido, schema ``EditalExtraction``
+    e heurísticas de cobertura (``coverage_problems``).
+    """
+    try:
+        extraction = EditalExtraction.model_validate(json.loads(_extract_json(text)))
+    except (ValueError, ValidationError) as e:
+        return f"resposta inválida: {str(e).splitlines()[0][:120]}"
+    problems = coverage_problems(extraction, max_pendencias=max_pendencias)
+    return "; ".join(problems) or None
+
+
+def _lookup_cache(llm: LLMClient, prompt: str) -> tuple[str, str | None]:
+    """Retorna ``(prompt_hash, resposta_em_cache | None)``."""
+    prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+    cached = get_cached_response(prompt_hash, llm.model)
+    if cached is not None:
+        logger.info("Cache HIT (hash=%s…)", prompt_hash[:12])
+    else:
+        logger.info("Cache MISS (hash=%s…)", prompt_hash[:12])
+    return prompt_hash, cached
+
+
+def _store_response(
+    llm: LLMClient, prompt: str, prompt_hash: str, llm_response: LLMResponse
+) -> tuple[str, str | None]:
+    """Normaliza e grava a resposta no cache; retorna ``(texto, request_id)``."""
+    resp = llm_response.text.strip()
+    raw = llm_response.raw or {}
+    request_id = raw.get("id") if isinstance(raw, dict) else None
+    save_cached_response(
+        prompt_hash,
+        llm.model,
+        resp,
+        prompt_chars=len(prompt),
+        response_chars=len(resp),
+    )
+    return resp, request_id
+
+
+def _call_llm_once(
+    llm: LLMClient, prompt: str, prompt_hash: str
+) -> tuple[str, str | None, LLMResponse | None]:
+    """Chama a LLM sob a reserva entre processos.
+
+    Retorna ``(texto, request_id, resposta)``; ``resposta`` é ``None`` quando
+    outro processo respondeu o mesmo prompt enquanto esperávamos.
+    """
+    while not acquire_llm_lease(prompt_hash, llm.model, _LEASE_OWNER, _LEASE_TTL_S):
+        cached = get_cached_response(prompt_hash, llm.model, record=False)
+        if cached is not None:
+            logger.info("Resposta obtida de outro processo (hash=%s…)", prompt_hash[:12])
+            return cached, None, None
+        time.sleep(_LEASE_POLL_S)
+    try:
+        # A resposta pode ter chegado entre a consulta ao cache e a reserva
+        cached = get_cached_response(prompt_hash, llm.model, record=False)
+        if cached is not None:
+            return cached, None, None
+        llm_response = llm.complete_json(prompt, edital_json_schema())
+        resp, request_id = _store_response(llm, prompt, prompt_hash, llm_response)
+        return resp, request_id, llm_response
+    finally:
+        release_llm_lease(prompt_hash, llm.model, _LEASE_OWNER)
+
+
+async def _acall_llm_once(
+    llm: LLMClient, prompt: str, prompt_hash: str
+) -> tuple[str, str | None, LLMResponse | None]:
+    """Versão assíncrona de ``_call_llm_once``.
+
+    As consultas ao SQLite (reserva e cache) rodam em threads: podem esperar
+    o lock do banco e não devem travar as demais tarefas do event loop.
+    """
+    model = llm.model
+    while not await asyncio.to_thread(
+        acquire_llm_lease, prompt_hash, model, _LEASE_OWNER, _LEASE_TTL_S
+    ):
+        cached = await asyncio.to_thread(get_cached_response, prompt_hash, model, record=False)
+        if cached is not None:
+            logger.info("Resposta obtida de outro processo (hash=%s…)", prompt_hash[:12])
+            return cached, None, None
+        await asyncio.sleep(_LEASE_POLL_S)
+    try:
+        cached = await asyncio.to_thread(get_cached_response, prompt_hash, model, record=False)
+        if cached is not None:
+            return cached, None, None
+        llm_response = await llm.acomplete_json(prompt, edital_json_schema())
+        resp, request_id = await asyncio.to_thread(
+            _store_response, llm, prompt, prompt_hash, llm_response
+        )
+        return resp, request_id, llm_response
+    finally:
+        await asyncio.to_thread(release_llm_lease, prompt_hash, model, _LEASE_OWNER)
+
+
+def _flight_result(
+    prompt: str,
+    prompt_hash: str,
+    outcome: tuple[str, str | None, LLMResponse | None],
+    shared: bool,
+) -> StructuredResult:
+    resp, request_id, llm_response = outcome
+    if shared or llm_response is None:
+        # Outra chamada pagou pela resposta: conta como cache hit
+        logger.info("Resposta compartilhada com chamada idêntica (hash=%s…)", prompt_hash[:12])
+        return _build_result(prompt, resp, cache_hit=True, request_id=None)
+    return _build_result(prompt, resp, False, request_id, llm_response)
+
+
+def _build_result(
+    prompt: str,
+    resp: str,
+    cache_hit: bool,
+    request_id: str | None,
+    llm_response: LLMResponse | None = None,
+) -> StructuredResult:
+    logger.debug("Resposta bruta da LLM (%d chars)", len(resp))
+    raw = llm_response.raw if llm_response is not None else None
+    raw = raw if isinstance(raw, dict) else {}
+    return StructuredResult(
+        extraction=_parse_extraction(resp),
+        prompt=prompt,
+        raw_response=resp,
+        cache_hit=cache_hit,
+        request_id=request_id,
+        tier=raw.get("tier"),
+        escalated=bool(raw.get("escalated_from")),
+        usage=usage_from_raw(raw),
+    )
+
+
+def prompt_prefix(prompt_template: str) -> str:
+    """Parte fixa do template (instruções e schema) antes de ``{{TEXT}}``.
+
+    Como o trecho variável vem depois, todo prompt do map começa pelo mesmo
+    prefixo, que os providers reaproveitam entre chunks (ver
+    ``LLMClient.cache_prefix``).
+    """
+    prefix, placeholder, _suffix = prompt_template.partition("{{TEXT}}")
+    return prefix if placeholder else prompt_template
+
+
+def extract_edital_chunk(
+    llm: LLMClient, prompt_template: str, text: str
+) -> StructuredResult:
+    """Extrai dados estruturados de um trecho sem tocar no estado do módulo.
+
+    Seguro para chamadas concorrentes (usado pelo map do map-reduce).
+    """
+    prompt = prompt_template.replace("{{TEXT}}", text)
+    logger.info("Enviando texto para extração estruturada (%d chars no prompt)", len(prompt))
+
+    # Cache por hash do prompt
+    prompt_hash, cached = _lookup_cache(llm, prompt)
+    if cached is not None:
+        return _build_result(prompt, cached, cache_hit=True, request_id=None)
+
+    outcome, shared = _flights.do(
+        (prompt_hash, llm.model), lambda: _call_llm_once(llm, prompt, prompt_hash)
+    )
+    return _flight_result(prompt, prompt_hash, outcome, shared)
+
+
+async def aextract_edital_chunk(
+    llm: LLMClient, prompt_template: str, text: str
+) -> StructuredResult:
+    """Versão assíncrona de ``extract_edital_chunk`` (usa ``llm.acomplete``)."""
+    prompt = prompt_template.replace("{{TEXT}}", text)
+    logger.info("Enviando texto para extração estruturada (%d chars no prompt)", len(prompt))
+
+    prompt_hash, cached = await asyncio.to_thread(_lookup_cache, llm, prompt)
+    if cached is not None:
+        return _build_result(prompt, cached, cache_hit=True, request_id=None)
+
+    outcome, shared = await _flights.ado(
+        (prompt_hash, llm.model), lambda: _acall_llm_once(llm, prompt, prompt_hash)
+    )
+    return _flight_result(prompt, prompt_hash, outcome, shared)
+
+
+def extract_edital_structured(
+    llm: LLMClient, prompt_template: str, text: str
+) -> EditalExtraction:
+    global _last_prompt, _last_raw_response, _last_cache_hit, _last_request_id
+
+    prompt = prompt_template.replace("{{TEXT}}", text)
+    _last_prompt = prompt
+
+    result = extract_edital_chunk(llm, prompt_template, text)
+    _last_raw_response = result.raw_response
+    _last_cache_hit = result.cache_hit
+    _last_request_id = result.request_id
+    return result.extraction
+
+
+def map_edital_chunks(
+    llm: LLMClient,
+    prompt_template: str,
+    chunks: list[str],
+    max_workers: int = 4,
+) -> list[ChunkOutcome]:
+    """Etapa *map*: extrai cada chunk em paralelo com um pool limitado.
+
+    O número de chamadas simultâneas à LLM é limitado por ``max_workers``;
+    a ordem do retorno segue a ordem dos chunks. Falhas ficam registradas
+    no ``ChunkOutcome`` em vez de abortar os demais chunks.
+    """
+
+    def _run(index: int, chunk: str) -> ChunkOutcome:
+        try:
+            return ChunkOutcome(index=index, result=extract_edital_chunk(llm, prompt_template, chunk))
+        except Exception as e:  # noqa: BLE001 — a falha é reportada no reduce
+            logger.warning("Chunk %d/%d falhou: %s", index + 1, len(chunks), e)
+            return ChunkOutcome(index=index, error=e)
+
+    if not chunks:
+        return []
+
+    llm.cache_prefix(prompt_prefix(prompt_template))
+    workers = max(1, min(max_workers, len(chunks)))
+    logger.info("Map: %d chunks, %d workers", len(chunks), workers)
+    if workers == 1:
+        return [_run(i, c) for i, c in enumerate(chunks)]
+
+    # Propaga o contexto (ex.: a fila do documento no agendador de rate limit)
+    ctx = contextvars.copy_context()
+
+    def _run_in_context(index: int, chunk: str) -> ChunkOutcome:
+        return ctx.copy().run(_run, index, chunk)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dexter-map") as pool:
+        return list(pool.map(_run_in_context, range(len(chunks)), chunks))
+
+
+async def amap_edital_chunks(
+    llm: LLMClient,
+    prompt_template: str,
+    chunks: list[str],
+    max_concurrency: int = 16,
+) -> list[ChunkOutcome]:
+    """Versão assíncrona do map: até ``max_concurrency`` requisições em voo."""
+    if not chunks:
+        return []
+
+    llm.cache_prefix(prompt_prefix(prompt_template))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _run(index: int, chunk: str) -> ChunkOutcome:
+        async with semaphore:
+            try:
+                result = await aextract_edital_chunk(llm, prompt_template, chunk)
+                return ChunkOutcome(index=index, result=result)
+            except Exception as e:  # noqa: BLE001 — a falha é reportada no reduce
+                logger.warning("Chunk %d/%d falhou: %s", index + 1, len(chunks), e)
+                return ChunkOutcome(index=index, error=e)
+
+    logger.info("Map async: %d chunks, até %d em voo", len(chunks), max_concurrency)
+    return list(await asyncio.gather(*(_run(i, c) for i, c in enumerate(chunks))))
+
+
+def _with_chunk_indices(
+    outcomes: list[ChunkOutcome], map_indices: list[int]
+) -> list[ChunkOutcome]:
+    """Troca a posição na lista enviada pelo índice original do chunk."""
+    for outcome in outcomes:
+        outcome.index = map_indices[outcome.index]
+    return outcomes
+
+
+def llm_map_step(
+    chunks: list[str],
+    map_indices: list[int],
+    prompt_template: str,
+    llm_model: str,
+    llm: LLMClient,
+    llm_concurrency: int,
+) -> dict[str, Any]:
+    outcomes = map_edital_chunks(
+        llm, prompt_template, [chunks[i] for i in map_indices], max_workers=llm_concurrency
+    )
+    return {"outcomes": _with_chunk_indices(outcomes, map_indices)}
+
+
+async def allm_map_step(
+    chunks: list[str],
+    map_indices: list[int],
+    prompt_template: str,
+    llm_model: str,
+    llm: LLMClient,
+    llm_concurrency: int,
+) -> dict[str, Any]:
+    outcomes = await amap_edital_chunks(
+        llm, prompt_template, [chunks[i] for i in map_indices], max_concurrency=llm_concurrency
+    )
+    return {"outcomes": _with_chunk_indices(outcomes, map_indices)}
+
+
+# Não cacheável no motor: cada chunk já passa pelo llm_cache (por hash do
+# prompt), que também alimenta as métricas de cache hit da run.
+LLM_MAP_STEP = Step(
+    name="llm_map",
+    inputs=("chunks", "map_indices", "prompt_template", "llm_model"),
+    uses=("llm", "llm_concurrency"),
+    outputs=("outcomes",),
+    fn=llm_map_step,
+    afn=allm_map_step,
+    cacheable=False,
+)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import logging
+import re
+import unicodedata
+from typing import Any, Iterable
+
+from dexter_eng.core.schemas.edital import Citation, Deadline, EditalExtraction, Requirement
+from dexter_eng.pipeline.base import Step
+from dexter_eng.pipeline.steps.step_chunk import ChunkSpan
+from dexter_eng.pipeline.steps.step_dedup import remap_extraction
+from dexter_eng.pipeline.steps.step_llm_structured import ChunkOutcome
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_key(value: str) -> str:
+    """Normaliza texto para deduplicação: sem acentos, caixa, pontuação ou espaços extras."""
+    text = unicodedata.normalize("NFKD", value)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def _union_citations(target: list[Citation], extra: Iterable[Citation]) -> None:
+    seen = {(c.page, normalize_key(c.excerpt)) for c in target}
+    for c in extra:
+        key = (c.page, normalize_key(c.excerpt))
+        if key not in seen:
+            seen.add(key)
+            target.append(c)
+
+
+def _merge_requirements(groups: Iterable[list[Requirement]]) -> list[Requirement]:
+    merged: dict[str, Requirement] = {}
+    for items in groups:
+        for item in items:
+            key = normalize_key(item.title)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = item.model_copy(deep=True)
+                continue
+            # Mantém a descrição mais completa entre os trechos
+            if len(item.description.strip()) > len(current.description.strip()):
+                current.description = item.description
+            _union_citations(current.citations, item.citations)
+    return list(merged.values())
+
+
+def _merge_deadlines(
+    groups: Iterable[list[Deadline]], pendencias: list[str]
+) -> list[Deadline]:
+    merged: dict[str, Deadline] = {}
+    for items in groups:
+        for item in items:
+            key = normalize_key(item.name)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = item.model_copy(deep=True)
+                continue
+            if normalize_key(item.date_text) != normalize_key(current.date_text):
+                pendencias.append(
+                    f"Prazo '{current.name}' com datas divergentes no edital: "
+                    f"'{current.date_text}' / '{item.date_text}'"
+                )
+            _union_citations(current.citations, item.citations)
+    return list(merged.values())
+
+
+def merge_extractions(parts: list[EditalExtraction]) -> EditalExtraction:
+    """Etapa *reduce*: combina extrações parciais (uma por chunk) numa só.
+
+    - ``orgao``/``objeto``: primeiro valor não vazio, na ordem dos chunks;
+    - prazos e requisitos: deduplicados pelo título normalizado, com união das citações;
+    - pendências: deduplicadas preservando a ordem.
+    """
+    if not parts:
+        return EditalExtraction()
+    if len(parts) == 1:
+        # Cópia: o reduce acrescenta pendências e não pode alterar o resultado do chunk
+        return parts[0].model_copy(deep=True)
+
+    pendencias: list[str] = []
+    merged = EditalExtraction(
+        orgao=next((p.orgao for p in parts if p.orgao and p.orgao.strip()), None),
+        objeto=next((p.objeto for p in parts if p.objeto and p.objeto.strip()), None),
+        prazos=_merge_deadlines((p.prazos for p in parts), pendencias),
+        documentos_exigidos=_merge_requirements(p.documentos_exigidos for p in parts),
+        criterios_habilitacao=_merge_requirements(p.criterios_habilitacao for p in parts),
+        penalidades=_merge_requirements(p.penalidades for p in parts),
+    )
+
+    seen: set[str] = set()
+    for pendencia in [*(x for p in parts for x in p.pendencias), *pendencias]:
+        key = normalize_key(pendencia)
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.pendencias.append(pendencia)
+
+    logger.info(
+        "Reduce: %d extrações parciais -> %d prazos, %d docs, %d critérios, %d penalidades",
+        len(parts),
+        len(merged.prazos),
+        len(merged.documentos_exigidos),
+        len(merged.criterios_habilitacao),
+        len(merged.penalidades),
+    )
+    return merged
+
+
+def reduce_step(
+    outcomes: list[ChunkOutcome],
+    chunks: list[str],
+    chunk_spans: list[ChunkSpan],
+    clusters: dict[int, list[int]],
+) -> dict[str, Any]:
+    """Consolida os resultados do map; chunks com falha viram pendências.
+
+    A extração de cada representante é replicada para os membros do grupo
+    de quase duplicados (``clusters``), com as citações nas páginas deles.
+    Se todos os chunks falharem, propaga o primeiro erro.
+    """
+    ok = [o for o in outcomes if o.result is not None]
+    failures = [o for o in outcomes if o.error is not None]
+    if failures and not ok:
+        raise failures[0].error  # type: ignore[misc]
+
+    parts = []
+    for o in ok:
+        parts.append(o.result.extraction)  # type: ignore[union-attr]
+        for member in clusters.get(o.index, ()):
+            parts.append(
+                remap_extraction(
+                    o.result.extraction,  # type: ignore[union-attr]
+                    chunk_spans[o.index],
+                    chunks[member],
+                    chunk_spans[member],
+                )
+            )
+    extraction = merge_extractions(parts)
+    for f in failures:
+        extraction.pendencias.append(
+            f"Trecho {f.index + 1}/{len(chunks)} não pôde ser analisado: {f.error}"
+        )
+    return {"extraction": extraction}
+
+
+REDUCE_STEP = Step(
+    name="reduce",
+    inputs=("outcomes",),
+    uses=("chunks", "chunk_spans", "clusters"),
+    outputs=("extraction",),
+    fn=reduce_step,
+    cacheable=False,
+)
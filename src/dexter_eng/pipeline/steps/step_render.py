@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from dexter_eng.core.schemas.edital import EditalExtraction
+from dexter_eng.pipeline.base import Step
+from dexter_eng.renderers.markdown import to_markdown
+
+logger = logging.getLogger(__name__)
+
+
+def render_step(validated: EditalExtraction) -> dict[str, Any]:
+    return {"markdown": to_markdown(validated)}
+
+
+RENDER_STEP = Step(
+    name="render",
+    inputs=("validated",),
+    outputs=("markdown",),
+    fn=render_step,
+    cacheable=False,
+)
@@ -0,0 +1,111 @@
+"""Seleção dos chunks enviados à LLM por relevância (BM25).
+
+Em editais longos, mandar todos os chunks ao map custa caro e boa parte
+deles (minutas, anexos técnicos) não contribui para os campos extraídos.
+O índice BM25 só é construído quando há seleção a fazer (orçamento
+positivo e documento maior que ele); cada consulta temática escolhe seus
+chunks mais relevantes, alternadamente, até esgotar o orçamento de tokens.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from dexter_eng.core.retrieval.bm25 import BM25Index
+from dexter_eng.pipeline.base import Step
+from dexter_eng.pipeline.steps.step_chunk import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Uma consulta por grupo de campos do EditalExtraction
+EDITAL_QUERIES: dict[str, str] = {
+    "prazos": (
+        "prazo data horário abertura sessão pública entrega propostas impugnação "
+        "esclarecimentos recurso vigência dias úteis cronograma"
+    ),
+    "habilitacao": (
+        "habilitação jurídica regularidade fiscal trabalhista qualificação técnica "
+        "econômico-financeira atestado capacidade balanço patrimonial"
+    ),
+    "documentos": (
+        "documentos exigidos apresentar certidão negativa declaração comprovante "
+        "proposta planilha anexo envelope"
+    ),
+    "penalidades": (
+        "penalidades sanções multa advertência impedimento licitar contratar "
+        "suspensão inidoneidade rescisão"
+    ),
+}
+
+
+def select_chunks(
+    index: BM25Index,
+    chunk_tokens: list[int],
+    token_budget: int,
+    queries: dict[str, str] = EDITAL_QUERIES,
+) -> list[int]:
+    """Índices (em ordem do documento) dos chunks escolhidos dentro do orçamento.
+
+    O primeiro chunk (preâmbulo: órgão, objeto, modalidade) entra sempre.
+    Depois as consultas se alternam, cada uma levando seu próximo chunk mais
+    relevante que ainda caiba. ``token_budget <= 0`` ou um documento que já
+    cabe no orçamento seleciona todos.
+    """
+    total = sum(chunk_tokens)
+    if token_budget <= 0 or total <= token_budget:
+        return list(range(len(chunk_tokens)))
+
+    chosen = {0}
+    used = chunk_tokens[0]
+    rankings = [iter(index.rank(q)) for q in queries.values()]
+    while rankings:
+        still_active = []
+        for ranking in rankings:
+            for i in ranking:
+                if i in chosen:
+                    continue
+                if used + chunk_tokens[i] > token_budget:
+                    continue
+                chosen.add(i)
+                used += chunk_tokens[i]
+                still_active.append(ranking)
+                break
+        rankings = still_active
+    return sorted(chosen)
+
+
+def select_step(chunks: list[str], select_token_budget: int) -> dict[str, Any]:
+    tokens = [estimate_tokens(c) for c in chunks]
+    if select_token_budget <= 0 or sum(tokens) <= select_token_budget:
+        # Seleção desligada ou desnecessária: não paga tokenização nem índice
+        selected = list(range(len(chunks)))
+    else:
+        selected = select_chunks(BM25Index.build(chunks), tokens, select_token_budget)
+    selected_tokens = sum(tokens[i] for i in selected)
+    if len(selected) < len(chunks):
+        logger.info(
+            "Seleção BM25: %d/%d chunks (%d/%d tokens estimados)",
+            len(selected),
+            len(chunks),
+            selected_tokens,
+            sum(tokens),
+        )
+    return {
+        "selected": selected,
+        "selection": {
+            "chunks_total": len(chunks),
+            "chunks_selected": len(selected),
+            "tokens_total": sum(tokens),
+            "tokens_selected": selected_tokens,
+        },
+    }
+
+
+SELECT_STEP = Step(
+    name="select",
+    inputs=("chunks", "select_token_budget"),
+    outputs=("selected", "selection"),
+    fn=select_step,
+    version="2",
+)
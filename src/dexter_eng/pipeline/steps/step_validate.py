@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from dexter_eng.core.rules.edital_rules import apply_edital_rules
+from dexter_eng.core.schemas.edital import EditalExtraction
+from dexter_eng.pipeline.base import Step
+
+logger = logging.getLogger(__name__)
+
+
+def validate_step(extraction: EditalExtraction) -> dict[str, Any]:
+    """Aplica as regras de negócio sobre a extração consolidada."""
+    return {"validated": apply_edital_rules(extraction.model_copy(deep=True))}
+
+
+VALIDATE_STEP = Step(
+    name="validate",
+    inputs=("extraction",),
+    outputs=("validated",),
+    fn=validate_step,
+    cacheable=False,
+)
@@ -0,0 +1,127 @@
+"""Testes do contrato assíncrono da LLM e da variante asyncio do pipeline."""
+
+import asyncio
+import json
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+from dexter_eng.adapters.llm import local_ollama_client
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.adapters.llm.local_ollama_client import LocalOllamaClient
+from dexter_eng.pipeline.edital_pipeline import arun_edital_pipeline
+from dexter_eng.pipeline.steps.step_llm_structured import amap_edital_chunks
+
+
+PAYLOAD = json.dumps({"orgao": "Prefeitura Assíncrona", "objeto": "Obra"})
+
+
+class SyncOnlyLLM(LLMClient):
+    def __init__(self):
+        super().__init__(model="sync-only", api_key="fake")
+
+    def complete(self, prompt: str) -> LLMResponse:
+        return LLMResponse(text=PAYLOAD)
+
+
+class AsyncLLM(LLMClient):
+    """LLM fake com ``acomplete`` nativo que mede o pico de concorrência."""
+
+    def __init__(self):
+        super().__init__(model="async-fake", api_key="fake")
+        self.active = 0
+        self.peak = 0
+        self.sync_calls = 0
+
+    def complete(self, prompt: str) -> LLMResponse:
+        self.sync_calls += 1
+        return LLMResponse(text=PAYLOAD)
+
+    async def acomplete(self, prompt: str) -> LLMResponse:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return LLMResponse(text=PAYLOAD)
+
+
+class TestAcompleteContract:
+    def test_default_acomplete_delegates_to_complete(self):
+        resp = asyncio.run(SyncOnlyLLM().acomplete("x"))
+        assert resp.text == PAYLOAD
+
+    def test_ollama_acomplete_streams(self, monkeypatch):
+        lines = [
+            {"response": '{"orgao": '},
+            {"response": '"X"}'},
+            {"done": True, "eval_count": 5},
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.path == "/api/generate"
+            body = "\n".join(json.dumps(line) for line in lines)
+            return httpx.Response(200, content=body.encode())
+
+        real_async_client = httpx.AsyncClient
+        monkeypatch.setattr(
+            local_ollama_client.httpx,
+            "AsyncClient",
+            lambda **kw: real_async_client(transport=httpx.MockTransport(handler), **kw),
+        )
+
+        llm = LocalOllamaClient(model="m", stop_on_json=False)
+        resp = asyncio.run(llm.acomplete("prompt"))
+        assert resp.text == '{"orgao": "X"}'
+        assert resp.raw["ollama_last_chunk"]["eval_count"] == 5
+
+
+class TestAmapEditalChunks:
+    def test_bounded_concurrency_and_order(self):
+        llm = AsyncLLM()
+        chunks = [f"trecho {i}" for i in range(12)]
+        outcomes = asyncio.run(amap_edital_chunks(llm, "{{TEXT}}", chunks, max_concurrency=5))
+        assert [o.index for o in outcomes] == list(range(12))
+        assert all(o.result is not None for o in outcomes)
+        assert llm.peak == 5
+        assert llm.sync_calls == 0
+
+    def test_cache_lookup_runs_off_the_event_loop(self):
+        from dexter_eng.pipeline.steps import step_llm_structured
+
+        threads = []
+        lookup = step_llm_structured._lookup_cache
+
+        def spy(llm, prompt):
+            threads.append(threading.current_thread())
+            return lookup(llm, prompt)
+
+        with patch.object(step_llm_structured, "_lookup_cache", spy):
+            asyncio.run(amap_edital_chunks(AsyncLLM(), "{{TEXT}}", ["trecho"], max_concurrency=1))
+        assert threads and threading.main_thread() not in threads
+
+
+class TestArunEditalPipeline:
+    def test_async_pipeline_generates_markdown(self, tmp_path: Path):
+        text = "".join(f"\n=== PAGE {i} ===\n" + chr(96 + i) * 90 + "\n" for i in range(1, 6))
+        llm = AsyncLLM()
+
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
+            return_value=text,
+        ):
+            out = asyncio.run(
+                arun_edital_pipeline(
+                    pdf_path="edital_async.pdf",
+                    llm=llm,
+                    prompt_template="{{TEXT}}",
+                    out_dir=str(tmp_path),
+                    max_chars=150,
+                    llm_concurrency=4,
+                )
+            )
+
+        assert out.name == "edital_async_edital.md"
+        assert "Prefeitura Assíncrona" in out.read_text(encoding="utf-8")
+        assert llm.peak > 1
@@ -0,0 +1,114 @@
+"""Testes para o processamento em lote de PDFs."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.pipeline.batch import discover_pdfs, run_batch
+
+
+RESPONSE = json.dumps({"orgao": "Prefeitura em Lote", "objeto": "Obra"})
+
+
+class FakeLLM(LLMClient):
+    def __init__(self):
+        super().__init__(model="fake-batch", api_key="fake")
+        self.calls = 0
+
+    def complete(self, prompt: str) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(text=RESPONSE)
+
+
+def _fake_extract(pdf_path: str, **kwargs) -> str:
+    if "quebrado" in pdf_path:
+        raise RuntimeError("PDF corrompido")
+    return f"=== PAGE 1 ===\nEdital {Path(pdf_path).stem}\n"
+
+
+def _make_tree(root: Path) -> None:
+    (root / "a").mkdir(parents=True)
+    (root / "b").mkdir()
+    (root / "a" / "edital.pdf").write_bytes(b"%PDF-a")
+    (root / "b" / "edital.pdf").write_bytes(b"%PDF-b")
+    (root / "b" / "quebrado.PDF").write_bytes(b"%PDF-x")
+    (root / "b" / "notas.txt").write_text("ignorar")
+
+
+class TestDiscoverPdfs:
+    def test_directory_is_recursive_and_case_insensitive(self, tmp_path: Path):
+        _make_tree(tmp_path)
+        found = discover_pdfs(str(tmp_path))
+        assert [p.name for p in found] == ["edital.pdf", "edital.pdf", "quebrado.PDF"]
+
+    def test_glob_pattern(self, tmp_path: Path):
+        _make_tree(tmp_path)
+        found = discover_pdfs(str(tmp_path / "a" / "*.pdf"))
+        assert found == [tmp_path / "a" / "edital.pdf"]
+
+
+class TestRunBatch:
+    def test_failure_does_not_stop_batch(self, tmp_path: Path):
+        _make_tree(tmp_path / "in")
+        pdfs = discover_pdfs(str(tmp_path / "in"))
+        llm = FakeLLM()
+        reported = []
+
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
+            side_effect=_fake_extract,
+        ):
+            summary = run_batch(
+                pdfs,
+                llm=llm,
+                prompt_template="{{TEXT}}",
+                out_dir=str(tmp_path / "out"),
+                max_chars=8000,
+                workers=3,
+                on_item=reported.append,
+            )
+
+        assert len(summary.items) == 3
+        assert len(summary.succeeded) == 2
+        assert [i.pdf_path.name for i in summary.failed] == ["quebrado.PDF"]
+        assert "PDF corrompido" in summary.failed[0].error
+        assert len(reported) == 3
+        assert summary.docs_per_minute > 0
+
+    def test_same_stem_in_different_dirs_does_not_collide(self, tmp_path: Path):
+        _make_tree(tmp_path / "in")
+        pdfs = [p for p in discover_pdfs(str(tmp_path / "in")) if p.name == "edital.pdf"]
+
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
+            side_effect=_fake_extract,
+        ):
+            summary = run_batch(
+                pdfs,
+                llm=FakeLLM(),
+                prompt_template="{{TEXT}}",
+                out_dir=str(tmp_path / "out"),
+                max_chars=8000,
+            )
+
+        outputs = {i.result.output_path for i in summary.items}
+        assert outputs == {
+            tmp_path / "out" / "a" / "edital_edital.md",
+            tmp_path / "out" / "b" / "edital_edital.md",
+        }
+
+    def test_cache_hit_rate_on_repeated_documents(self, tmp_path: Path):
+        pdf = tmp_path / "repetido.pdf"
+        pdf.write_bytes(b"%PDF-r")
+        llm = FakeLLM()
+
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
+            side_effect=_fake_extract,
+        ):
+            run_batch([pdf], llm=llm, prompt_template="{{TEXT}}", out_dir=str(tmp_path / "o1"), max_chars=8000)
+            summary = run_batch([pdf], llm=llm, prompt_template="{{TEXT}}", out_dir=str(tmp_path / "o2"), max_chars=8000)
+
+        assert llm.calls == 1
+        assert summary.cache_hit_rate == 1.0
@@ -0,0 +1,99 @@
+"""Testes da remoção de cabeçalhos/rodapés repetidos (step_boilerplate)."""
+
+from dexter_eng.pipeline.steps.step_boilerplate import (
+    boilerplate_step,
+    normalize_line,
+    strip_boilerplate,
+)
+
+
+def _edital(pages: int = 5) -> str:
+    parts = []
+    for i in range(1, pages + 1):
+        parts.append(
+            f"=== PAGE {i} ===\n"
+            "PREFEITURA MUNICIPAL DE EXEMPLO\n"
+            "Secretaria de Administração\n"
+            f"Cláusula {i}: conteúdo específico da página {i}.\n"
+            f"Página {i} de {pages}\n"
+        )
+    return "\n".join(parts)
+
+
+class TestNormalizeLine:
+    def test_page_numbering_is_fuzzy(self):
+        assert normalize_line("Página 3 de 40") == normalize_line("Página 4 de 40")
+        assert normalize_line(" - 7 - ") == normalize_line("- 8 -")
+
+    def test_other_lines_keep_numbers(self):
+        assert normalize_line("Prazo 1: 01/09/2025") != normalize_line("Prazo 2: 02/09/2025")
+
+    def test_bare_number_only_counts_when_tracking_page(self):
+        assert normalize_line("12") == "12"
+        assert normalize_line("12", page=12) == normalize_line("13", page=13)
+        assert normalize_line("500", page=1) != normalize_line("750", page=2)
+
+
+class TestStripBoilerplate:
+    def test_removes_repeated_header_footer_and_numbering(self):
+        result = strip_boilerplate(_edital())
+        assert "PREFEITURA MUNICIPAL" not in result.text
+        assert "Página 2 de 5" not in result.text
+        assert "Cláusula 3: conteúdo específico da página 3." in result.text
+        assert result.lines_removed == 15
+        assert result.chars_removed == len(_edital()) - len(result.text)
+
+    def test_page_markers_are_kept(self):
+        result = strip_boilerplate(_edital())
+        for i in range(1, 6):
+            assert f"=== PAGE {i} ===" in result.text
+
+    def test_page_map_points_to_markers(self):
+        text = _edital()
+        result = strip_boilerplate(text)
+        assert [p for p, _clean, _orig in result.page_map] == [1, 2, 3, 4, 5]
+        for page, clean_start, orig_start in result.page_map:
+            assert result.text[clean_start:].startswith(f"=== PAGE {page} ===")
+            assert text[orig_start:].startswith(f"=== PAGE {page} ===")
+
+    def test_few_pages_are_left_untouched(self):
+        text = _edital(pages=2)
+        result = strip_boilerplate(text)
+        assert result.text == text
+        assert result.chars_removed == 0
+
+    def test_lines_on_few_pages_are_kept(self):
+        text = _edital() + "\n=== PAGE 6 ===\nNota exclusiva\n=== PAGE 7 ===\nNota exclusiva\n"
+        assert "Nota exclusiva" in strip_boilerplate(text).text
+
+
+class TestBoilerplateStep:
+    def test_disabled_passes_text_through(self):
+        out = boilerplate_step(_edital(), strip_boilerplate_lines=False)
+        assert out["clean_text"] == _edital()
+        assert out["boilerplate"]["chars_removed"] == 0
+
+    def test_reports_chars_saved(self):
+        out = boilerplate_step(_edital(), strip_boilerplate_lines=True)
+        assert out["boilerplate"]["chars_removed"] > 0
+        assert "prefeitura municipal de exemplo" in out["boilerplate"]["patterns"]
+
+
+class TestVaryingValues:
+    def _pages(self, body) -> str:
+        return "\n".join(f"=== PAGE {i} ===\n{body(i)}" for i in range(1, 7))
+
+    def test_varying_numeric_lines_and_their_labels_survive(self):
+        text = self._pages(
+            lambda i: f"Valor da multa\n{i * 137}\nPrazo de entrega (dias)\n{i * 5 + 2}\n"
+        )
+        result = strip_boilerplate(text)
+        assert result.text == text
+        assert result.patterns == []
+
+    def test_page_numbers_with_offset_are_removed(self):
+        text = self._pages(lambda i: f"Cláusula {i} do edital.\n{i + 2}\n")
+        result = strip_boilerplate(text)
+        assert "Cláusula 4 do edital." in result.text
+        assert "\n5\n" not in result.text
+        assert result.lines_removed == 6
@@ -0,0 +1,119 @@
+"""Testes da cascata de providers (modelo local primeiro, OpenAI só se preciso)."""
+
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from dexter_eng.adapters.llm.cascade import CascadeLLMClient
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.core.rules.edital_rules import coverage_problems
+from dexter_eng.core.schemas.edital import EditalExtraction
+from dexter_eng.persistence.db import _get_conn
+from dexter_eng.pipeline.edital_pipeline import run_edital_pipeline_detailed
+from dexter_eng.pipeline.steps.step_llm_structured import edital_rejection
+
+GOOD = json.dumps(
+    {
+        "orgao": "Prefeitura",
+        "prazos": [
+            {
+                "name": "Propostas",
+                "date_text": "10/09/2025",
+                "citations": [{"page": 1, "excerpt": "propostas até 10/09"}],
+            }
+        ],
+    }
+)
+TOO_MANY_PENDENCIAS = json.dumps({"pendencias": ["a", "b", "c", "d"]})
+
+
+class _ScriptedLLM(LLMClient):
+    def __init__(self, model: str, reply, fail: bool = False):
+        super().__init__(model=model, api_key="fake")
+        self.reply = reply
+        self.fail = fail
+        self.calls = 0
+
+    def complete(self, prompt: str) -> LLMResponse:
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("ollama fora do ar")
+        text = self.reply(prompt) if callable(self.reply) else self.reply
+        return LLMResponse(text=text, raw={"id": f"{self.model}-{self.calls}"})
+
+
+def _cascade(local: LLMClient, remote: LLMClient) -> CascadeLLMClient:
+    return CascadeLLMClient([("local", local), ("openai", remote)], reject=edital_rejection)
+
+
+class TestRejection:
+    def test_accepts_valid_cited_extraction(self):
+        assert edital_rejection(GOOD) is None
+        assert edital_rejection("{}") is None
+
+    def test_rejects_invalid_json_and_low_coverage(self):
+        assert edital_rejection("não sei") is not None
+        assert edital_rejection('{"prazos": "amanhã"}') is not None
+        assert "pendências" in edital_rejection(TOO_MANY_PENDENCIAS)
+
+    def test_uncited_items(self):
+        ex = EditalExtraction.model_validate(
+            {"penalidades": [{"title": "Multa", "description": "10%"}]}
+        )
+        assert coverage_problems(ex) == ["1/1 itens sem citação"]
+
+
+class TestCascadeLLMClient:
+    def test_local_answer_is_kept(self):
+        local, remote = _ScriptedLLM("mistral", GOOD), _ScriptedLLM("gpt-4o", GOOD)
+        resp = _cascade(local, remote).complete("p")
+        assert resp.raw["tier"] == "local"
+        assert resp.raw["escalated_from"] == []
+        assert remote.calls == 0
+
+    def test_escalates_on_rejection(self):
+        local = _ScriptedLLM("mistral", TOO_MANY_PENDENCIAS)
+        remote = _ScriptedLLM("gpt-4o", GOOD)
+        resp = _cascade(local, remote).complete("p")
+        assert resp.text == GOOD
+        assert resp.raw["tier"] == "openai"
+        assert resp.raw["escalated_from"] == ["local"]
+        assert resp.raw["attempts"] == [{"id": "mistral-1"}]
+
+    def test_escalates_on_error(self):
+        local = _ScriptedLLM("mistral", GOOD, fail=True)
+        remote = _ScriptedLLM("gpt-4o", GOOD)
+        resp = asyncio.run(_cascade(local, remote).acomplete("p"))
+        assert resp.raw["tier"] == "openai"
+        assert resp.raw["attempts"] == []
+        assert local.calls == remote.calls == 1
+
+    def test_model_names_both_tiers(self):
+        cascade = _cascade(_ScriptedLLM("mistral", GOOD), _ScriptedLLM("gpt-4o", GOOD))
+        assert cascade.model == "mistral>gpt-4o"
+
+
+class TestPipelineRecordsTier:
+    def test_runs_table_records_tier_and_escalations(self, tmp_path: Path):
+        local = _ScriptedLLM("mistral", lambda p: GOOD if "PAGE 1 " in p else "texto solto")
+        remote = _ScriptedLLM("gpt-4o", GOOD)
+        text = "".join(f"\n=== PAGE {i} ===\n" + chr(96 + i) * 300 + "\n" for i in range(1, 4))
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf", return_value=text
+        ):
+            result = run_edital_pipeline_detailed(
+                pdf_path="cascata.pdf",
+                llm=_cascade(local, remote),
+                prompt_template="{{TEXT}}",
+                out_dir=str(tmp_path),
+                max_chars=350,
+                llm_workers=1,
+            )
+        row = _get_conn().execute(
+            "SELECT llm_tier, llm_escalations FROM runs WHERE id = ?", (result.run_id,)
+        ).fetchone()
+        assert result.chunks == 3
+        assert row["llm_tier"] == "mixed"
+        assert row["llm_escalations"] == 2
+        assert remote.calls == 2
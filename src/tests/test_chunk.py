@@ -1,6 +1,17 @@
 """Testes para o step de chunking de texto."""
 
-from dexter_eng.pipeline.steps.step_chunk import chunk_text
+import time
+from unittest.mock import MagicMock
+
+from dexter_eng.adapters.llm.client import LLMClient
+from dexter_eng.adapters.llm.local_ollama_client import LocalOllamaClient
+from dexter_eng.pipeline.edital_pipeline import PipelineOptions, _chunk_token_budget
+from dexter_eng.pipeline.steps.step_chunk import (
+    chunk_spans,
+    chunk_step,
+    chunk_text,
+    estimate_tokens,
+)
 
 
 class TestChunkText:
@@ -35,3 +46,74 @@ class TestChunkText:
         chunks = chunk_text(text, max_chars=30)
         reconstructed = "".join(chunks)
         assert reconstructed == text
+
+
+def _pages(n: int, lines_per_page: int = 20) -> str:
+    body = "".join(f"Linha {j} do texto do edital com conteudo.\n" for j in range(lines_per_page))
+    return "\n\n".join(f"=== PAGE {i + 1} ===\n{body}" for i in range(n))
+
+
+class TestChunkSpans:
+    def test_spans_cover_text_without_overlap(self):
+        text = _pages(5)
+        spans = chunk_spans(text, max_tokens=200)
+        assert len(spans) > 1
+        assert "".join(text[s.start : s.end] for s in spans) == text
+        assert all(a.end == b.start for a, b in zip(spans, spans[1:]))
+
+    def test_respects_token_budget(self):
+        text = _pages(8)
+        for s in chunk_spans(text, max_tokens=150):
+            assert estimate_tokens(text[s.start : s.end]) <= 150 + 5
+
+    def test_prefers_page_boundaries(self):
+        # Cada página (~300 tokens) cabe sozinha; duas não cabem juntas
+        text = _pages(4)
+        spans = chunk_spans(text, max_tokens=400)
+        assert [s.page_range for s in spans] == [(1, 1), (2, 2), (3, 3), (4, 4)]
+        assert all(text[s.start : s.end].startswith("=== PAGE") for s in spans)
+
+    def test_page_range_spans_multiple_pages(self):
+        text = _pages(4, lines_per_page=2)
+        (span,) = chunk_spans(text, max_tokens=10_000)
+        assert span.page_range == (1, 4)
+
+    def test_overlap_repeats_tail_of_previous_chunk(self):
+        text = "".join(f"linha numero {i:04d} do documento\n" for i in range(200))
+        spans = chunk_spans(text, max_tokens=100, overlap_tokens=20)
+        assert all(b.start < a.end for a, b in zip(spans, spans[1:]))
+        assert spans[-1].end == len(text)
+
+    def test_long_line_is_split_to_fit(self):
+        text = "X" * 5000
+        spans = chunk_spans(text, max_tokens=100)
+        assert len(spans) > 1
+        assert "".join(text[s.start : s.end] for s in spans) == text
+
+    def test_empty_text(self):
+        assert chunk_spans("", max_tokens=100) == []
+
+    def test_large_text_runs_quickly(self):
+        text = _pages(2000)  # ~5 MB
+        t0 = time.monotonic()
+        spans = chunk_spans(text, max_tokens=2000, overlap_tokens=100)
+        assert time.monotonic() - t0 < 10
+        assert spans[-1].end == len(text)
+
+    def test_step_outputs_slices_and_spans(self):
+        text = _pages(3)
+        out = chunk_step(text, chunk_tokens=400, chunk_overlap_tokens=0)
+        assert out["chunks"] == [text[s.start : s.end] for s in out["chunk_spans"]]
+
+
+class TestChunkTokenBudget:
+    def test_derived_from_max_chars(self):
+        llm = MagicMock(spec=LLMClient)
+        llm.max_input_tokens.return_value = None
+        assert _chunk_token_budget(llm, "{{TEXT}}", 7000, PipelineOptions()) == 2000
+
+    def test_limited_by_local_model_context(self):
+        llm = LocalOllamaClient(model="x", num_ctx=4096, num_predict=1024)
+        template = "P" * 350 + "{{TEXT}}"  # ~100 tokens
+        budget = _chunk_token_budget(llm, template, 80_000, PipelineOptions())
+        assert budget == 4096 - 1024 - 100
@@ -1,15 +1,24 @@
 """Testes para o módulo de persistência SQLite."""
 
+from datetime import datetime, timedelta, timezone
+
+from dexter_eng.persistence import db
 from dexter_eng.persistence.db import (
     _get_conn,
     close_db,
+    configure_memory_cache,
     create_run,
     finish_run,
+    gc_llm_cache,
+    get_cache_stats,
     get_cached_response,
+    get_ocr_texts,
     get_or_create_document,
     init_db,
     save_cached_response,
+    save_ocr_texts,
 )
+from dexter_eng.persistence.memory_cache import ByteLRU
 
 
 class TestInitDb:
@@ -141,6 +150,15 @@ class TestLlmCache:
         assert result == texto
 
 
+class TestOcrCache:
+    def test_lookup_of_many_pages_is_batched(self):
+        hashes = [f"pagina-{i}" for i in range(1200)]
+        save_ocr_texts([(h, f"texto {h}") for h in hashes[::3]], "fake:por:300")
+        found = get_ocr_texts(hashes, "fake:por:300")
+        assert len(found) == 400
+        assert found["pagina-1197"] == "texto pagina-1197"
+
+
 class TestCloseDb:
     def test_close_and_reopen(self):
         save_cached_response("h1", "m1", "r1")
@@ -149,3 +167,85 @@ class TestCloseDb:
         init_db(":memory:")  # novo banco in-memory
         result = get_cached_response("h1", "m1")
         assert result is None  # banco novo, cache vazio
+
+
+class TestByteLRU:
+    def test_evicts_least_recently_used_over_budget(self):
+        lru = ByteLRU(max_bytes=3 * (100 + 128))
+        for key in "abc":
+            lru.put(key, "x" * 100)
+        lru.get("a")
+        lru.put("d", "x" * 100)
+        assert lru.get("b") is None
+        assert lru.get("a") is not None
+        assert len(lru) == 3
+
+    def test_oversized_entry_and_disabled_cache(self):
+        lru = ByteLRU(max_bytes=0)
+        lru.put("a", "x")
+        assert lru.get("a") is None
+        assert lru.bytes == 0
+
+
+class TestCacheTiers:
+    def test_memory_then_disk_hits_are_counted(self):
+        save_cached_response("h1", "m", "resposta")
+        assert get_cached_response("h1", "m") == "resposta"  # memória (gravada no save)
+        db._memory_cache.clear()
+        assert get_cached_response("h1", "m") == "resposta"  # disco, volta à memória
+        assert get_cached_response("h1", "m") == "resposta"
+        assert get_cached_response("h2", "m") is None
+        stats = get_cache_stats()
+        assert (stats["memory_hits"], stats["disk_hits"], stats["lookups"]) == (2, 1, 4)
+        assert stats["memory_hit_rate"] == 0.5
+
+    def test_hits_are_flushed_to_llm_cache(self):
+        save_cached_response("h1", "m", "resposta")
+        for _ in range(3):
+            get_cached_response("h1", "m")
+        db.flush_cache_counters()
+        row = _get_conn().execute(
+            "SELECT hits, last_hit_at FROM llm_cache WHERE prompt_hash = 'h1'"
+        ).fetchone()
+        assert row["hits"] == 3
+        assert row["last_hit_at"] is not None
+
+    def test_memory_tier_can_be_disabled(self):
+        configure_memory_cache(0)
+        try:
+            save_cached_response("h1", "m", "resposta")
+            assert get_cached_response("h1", "m") == "resposta"
+            assert get_cache_stats()["disk_hits"] == 1
+        finally:
+            configure_memory_cache(64 * 1024 * 1024)
+
+
+class TestCacheGc:
+    def test_max_bytes_evicts_least_frequently_used(self):
+        for key in ("quente", "morna", "fria"):
+            save_cached_response(key, "m", "x" * 100)
+        for _ in range(3):
+            get_cached_response("quente", "m")
+        get_cached_response("morna", "m")
+        result = gc_llm_cache(max_bytes=200)
+        assert result["removed_by_size"] == 1
+        assert result["remaining_bytes"] == 200
+        assert get_cached_response("fria", "m") is None
+        assert get_cached_response("quente", "m") is not None
+
+    def test_max_age_uses_last_hit(self):
+        save_cached_response("antiga", "m", "a")
+        save_cached_response("usada", "m", "b")
+        old = (datetime.now(timezone.utc) - timedelta(days=40)).isoformat()
+        _get_conn().execute("UPDATE llm_cache SET created_at = ?", (old,))
+        get_cached_response("usada", "m")
+        result = gc_llm_cache(max_age_days=30)
+        assert result["removed_by_age"] == 1
+        assert get_cached_response("antiga", "m") is None
+        assert get_cached_response("usada", "m") == "b"
+
+    def test_zero_limits_empty_the_cache(self):
+        save_cached_response("a", "m", "x")
+        assert gc_llm_cache(max_bytes=0)["remaining_entries"] == 0
+        save_cached_response("b", "m", "y")
+        assert gc_llm_cache(max_age_days=0)["removed_by_age"] == 1
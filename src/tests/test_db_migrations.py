@@ -59,11 +59,14 @@ def test_migration_adds_new_columns(tmp_path):
     assert "cache_hit" in runs_columns
     assert "llm_model" in runs_columns
     assert "request_id" in runs_columns
+    assert "result_cache_hit" in runs_columns
 
     llm_cache_columns = _table_columns(conn, "llm_cache")
     assert "prompt_chars" in llm_cache_columns
     assert "response_chars" in llm_cache_columns
     assert "response_sha256" in llm_cache_columns
+    assert "hits" in llm_cache_columns
+    assert "last_hit_at" in llm_cache_columns
 
 
 def test_migration_preserves_legacy_data(tmp_path):
@@ -0,0 +1,114 @@
+"""Testes da detecção de chunks quase duplicados (minhash, step_dedup)."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.core.retrieval.minhash import estimate_jaccard, near_duplicate_clusters, signature
+from dexter_eng.core.schemas.edital import Citation
+from dexter_eng.pipeline.edital_pipeline import PipelineOptions, run_edital_pipeline_detailed
+from dexter_eng.pipeline.steps.step_chunk import ChunkSpan
+from dexter_eng.pipeline.steps.step_dedup import dedup_step, remap_citation
+
+CLAUSULAS = (
+    "Cláusula {n}. A contratada deverá entregar o mobiliário no almoxarifado central "
+    "em até trinta dias corridos, contados do recebimento da ordem de fornecimento, "
+    "sob pena de multa diária de meio por cento sobre o valor da parcela em atraso. "
+    "O recebimento provisório será feito pelo fiscal do contrato e o definitivo após "
+    "a conferência das especificações técnicas, cores, dimensões e acabamentos."
+)
+OUTRO = (
+    "Habilitação jurídica: ato constitutivo, estatuto ou contrato social em vigor; "
+    "regularidade fiscal perante a Fazenda Federal, Estadual e Municipal; certidão "
+    "negativa de débitos trabalhistas e atestado de capacidade técnica compatível."
+)
+
+
+class TestMinHash:
+    def test_identical_texts_have_equal_signatures(self):
+        assert signature(OUTRO) == signature(OUTRO)
+        assert estimate_jaccard(signature(OUTRO), signature(CLAUSULAS)) < 0.2
+
+    def test_clusters_near_duplicates(self):
+        texts = [CLAUSULAS.format(n=1), OUTRO, CLAUSULAS.format(n=1) + " ", "curto"]
+        assert near_duplicate_clusters(texts) == [[0, 2], [1], [3]]
+
+    def test_empty_texts_stay_alone(self):
+        assert near_duplicate_clusters(["", "", OUTRO]) == [[0], [1], [2]]
+
+
+class TestRemapCitation:
+    def test_finds_excerpt_in_member(self):
+        member = "=== PAGE 7 ===\nintro\n=== PAGE 8 ===\nMulta diária de meio por cento\n"
+        citation = Citation(page=2, excerpt="multa diária de meio por cento")
+        remapped = remap_citation(citation, ChunkSpan(0, 10, (1, 2)), member, ChunkSpan(0, 0, (7, 8)))
+        assert remapped.page == 8
+        assert remapped.excerpt == citation.excerpt
+
+    def test_falls_back_to_page_offset(self):
+        citation = Citation(page=3, excerpt="trecho que não aparece")
+        remapped = remap_citation(citation, ChunkSpan(0, 10, (2, 3)), "x", ChunkSpan(0, 0, (10, 11)))
+        assert remapped.page == 11
+
+
+class TestDedupStep:
+    def test_only_representatives_are_mapped(self):
+        chunks = [CLAUSULAS.format(n=1), OUTRO, CLAUSULAS.format(n=1)]
+        out = dedup_step(chunks, [0, 1, 2], dedup_threshold=0.9)
+        assert out["map_indices"] == [0, 1]
+        assert out["clusters"] == {0: [2]}
+        assert out["dedup"] == {"groups": 1, "chunks_skipped": 1}
+
+    def test_disabled_keeps_selection(self):
+        chunks = [OUTRO, OUTRO]
+        out = dedup_step(chunks, [0, 1], dedup_threshold=0)
+        assert out["map_indices"] == [0, 1]
+        assert out["clusters"] == {}
+
+
+class _CitingLLM(LLMClient):
+    def __init__(self):
+        super().__init__(model="fake-dedup", api_key="fake")
+        self.prompts: list[str] = []
+
+    def complete(self, prompt: str) -> LLMResponse:
+        self.prompts.append(prompt)
+        page = int(prompt.split("=== PAGE ")[1].split(" ")[0])
+        payload = {"penalidades": []}
+        if "multa" in prompt:
+            payload["penalidades"] = [
+                {
+                    "title": "Multa por atraso",
+                    "description": "meio por cento ao dia",
+                    "citations": [{"page": page, "excerpt": "multa diária de meio por cento"}],
+                }
+            ]
+        return LLMResponse(text=json.dumps(payload))
+
+
+class TestPipelineDedup:
+    def test_duplicates_are_sent_once_and_cited_everywhere(self, tmp_path: Path):
+        llm = _CitingLLM()
+        bodies = [OUTRO, CLAUSULAS.format(n=5), OUTRO.upper(), CLAUSULAS.format(n=5)]
+        text = "\n\n".join(f"=== PAGE {i + 1} ===\n{b}" for i, b in enumerate(bodies))
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf", return_value=text
+        ):
+            result = run_edital_pipeline_detailed(
+                pdf_path="anexos.pdf",
+                llm=llm,
+                prompt_template="{{TEXT}}",
+                out_dir=str(tmp_path),
+                max_chars=8000,
+                llm_workers=1,
+                options=PipelineOptions(chunk_tokens=130),
+            )
+        assert result.chunks == 4
+        assert len(llm.prompts) == 2
+        run_dir = next((tmp_path / "runs").iterdir())
+        validated = json.loads((run_dir / "validated.json").read_text(encoding="utf-8"))
+        pages = {c["page"] for p in validated["penalidades"] for c in p["citations"]}
+        assert pages == {2, 4}
+        meta = json.loads((run_dir / "meta.json").read_text(encoding="utf-8"))
+        assert meta["dedup"] == {"groups": 2, "chunks_skipped": 2}
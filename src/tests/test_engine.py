@@ -0,0 +1,142 @@
+"""Testes do motor de etapas com cache de artefatos (pipeline/base.py)."""
+
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from dexter_eng.pipeline.base import PipelineEngine, Step, content_hash
+from dexter_eng.persistence.db import get_run_steps
+
+
+def _counting_steps(calls: dict[str, int]) -> list[Step]:
+    def upper(text: str) -> dict:
+        calls["upper"] += 1
+        return {"upper": text.upper()}
+
+    def suffix(upper: str, suffix: str) -> dict:
+        calls["suffix"] += 1
+        return {"result": upper + suffix}
+
+    return [
+        Step(name="upper", inputs=("text",), outputs=("upper",), fn=upper),
+        Step(name="suffix", inputs=("upper", "suffix"), outputs=("result",), fn=suffix),
+    ]
+
+
+class TestContentHash:
+    def test_stable_for_equal_content(self):
+        assert content_hash({"a": [1, "x"], "b": None}) == content_hash({"b": None, "a": [1, "x"]})
+
+    def test_differs_for_different_content(self):
+        assert content_hash(["a", "b"]) != content_hash(["ab"])
+
+
+class TestPipelineEngine:
+    def test_runs_steps_in_order(self):
+        calls = {"upper": 0, "suffix": 0}
+        run = PipelineEngine(_counting_steps(calls)).run({"text": "abc", "suffix": "!"})
+        assert run.values["result"] == "ABC!"
+        assert [t.name for t in run.timings] == ["upper", "suffix"]
+        assert all(t.elapsed_seconds >= 0 for t in run.timings)
+
+    def test_rerun_with_same_inputs_hits_cache(self):
+        calls = {"upper": 0, "suffix": 0}
+        steps = _counting_steps(calls)
+        PipelineEngine(steps).run({"text": "abc", "suffix": "!"})
+        run = PipelineEngine(steps).run({"text": "abc", "suffix": "!"})
+        assert calls == {"upper": 1, "suffix": 1}
+        assert [t.cache_hit for t in run.timings] == [True, True]
+        assert run.values["result"] == "ABC!"
+
+    def test_only_steps_with_changed_inputs_rerun(self):
+        calls = {"upper": 0, "suffix": 0}
+        steps = _counting_steps(calls)
+        PipelineEngine(steps).run({"text": "abc", "suffix": "!"})
+        run = PipelineEngine(steps).run({"text": "abc", "suffix": "?"})
+        assert calls == {"upper": 1, "suffix": 2}
+        assert run.values["result"] == "ABC?"
+
+    def test_use_cache_false_recomputes(self):
+        calls = {"upper": 0, "suffix": 0}
+        steps = _counting_steps(calls)
+        PipelineEngine(steps).run({"text": "abc", "suffix": "!"})
+        PipelineEngine(steps, use_cache=False).run({"text": "abc", "suffix": "!"})
+        assert calls == {"upper": 2, "suffix": 2}
+
+    def test_version_bump_invalidates_cache(self):
+        calls = {"upper": 0, "suffix": 0}
+        steps = _counting_steps(calls)
+        PipelineEngine(steps).run({"text": "abc", "suffix": "!"})
+        steps[0].version = "2"
+        PipelineEngine(steps).run({"text": "abc", "suffix": "!"})
+        assert calls["upper"] == 2
+        # Mesma saída de "upper" => "suffix" continua em cache (hash de conteúdo)
+        assert calls["suffix"] == 1
+
+    def test_uses_are_not_part_of_cache_key(self):
+        calls = []
+
+        def fn(x: int, resource: object) -> dict:
+            calls.append(resource)
+            return {"y": x * 2}
+
+        steps = [Step(name="double", inputs=("x",), uses=("resource",), outputs=("y",), fn=fn)]
+        PipelineEngine(steps).run({"x": 2, "resource": object()})
+        PipelineEngine(steps).run({"x": 2, "resource": object()})
+        assert len(calls) == 1
+
+    def test_missing_input_raises(self):
+        with pytest.raises(KeyError, match="ausentes"):
+            PipelineEngine(_counting_steps({"upper": 0, "suffix": 0})).run({"text": "abc"})
+
+    def test_missing_output_raises(self):
+        steps = [Step(name="bad", inputs=(), outputs=("y",), fn=lambda: {}, cacheable=False)]
+        with pytest.raises(RuntimeError, match="não produziu"):
+            PipelineEngine(steps).run({})
+
+    def test_arun_prefers_async_variant(self):
+        async def afn(x: int) -> dict:
+            return {"y": "async"}
+
+        steps = [
+            Step(name="s", inputs=("x",), outputs=("y",), fn=lambda x: {"y": "sync"}, afn=afn, cacheable=False)
+        ]
+        run = asyncio.run(PipelineEngine(steps).arun({"x": 1}))
+        assert run.values["y"] == "async"
+
+
+class TestPipelineSteps:
+    def test_run_records_step_timings(self, tmp_path: Path):
+        import json
+
+        from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+        from dexter_eng.pipeline.edital_pipeline import run_edital_pipeline_detailed
+
+        class FakeLLM(LLMClient):
+            def __init__(self):
+                super().__init__(model="fake-steps", api_key="fake")
+
+            def complete(self, prompt: str) -> LLMResponse:
+                return LLMResponse(text=json.dumps({"orgao": "X"}))
+
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
+            return_value="=== PAGE 1 ===\ntexto\n",
+        ):
+            result = run_edital_pipeline_detailed(
+                pdf_path="steps.pdf",
+                llm=FakeLLM(),
+                prompt_template="{{TEXT}}",
+                out_dir=str(tmp_path),
+                max_chars=8000,
+            )
+
+        steps = [row["step"] for row in get_run_steps(result.run_id)]
+        assert steps == [
+            "extract", "boilerplate", "chunk", "select", "dedup", "llm_map", "reduce", "validate", "render"
+        ]
+        meta_files = list((tmp_path / "runs").glob("*/meta.json"))
+        meta = json.loads(meta_files[0].read_text(encoding="utf-8"))
+        assert [s["step"] for s in meta["steps"]] == steps
@@ -0,0 +1,95 @@
+"""Testes da extração de tabelas (adapters/pdf/extract_tables.py)."""
+
+from pathlib import Path
+
+import fitz
+
+from dexter_eng.adapters.pdf.extract_tables import extract_page_with_tables, render_table
+from dexter_eng.adapters.pdf.extract_text import ExtractStats, extract_pages_from_pdf
+from dexter_eng.pipeline.steps.step_extract import DbPageCache
+
+ROWS = [["Etapa", "Data"], ["Abertura", "10/01/2025"], ["Entrega", "20/01/2025"]]
+
+
+def _draw_table(page: fitz.Page, top: float = 100) -> None:
+    y = top
+    for left, right in ROWS:
+        page.insert_text((72, y), left)
+        page.insert_text((250, y), right)
+        y += 20
+    bottom = top - 15 + 20 * len(ROWS)
+    for yy in range(int(top - 15), int(bottom) + 1, 20):
+        page.draw_line((70, yy), (400, yy))
+    for xx in (70, 240, 400):
+        page.draw_line((xx, top - 15), (xx, bottom))
+
+
+def _make_pdf(path: Path, pages_with_table: int = 1, plain_pages: int = 1) -> Path:
+    doc = fitz.open()
+    for _ in range(pages_with_table):
+        page = doc.new_page()
+        page.insert_text((72, 60), "Cronograma do certame")
+        _draw_table(page)
+        page.insert_text((72, 220), "Texto depois da tabela")
+    for i in range(plain_pages):
+        doc.new_page().insert_text((72, 72), f"Pagina simples {i + 1}")
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+class TestRenderTable:
+    def test_rows_become_pipe_lines(self):
+        assert render_table([["a", "b"], ["c", None]]) == "a | b\nc | "
+
+    def test_cells_are_normalized_and_empty_rows_dropped(self):
+        assert render_table([["linha\nquebrada", "x|y"], [None, ""]]) == "linha quebrada | x/y"
+
+
+class TestExtractPageWithTables:
+    def test_table_is_compacted_in_reading_order(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "tabela.pdf")
+        with fitz.open(str(pdf)) as doc:
+            text, saved = extract_page_with_tables(doc.load_page(0))
+        assert "Abertura | 10/01/2025" in text
+        assert text.index("Cronograma") < text.index("Etapa | Data") < text.index("Texto depois")
+        assert isinstance(saved, int)
+
+    def test_page_without_tables_matches_plain_text(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "tabela.pdf")
+        with fitz.open(str(pdf)) as doc:
+            page = doc.load_page(1)
+            assert extract_page_with_tables(page) == (page.get_text("text"), 0)
+
+
+class TestExtractWithTables:
+    def test_stats_survive_page_cache(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "tabela.pdf")
+        first = ExtractStats()
+        pages = extract_pages_from_pdf(
+            str(pdf), workers=1, tables=True, page_cache=DbPageCache("sha"), stats=first
+        )
+        assert "Etapa | Data" in pages[0]
+
+        second = ExtractStats()
+        extract_pages_from_pdf(
+            str(pdf), workers=1, tables=True, page_cache=DbPageCache("sha"), stats=second
+        )
+        assert second.pages_cached == 2
+        assert second.table_chars_saved == first.table_chars_saved
+
+    def test_tables_flag_uses_its_own_cache_entries(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "tabela.pdf")
+        extract_pages_from_pdf(str(pdf), workers=1, page_cache=DbPageCache("sha"))
+        stats = ExtractStats()
+        pages = extract_pages_from_pdf(
+            str(pdf), workers=1, tables=True, page_cache=DbPageCache("sha"), stats=stats
+        )
+        assert stats.pages_cached == 0
+        assert "Etapa | Data" in pages[0]
+
+    def test_parallel_matches_serial(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "grande.pdf", pages_with_table=3, plain_pages=3)
+        serial = extract_pages_from_pdf(str(pdf), workers=1, tables=True)
+        parallel = extract_pages_from_pdf(str(pdf), workers=2, parallel_min_pages=1, tables=True)
+        assert parallel == serial
@@ -0,0 +1,137 @@
+"""Testes da extração de texto de PDF (serial e paralela)."""
+
+import hashlib
+from pathlib import Path
+
+import fitz
+import pytest
+
+from dexter_eng.adapters.pdf import extract_text
+from dexter_eng.adapters.pdf.extract_text import (
+    TEXT_EXTRACTOR,
+    _split_ranges,
+    extract_pages_from_pdf,
+    extract_text_from_pdf,
+)
+from dexter_eng.adapters.pdf.source import load_pdf_source
+from dexter_eng.persistence.db import get_cached_pages, save_cached_pages
+from dexter_eng.pipeline.steps.step_extract import DbPageCache
+
+
+def _make_pdf(path: Path, pages: int) -> Path:
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Conteudo da pagina {i + 1}")
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+class TestSplitRanges:
+    def test_covers_all_pages_contiguously(self):
+        ranges = _split_ranges(10, 3)
+        assert ranges == [(0, 4), (4, 7), (7, 10)]
+
+    def test_more_parts_than_pages(self):
+        assert _split_ranges(2, 8) == [(0, 1), (1, 2)]
+
+
+class TestExtractText:
+    def test_missing_file_raises(self, tmp_path: Path):
+        with pytest.raises(FileNotFoundError):
+            extract_text_from_pdf(str(tmp_path / "nao_existe.pdf"))
+
+    def test_page_markers_in_order(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "doc.pdf", 3)
+        text = extract_text_from_pdf(str(pdf), workers=1)
+        assert text.startswith("=== PAGE 1 ===")
+        assert text.index("=== PAGE 2 ===") < text.index("pagina 2") < text.index("=== PAGE 3 ===")
+
+    def test_parallel_matches_serial(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "grande.pdf", 12)
+        serial = extract_text_from_pdf(str(pdf), workers=1)
+        parallel = extract_text_from_pdf(str(pdf), workers=2, parallel_min_pages=1)
+        assert parallel == serial
+        assert "pagina 12" in parallel
+
+    def test_small_document_stays_serial(self, tmp_path: Path, monkeypatch):
+        pdf = _make_pdf(tmp_path / "pequeno.pdf", 3)
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("pool não deveria ser criado")
+
+        monkeypatch.setattr(extract_text, "ProcessPoolExecutor", _fail)
+        pages = extract_pages_from_pdf(str(pdf), workers=8, parallel_min_pages=64)
+        assert len(pages) == 3
+
+
+class TestPageTextCache:
+    def test_second_extraction_is_a_lookup(self, tmp_path: Path, monkeypatch):
+        pdf = _make_pdf(tmp_path / "doc.pdf", 3)
+        cache = DbPageCache("sha-doc")
+        first = extract_text_from_pdf(str(pdf), workers=1, page_cache=cache)
+        assert len(get_cached_pages("sha-doc", {i: TEXT_EXTRACTOR for i in range(3)})) == 3
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("nenhuma página deveria ser extraída")
+
+        monkeypatch.setattr(extract_text, "_extract_page_list", _fail)
+        monkeypatch.setattr(fitz.Page, "get_text", _fail)
+        assert extract_text_from_pdf(str(pdf), workers=1, page_cache=cache) == first
+
+    def test_partial_cache_extracts_only_missing_pages(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "doc.pdf", 3)
+        save_cached_pages("sha-doc", [(1, TEXT_EXTRACTOR, "TEXTO EM CACHE", 0)])
+        pages = extract_pages_from_pdf(str(pdf), workers=1, page_cache=DbPageCache("sha-doc"))
+        assert pages[1] == "TEXTO EM CACHE"
+        assert "pagina 1" in pages[0] and "pagina 3" in pages[2]
+
+    def test_other_extractor_version_is_ignored(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "doc.pdf", 2)
+        save_cached_pages("sha-doc", [(0, "text-0", "VERSAO ANTIGA", 0)])
+        pages = extract_pages_from_pdf(str(pdf), workers=1, page_cache=DbPageCache("sha-doc"))
+        assert "pagina 1" in pages[0]
+
+    def test_parallel_fills_cache(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "grande.pdf", 8)
+        save_cached_pages("sha-doc", [(0, TEXT_EXTRACTOR, "P1", 0), (5, TEXT_EXTRACTOR, "P6", 0)])
+        pages = extract_pages_from_pdf(
+            str(pdf), workers=2, parallel_min_pages=1, page_cache=DbPageCache("sha-doc")
+        )
+        assert pages[0] == "P1" and pages[5] == "P6"
+        assert "pagina 8" in pages[7]
+        assert len(get_cached_pages("sha-doc", {i: TEXT_EXTRACTOR for i in range(8)})) == 8
+
+
+class TestPdfSource:
+    def test_small_file_is_read_once_into_memory(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "doc.pdf", 2)
+        source = load_pdf_source(str(pdf))
+        assert source.data == pdf.read_bytes()
+        assert source.sha256 == hashlib.sha256(pdf.read_bytes()).hexdigest()
+
+    def test_large_file_uses_streaming_hash(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "doc.pdf", 2)
+        source = load_pdf_source(str(pdf), in_memory_max_bytes=10)
+        assert source.data is None
+        assert source.sha256 == hashlib.sha256(pdf.read_bytes()).hexdigest()
+
+    def test_missing_file_hashes_path(self, tmp_path: Path):
+        path = str(tmp_path / "nao_existe.pdf")
+        assert load_pdf_source(path).sha256 == hashlib.sha256(path.encode()).hexdigest()
+
+    def test_extraction_from_buffer_does_not_reopen_path(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "doc.pdf", 3)
+        expected = extract_text_from_pdf(str(pdf), workers=1)
+        source = load_pdf_source(str(pdf))
+        pdf.unlink()
+        assert extract_text_from_pdf(str(pdf), workers=1, source=source) == expected
+
+    def test_parallel_workers_receive_buffer(self, tmp_path: Path):
+        pdf = _make_pdf(tmp_path / "grande.pdf", 8)
+        expected = extract_text_from_pdf(str(pdf), workers=1)
+        source = load_pdf_source(str(pdf))
+        pdf.unlink()
+        text = extract_text_from_pdf(str(pdf), workers=2, parallel_min_pages=1, source=source)
+        assert text == expected
@@ -8,6 +8,7 @@ from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
 from dexter_eng.pipeline.steps.step_llm_structured import (
     _extract_json,
     extract_edital_structured,
+    map_edital_chunks,
 )
 
 
@@ -123,3 +124,61 @@ class TestExtractEditalStructured:
         llm = MockLLMClient(json.dumps(bad))
         with pytest.raises(Exception):
             extract_edital_structured(llm, PROMPT_TEMPLATE, "texto")
+
+
+# --- Tests: map_edital_chunks ---
+
+class TestMapEditalChunks:
+    def test_preserves_chunk_order(self):
+        class EchoLLM(LLMClient):
+            def __init__(self):
+                super().__init__(model="mock-echo", api_key="fake")
+
+            def complete(self, prompt: str) -> LLMResponse:
+                return LLMResponse(text=json.dumps({"objeto": prompt.split("\n", 1)[1]}))
+
+        chunks = [f"chunk {i}" for i in range(10)]
+        outcomes = map_edital_chunks(EchoLLM(), PROMPT_TEMPLATE, chunks, max_workers=4)
+        assert [o.index for o in outcomes] == list(range(10))
+        assert [o.result.extraction.objeto for o in outcomes] == chunks
+
+    def test_runs_chunks_concurrently_up_to_limit(self):
+        import threading
+        import time
+
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        class SlowLLM(LLMClient):
+            def __init__(self):
+                super().__init__(model="mock-slow", api_key="fake")
+
+            def complete(self, prompt: str) -> LLMResponse:
+                with lock:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                time.sleep(0.05)
+                with lock:
+                    state["active"] -= 1
+                return LLMResponse(text=json.dumps(VALID_PAYLOAD))
+
+        map_edital_chunks(SlowLLM(), PROMPT_TEMPLATE, [f"c{i}" for i in range(8)], max_workers=3)
+        assert state["peak"] == 3
+
+    def test_failure_does_not_abort_other_chunks(self):
+        class FlakyLLM(LLMClient):
+            def __init__(self):
+                super().__init__(model="mock-flaky", api_key="fake")
+
+            def complete(self, prompt: str) -> LLMResponse:
+                if "ruim" in prompt:
+                    return LLMResponse(text="sem json")
+                return LLMResponse(text=json.dumps(VALID_PAYLOAD))
+
+        outcomes = map_edital_chunks(FlakyLLM(), PROMPT_TEMPLATE, ["bom", "ruim", "bom 2"])
+        assert outcomes[0].result is not None
+        assert isinstance(outcomes[1].error, ValueError)
+        assert outcomes[2].result is not None
+
+    def test_empty_chunks(self):
+        assert map_edital_chunks(MockLLMClient("{}"), PROMPT_TEMPLATE, []) == []
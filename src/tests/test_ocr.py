@@ -0,0 +1,112 @@
+"""Testes da triagem de páginas escaneadas e do OCR com cache por página."""
+
+from pathlib import Path
+
+import fitz
+import pytest
+
+from dexter_eng.adapters.pdf import ocr
+from dexter_eng.adapters.pdf.extract_text import extract_text_from_pdf
+from dexter_eng.adapters.pdf.ocr import ocr_pages, page_hash, page_signals, resolve_backend
+from dexter_eng.adapters.pdf.source import load_pdf_source
+from dexter_eng.pipeline.steps.step_extract import DbOcrCache
+
+
+def _make_mixed_pdf(path: Path) -> Path:
+    """Página 1 com texto; página 2 só com uma imagem cobrindo a página."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Texto nativo da primeira pagina " * 4)
+    scanned = doc.new_page()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+    pix.set_rect(pix.irect, (200, 200, 200))
+    scanned.insert_image(scanned.rect, pixmap=pix)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    calls: list[int] = []
+
+    def _fake(page, language, dpi):
+        calls.append(page.number)
+        return f"TEXTO OCR pagina {page.number + 1} ({language})"
+
+    monkeypatch.setitem(ocr.BACKENDS, "fake", (_fake, lambda: True))
+    return calls
+
+
+class TestTriage:
+    def test_scanned_page_is_flagged(self, tmp_path: Path):
+        pdf = _make_mixed_pdf(tmp_path / "misto.pdf")
+        with fitz.open(str(pdf)) as doc:
+            pages = [doc.load_page(i).get_text() for i in range(doc.page_count)]
+            signals = page_signals(doc, pages)
+        assert [s.needs_ocr() for s in signals] == [False, True]
+        assert signals[1].image_coverage == pytest.approx(1.0)
+
+    def test_page_hash_is_stable_across_copies(self, tmp_path: Path):
+        a = _make_mixed_pdf(tmp_path / "a.pdf")
+        b = _make_mixed_pdf(tmp_path / "b.pdf")
+        with fitz.open(str(a)) as da, fitz.open(str(b)) as db_:
+            assert page_hash(da, 1) == page_hash(db_, 1)
+            assert page_hash(da, 0) != page_hash(da, 1)
+
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError):
+            resolve_backend("inexistente")
+
+
+class TestOcrPages:
+    def test_only_scanned_pages_are_ocred(self, tmp_path: Path, fake_backend):
+        pdf = _make_mixed_pdf(tmp_path / "misto.pdf")
+        source = load_pdf_source(str(pdf))
+        pages, indices = ocr_pages(source, ["texto nativo " * 10, ""], backend="fake")
+        assert indices == [1]
+        assert fake_backend == [1]
+        assert pages[1] == "TEXTO OCR pagina 2 (por)"
+
+    def test_cached_pages_are_not_ocred_again(self, tmp_path: Path, fake_backend):
+        source = load_pdf_source(str(_make_mixed_pdf(tmp_path / "misto.pdf")))
+        other = load_pdf_source(str(_make_mixed_pdf(tmp_path / "copia.pdf")))
+        cache = DbOcrCache()
+        ocr_pages(source, ["texto nativo " * 10, ""], backend="fake", cache=cache)
+        pages, _ = ocr_pages(other, ["texto nativo " * 10, ""], backend="fake", cache=cache)
+        assert fake_backend == [1]
+        assert pages[1].startswith("TEXTO OCR")
+
+    def test_few_pages_skip_the_process_pool(self, tmp_path: Path, fake_backend, monkeypatch):
+        def no_pool(*args, **kwargs):
+            raise AssertionError("pool de processos para poucas páginas")
+
+        monkeypatch.setattr(ocr, "ProcessPoolExecutor", no_pool)
+        source = load_pdf_source(str(_make_mixed_pdf(tmp_path / "misto.pdf")))
+        pages, indices = ocr_pages(source, ["texto nativo " * 10, ""], backend="fake", workers=4)
+        assert indices == [1]
+        assert pages[1].startswith("TEXTO OCR")
+
+    def test_without_backend_pages_are_unchanged(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr(ocr, "BACKENDS", {"nenhum": (None, lambda: False)})
+        source = load_pdf_source(str(_make_mixed_pdf(tmp_path / "misto.pdf")))
+        pages, indices = ocr_pages(source, ["texto nativo " * 10, ""])
+        assert indices == []
+        assert pages[1] == ""
+
+
+class TestExtractWithOcr:
+    def test_auto_mode_fills_scanned_page(self, tmp_path: Path, fake_backend):
+        pdf = _make_mixed_pdf(tmp_path / "misto.pdf")
+        text = extract_text_from_pdf(str(pdf), workers=1, ocr="auto", ocr_backend="fake")
+        assert "=== PAGE 2 ===\nTEXTO OCR pagina 2" in text
+
+    def test_off_mode_skips_ocr(self, tmp_path: Path, fake_backend):
+        pdf = _make_mixed_pdf(tmp_path / "misto.pdf")
+        extract_text_from_pdf(str(pdf), workers=1, ocr="off", ocr_backend="fake")
+        assert fake_backend == []
+
+    def test_invalid_mode_raises(self, tmp_path: Path):
+        pdf = _make_mixed_pdf(tmp_path / "misto.pdf")
+        with pytest.raises(ValueError):
+            extract_text_from_pdf(str(pdf), ocr="sempre")
@@ -0,0 +1,227 @@
+"""Testes do cliente Ollama (pool de conexões, streaming, parada no fim do JSON)."""
+
+import asyncio
+import json
+import threading
+
+import httpx
+
+from dexter_eng.adapters.llm import local_ollama_client
+from dexter_eng.adapters.llm.json_stream import JsonStreamTracker
+from dexter_eng.adapters.llm.local_ollama_client import LocalOllamaClient
+
+LINES = [{"response": '{"orgao": "X"}'}, {"done": True, "eval_count": 3}]
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/api/tags":
+        return httpx.Response(200, json={"models": []})
+    body = "\n".join(json.dumps(line) for line in LINES)
+    return httpx.Response(200, content=body.encode())
+
+
+def _patch_clients(monkeypatch) -> list[object]:
+    """Troca os clientes httpx por versões com transporte falso; registra as criações."""
+    created: list[object] = []
+    real_client, real_async_client = httpx.Client, httpx.AsyncClient
+
+    def client(**kw):
+        created.append(kw)
+        return real_client(transport=httpx.MockTransport(_handler), **kw)
+
+    def async_client(**kw):
+        created.append(kw)
+        return real_async_client(transport=httpx.MockTransport(_handler), **kw)
+
+    monkeypatch.setattr(local_ollama_client.httpx, "Client", client)
+    monkeypatch.setattr(local_ollama_client.httpx, "AsyncClient", async_client)
+    return created
+
+
+class TestConnectionPool:
+    def test_client_is_reused_across_calls(self, monkeypatch):
+        created = _patch_clients(monkeypatch)
+        llm = LocalOllamaClient(model="m", max_connections=4)
+        assert llm.complete("a").text == '{"orgao": "X"}'
+        llm.complete("b")
+        assert llm.ping()
+        assert len(created) == 1
+        assert created[0]["limits"].max_connections == 4
+
+    def test_close_releases_pool(self, monkeypatch):
+        created = _patch_clients(monkeypatch)
+        with LocalOllamaClient(model="m") as llm:
+            llm.complete("a")
+            client = llm._client
+        assert llm._client is None
+        assert client.is_closed
+        llm.complete("b")
+        assert len(created) == 2
+
+    def test_async_client_is_reused_within_loop(self, monkeypatch):
+        created = _patch_clients(monkeypatch)
+        llm = LocalOllamaClient(model="m")
+
+        async def run() -> list[str]:
+            async with llm:
+                results = await asyncio.gather(*(llm.acomplete(str(i)) for i in range(5)))
+            return [r.text for r in results]
+
+        assert asyncio.run(run()) == ['{"orgao": "X"}'] * 5
+        assert len(created) == 1
+        assert llm._aclient is None
+
+    def test_new_event_loop_gets_new_async_client(self, monkeypatch):
+        created = _patch_clients(monkeypatch)
+        llm = LocalOllamaClient(model="m")
+        asyncio.run(llm.acomplete("a"))
+        first = llm._aclient
+        asyncio.run(llm.acomplete("b"))
+        assert len(created) == 2
+        assert first is not llm._aclient
+        # asyncio.run cancela a guarda de cada loop, que fecha o pool dele
+        assert first.is_closed and llm._aclient.is_closed
+
+    def test_switching_loops_closes_pool_of_loop_still_running(self, monkeypatch):
+        _patch_clients(monkeypatch)
+        llm = LocalOllamaClient(model="m")
+        other = asyncio.new_event_loop()
+        thread = threading.Thread(target=other.run_forever, daemon=True)
+        thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(llm.acomplete("a"), other).result(5)
+            first = llm._aclient
+            asyncio.run(llm.acomplete("b"))
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), other).result(5)
+            assert first.is_closed
+        finally:
+            other.call_soon_threadsafe(other.stop)
+            thread.join(5)
+            other.close()
+
+    def test_aclose_closes_async_client_on_its_loop(self, monkeypatch):
+        _patch_clients(monkeypatch)
+        llm = LocalOllamaClient(model="m")
+
+        async def run():
+            await llm.acomplete("a")
+            client = llm._aclient
+            await llm.aclose()
+            return client
+
+        assert asyncio.run(run()).is_closed
+
+
+class TestJsonStreamTracker:
+    def test_completes_on_balanced_object(self):
+        tracker = JsonStreamTracker()
+        assert not tracker.feed('Aqui está: {"a": [1, {"b": "}"}')
+        assert tracker.feed('], "c": "\\"{"}\nObservação: ')
+        text = 'Aqui está: {"a": [1, {"b": "}"}], "c": "\\"{"}'
+        assert tracker.end == len(text)
+        assert json.loads(text[text.index("{") : tracker.end])["c"] == '"{'
+
+    def test_skips_invalid_braces(self):
+        tracker = JsonStreamTracker()
+        assert not tracker.feed("use {chaves} assim: ")
+        assert tracker.feed('{"ok": true}')
+
+    def test_bracketed_prefix_does_not_stop_stream(self):
+        tracker = JsonStreamTracker()
+        assert not tracker.feed("conforme item [1]: ")
+        assert tracker.feed('{"orgao": "X", "pendencias": ["a"]}')
+        text = 'conforme item [1]: {"orgao": "X", "pendencias": ["a"]}'
+        assert text[text.index("{") : tracker.end] == '{"orgao": "X", "pendencias": ["a"]}'
+
+
+class TestStopOnJson:
+    def test_stream_is_closed_after_object(self, monkeypatch):
+        sent: list[int] = []
+
+        def stream():
+            for piece in ['{"orgao": ', '"X"}', " Espero ter", " ajudado!", " " * 100]:
+                sent.append(1)
+                yield (json.dumps({"response": piece}) + "\n").encode()
+            sent.append(1)
+            yield (json.dumps({"done": True}) + "\n").encode()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=stream())
+
+        real_client = httpx.Client
+        monkeypatch.setattr(
+            local_ollama_client.httpx,
+            "Client",
+            lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+        )
+        resp = LocalOllamaClient(model="m").complete("p")
+        assert resp.text == '{"orgao": "X"}'
+        assert resp.raw["stopped_early"] is True
+        assert len(sent) < 6
+        assert resp.raw["tokens_streamed"] == 2
+        assert resp.raw["ttft_s"] is not None
+
+    def test_disabled_waits_for_done(self, monkeypatch):
+        _patch_clients(monkeypatch)
+        resp = LocalOllamaClient(model="m", stop_on_json=False).complete("p")
+        assert resp.raw["stopped_early"] is False
+        assert resp.raw["ollama_last_chunk"]["eval_count"] == 3
+
+
+def _recording_client(monkeypatch, handler) -> None:
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        local_ollama_client.httpx,
+        "Client",
+        lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+    )
+
+
+class TestWarmUpAndKeepAlive:
+    def test_keep_alive_goes_in_every_request(self, monkeypatch):
+        bodies: list[dict] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            bodies.append(json.loads(request.content))
+            return _handler(request)
+
+        _recording_client(monkeypatch, handler)
+        LocalOllamaClient(model="m", keep_alive="10m").complete("p")
+        LocalOllamaClient(model="m").complete("p")
+        assert bodies[0]["keep_alive"] == "10m"
+        assert "keep_alive" not in bodies[1]
+
+    def test_warm_up_reports_load_time(self, monkeypatch):
+        bodies: list[dict] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"done": True, "load_duration": 1_500_000_000})
+
+        _recording_client(monkeypatch, handler)
+        llm = LocalOllamaClient(model="m", warm_up=True)
+        assert llm.warmup_load_s == 1.5
+        assert bodies == [{"model": "m", "prompt": "", "stream": False}]
+
+    def test_pin_and_unpin(self, monkeypatch):
+        keep_alives: list[object] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            keep_alives.append(json.loads(request.content).get("keep_alive"))
+            return httpx.Response(200, json={"done": True})
+
+        _recording_client(monkeypatch, handler)
+        llm = LocalOllamaClient(model="m", keep_alive="2m")
+        llm.pin()
+        assert llm.keep_alive == -1
+        llm.unpin()
+        assert llm.keep_alive == "2m"
+        assert keep_alives == [-1, "2m"]
+
+    def test_warm_up_failure_does_not_raise(self, monkeypatch):
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("recusado", request=request)
+
+        _recording_client(monkeypatch, handler)
+        llm = LocalOllamaClient(model="m", warm_up=True)
+        assert llm.warmup_load_s is None
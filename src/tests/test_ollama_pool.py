@@ -0,0 +1,170 @@
+"""Testes do balanceamento entre vários Ollama, contra servidores HTTP locais."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from dexter_eng.adapters.llm.ollama_pool import OllamaPoolClient
+
+
+class _StubOllama:
+    """Servidor HTTP mínimo com ``/api/tags`` e ``/api/generate`` (NDJSON)."""
+
+    def __init__(self, eval_count: int = 10, eval_duration_ns: int = 1_000_000_000):
+        self.requests = 0
+        self.fail = False
+        self.status = 200
+        self.delay_s = 0.0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._reply(503 if stub.fail else 200, b'{"models": []}')
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests += 1
+                if stub.fail:
+                    self._reply(500, b"erro")
+                    return
+                if stub.status != 200:
+                    self._reply(stub.status, b'{"error": "prompt invalido"}')
+                    return
+                time.sleep(stub.delay_s)
+                if not body.get("stream"):
+                    self._reply(200, b'{"done": true, "load_duration": 300000000}')
+                    return
+                lines = [
+                    {"response": "{}"},
+                    {"done": True, "eval_count": eval_count, "eval_duration": eval_duration_ns},
+                ]
+                self._reply(200, "\n".join(map(json.dumps, lines)).encode())
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    servers = [_StubOllama(), _StubOllama()]
+    yield servers
+    for server in servers:
+        server.close()
+
+
+def _pool(urls: list[str], **options) -> OllamaPoolClient:
+    return OllamaPoolClient(urls, model="m", health_interval_s=0, stop_on_json=False, **options)
+
+
+class TestRouting:
+    def test_requests_are_spread_across_hosts(self, stubs):
+        with _pool([s.url for s in stubs]) as llm:
+            hosts = [llm.complete("p").raw["host"] for _ in range(4)]
+        assert sorted(hosts) == sorted([stubs[0].url, stubs[1].url] * 2)
+
+    def test_faster_host_gets_more_requests(self):
+        fast, slow = _StubOllama(eval_count=100), _StubOllama(eval_count=10)
+        try:
+            with _pool([fast.url, slow.url]) as llm:
+                llm.complete("a")
+                llm.complete("b")
+                # Com vazões medidas, o host 10x mais rápido aceita mais em voo
+                for host in llm.hosts:
+                    host.in_flight = 3 if host.url == fast.url else 0
+                assert llm._acquire(set()).url == fast.url
+        finally:
+            fast.close()
+            slow.close()
+
+    def test_async_requests_use_the_pool(self, stubs):
+        async def run():
+            async with _pool([s.url for s in stubs]) as llm:
+                return await asyncio.gather(*(llm.acomplete_json("p", {}) for _ in range(4)))
+
+        responses = asyncio.run(run())
+        assert {r.raw["host"] for r in responses} == {stubs[0].url, stubs[1].url}
+
+
+class TestFailover:
+    def test_failing_host_is_retried_elsewhere_and_removed(self, stubs):
+        stubs[0].fail = True
+        with _pool([s.url for s in stubs]) as llm:
+            hosts = [llm.complete("p").raw["host"] for _ in range(3)]
+            assert hosts == [stubs[1].url] * 3
+            assert not llm.hosts[0].healthy
+        assert stubs[0].requests == 1
+
+    def test_prompt_errors_do_not_evict_hosts(self, stubs):
+        for stub in stubs:
+            stub.status = 400
+        with _pool([s.url for s in stubs]) as llm:
+            with pytest.raises(httpx.HTTPStatusError):
+                llm.complete("p")
+            assert all(h.healthy for h in llm.hosts)
+            assert all(h.in_flight == 0 for h in llm.hosts)
+        # Erro do prompt não é refeito nos outros hosts
+        assert sum(s.requests for s in stubs) == 1
+
+    def test_read_timeout_does_not_evict_hosts(self, stubs):
+        for stub in stubs:
+            stub.delay_s = 0.5
+        with _pool([s.url for s in stubs], timeout_s=0.1) as llm:
+            with pytest.raises(TimeoutError):
+                llm.complete("chunk longo")
+            assert all(h.healthy for h in llm.hosts)
+        assert sum(s.requests for s in stubs) == 1
+
+    def test_all_hosts_failing_raises(self, stubs):
+        for stub in stubs:
+            stub.fail = True
+        with _pool([s.url for s in stubs]) as llm, pytest.raises(Exception):
+            llm.complete("p")
+
+    def test_health_check_restores_host(self, stubs):
+        with _pool([s.url for s in stubs]) as llm:
+            stubs[0].fail = True
+            llm.check_health()
+            assert [h.healthy for h in llm.hosts] == [False, True]
+            stubs[0].fail = False
+            llm.check_health()
+            assert all(h.healthy for h in llm.hosts)
+
+    def test_background_health_thread_stops_on_close(self, stubs):
+        llm = OllamaPoolClient([s.url for s in stubs], model="m", health_interval_s=0.01)
+        thread = llm._health_thread
+        llm.close()
+        assert thread is not None and not thread.is_alive()
+
+
+class TestWarmUp:
+    def test_hosts_warm_up_in_parallel(self, stubs):
+        for stub in stubs:
+            stub.delay_s = 0.3
+        t0 = time.monotonic()
+        llm = _pool([s.url for s in stubs], warm_up=True)
+        elapsed = time.monotonic() - t0
+        llm.close()
+        assert elapsed < 0.55
+        assert llm.warmup_load_s == 0.3
+        assert all(s.requests == 1 for s in stubs)
@@ -63,7 +63,7 @@ class TestEditalPipeline:
         out_dir = str(tmp_path / "output")
 
         with patch(
-            "dexter_eng.pipeline.edital_pipeline.extract_text_from_pdf",
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
             return_value=FAKE_PDF_TEXT,
         ):
             result = run_edital_pipeline(
@@ -91,7 +91,7 @@ class TestEditalPipeline:
         out_dir = str(tmp_path / "novo" / "sub" / "dir")
 
         with patch(
-            "dexter_eng.pipeline.edital_pipeline.extract_text_from_pdf",
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
             return_value=FAKE_PDF_TEXT,
         ):
             result = run_edital_pipeline(
@@ -104,3 +104,44 @@ class TestEditalPipeline:
 
         assert Path(out_dir).exists()
         assert result.exists()
+
+    def test_map_reduce_covers_every_chunk(self, tmp_path: Path):
+        """Todos os chunks são enviados à LLM, não só os primeiros."""
+        pages = "".join(
+            f"\n=== PAGE {i} ===\nPrazo {i}: {i:02d}/09/2025\n" + chr(96 + i) * 80 + "\n"
+            for i in range(1, 11)
+        )
+        prompts: list[str] = []
+
+        class PerChunkLLM(LLMClient):
+            def __init__(self):
+                super().__init__(model="fake-chunks", api_key="fake")
+
+            def complete(self, prompt: str) -> LLMResponse:
+                prompts.append(prompt)
+                found = [line for line in prompt.splitlines() if line.startswith("Prazo ")]
+                return LLMResponse(text=json.dumps({
+                    "orgao": "Prefeitura Municipal de Exemplo",
+                    "prazos": [
+                        {"name": line.split(":")[0], "date_text": line.split(": ")[1]}
+                        for line in found
+                    ],
+                }))
+
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
+            return_value=pages,
+        ):
+            result = run_edital_pipeline(
+                pdf_path="edital_longo.pdf",
+                llm=PerChunkLLM(),
+                prompt_template="{{TEXT}}",
+                out_dir=str(tmp_path),
+                max_chars=200,
+                llm_workers=3,
+            )
+
+        assert len(prompts) > 4
+        content = result.read_text(encoding="utf-8")
+        for i in range(1, 11):
+            assert f"Prazo {i}" in content
@@ -0,0 +1,125 @@
+"""Testes do agendador de RPM/TPM e das novas tentativas com backoff."""
+
+import asyncio
+import time
+
+import pytest
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.adapters.llm.rate_limit import RateLimitedClient, RateLimiter, request_lane
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class _HttpError(Exception):
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _FakeResponse(status_code, headers)
+
+
+class _FlakyLLM(LLMClient):
+    """Falha com os erros dados antes de responder."""
+
+    def __init__(self, errors: list[Exception], usage: int | None = None):
+        super().__init__(model="fake-rl", api_key="fake")
+        self.errors = list(errors)
+        self.usage = usage
+        self.calls = 0
+
+    def complete(self, prompt: str) -> LLMResponse:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        raw = {"usage": {"total_tokens": self.usage}} if self.usage is not None else None
+        return LLMResponse(text="{}", raw=raw)
+
+
+class TestRateLimiter:
+    def test_requests_wait_for_refill(self):
+        limiter = RateLimiter(rpm=1200, headroom=1.0)  # 20 req/s
+        limiter._requests = 0
+        t0 = time.monotonic()
+        for _ in range(3):
+            limiter.acquire(1)
+        assert time.monotonic() - t0 >= 0.12
+
+    def test_tokens_budget(self):
+        limiter = RateLimiter(tpm=60_000, headroom=1.0)  # 1000 tokens/s
+        limiter.acquire(60_000)
+        t0 = time.monotonic()
+        limiter.acquire(100)
+        assert time.monotonic() - t0 >= 0.08
+
+    def test_settle_returns_unused_tokens(self):
+        limiter = RateLimiter(tpm=1000, headroom=1.0)
+        limiter.acquire(800)
+        limiter.settle(estimated=800, actual=100)
+        assert limiter._tokens == pytest.approx(900, abs=5)
+
+    def test_lanes_are_served_round_robin(self):
+        limiter = RateLimiter()
+        order: list[str] = []
+
+        async def call(lane: str) -> None:
+            await limiter.aacquire(1, lane=lane)
+            order.append(lane)
+
+        async def run() -> None:
+            limiter.pause(0.1)
+            tasks = [asyncio.create_task(call(lane)) for lane in ["a", "a", "a", "b", "c"]]
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        assert order == ["a", "b", "c", "a", "a"]
+
+    def test_request_lane_is_the_default(self):
+        limiter = RateLimiter()
+        limiter.pause(0.05)
+        with request_lane("doc-1"):
+            limiter.acquire(1)
+        assert not limiter._lanes
+
+
+class TestRateLimitedClient:
+    def test_honors_retry_after(self):
+        llm = _FlakyLLM([_HttpError(429, {"retry-after": "0.1"})])
+        client = RateLimitedClient(llm, RateLimiter(rpm=600))
+        t0 = time.monotonic()
+        assert client.complete("x").text == "{}"
+        assert llm.calls == 2
+        assert time.monotonic() - t0 >= 0.1
+
+    def test_backoff_without_retry_after(self):
+        llm = _FlakyLLM([_HttpError(503), _HttpError(429)])
+        client = RateLimitedClient(llm, RateLimiter(), base_delay_s=0.01)
+        client.complete("x")
+        assert llm.calls == 3
+
+    def test_non_retryable_errors_propagate(self):
+        llm = _FlakyLLM([_HttpError(400)])
+        with pytest.raises(_HttpError):
+            RateLimitedClient(llm, RateLimiter()).complete("x")
+        assert llm.calls == 1
+
+    def test_gives_up_after_max_retries(self):
+        llm = _FlakyLLM([_HttpError(429)] * 3)
+        client = RateLimitedClient(llm, RateLimiter(), max_retries=2, base_delay_s=0.001)
+        with pytest.raises(_HttpError):
+            client.complete("x")
+        assert llm.calls == 3
+
+    def test_usage_settles_token_bucket(self):
+        limiter = RateLimiter(tpm=100_000, headroom=1.0)
+        client = RateLimitedClient(_FlakyLLM([], usage=50), limiter, max_output_tokens=1000)
+        client.complete("x" * 350)
+        assert limiter._tokens == pytest.approx(100_000 - 50, abs=5)
+
+    def test_async_path(self):
+        llm = _FlakyLLM([_HttpError(429, {"retry-after-ms": "10"})])
+        client = RateLimitedClient(llm, RateLimiter(rpm=600))
+        assert asyncio.run(client.acomplete("x")).text == "{}"
+        assert llm.calls == 2
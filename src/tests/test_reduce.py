@@ -0,0 +1,110 @@
+"""Testes para a etapa de reduce (consolidação das extrações por chunk)."""
+
+from dexter_eng.core.schemas.edital import (
+    Citation,
+    Deadline,
+    EditalExtraction,
+    Requirement,
+)
+from dexter_eng.pipeline.steps.step_chunk import ChunkSpan
+from dexter_eng.pipeline.steps.step_llm_structured import ChunkOutcome, StructuredResult
+from dexter_eng.pipeline.steps.step_reduce import (
+    merge_extractions,
+    normalize_key,
+    reduce_step,
+)
+
+
+class TestNormalizeKey:
+    def test_ignores_accents_case_and_punctuation(self):
+        assert normalize_key("Certidão  Negativa.") == normalize_key("certidao negativa")
+
+    def test_empty(self):
+        assert normalize_key("   ") == ""
+
+
+class TestMergeExtractions:
+    def test_empty_list(self):
+        assert merge_extractions([]) == EditalExtraction()
+
+    def test_first_non_empty_orgao_and_objeto(self):
+        parts = [
+            EditalExtraction(orgao=None, objeto="Obra de pavimentação"),
+            EditalExtraction(orgao="Prefeitura X", objeto="Outro objeto"),
+        ]
+        merged = merge_extractions(parts)
+        assert merged.orgao == "Prefeitura X"
+        assert merged.objeto == "Obra de pavimentação"
+
+    def test_requirements_deduplicated_with_citation_union(self):
+        parts = [
+            EditalExtraction(
+                documentos_exigidos=[
+                    Requirement(
+                        title="Certidão Negativa",
+                        description="CND",
+                        citations=[Citation(page=2, excerpt="certidão negativa")],
+                    )
+                ]
+            ),
+            EditalExtraction(
+                documentos_exigidos=[
+                    Requirement(
+                        title="certidao negativa",
+                        description="Certidão negativa de débitos federais",
+                        citations=[
+                            Citation(page=2, excerpt="Certidão negativa"),
+                            Citation(page=40, excerpt="apresentar CND"),
+                        ],
+                    ),
+                    Requirement(title="CNPJ", description="Inscrição ativa"),
+                ]
+            ),
+        ]
+        merged = merge_extractions(parts)
+        assert [r.title for r in merged.documentos_exigidos] == ["Certidão Negativa", "CNPJ"]
+        cnd = merged.documentos_exigidos[0]
+        assert cnd.description == "Certidão negativa de débitos federais"
+        assert [c.page for c in cnd.citations] == [2, 40]
+
+    def test_conflicting_deadline_dates_become_pendencia(self):
+        parts = [
+            EditalExtraction(prazos=[Deadline(name="Entrega das propostas", date_text="10/08/2025")]),
+            EditalExtraction(prazos=[Deadline(name="Entrega das Propostas", date_text="12/08/2025")]),
+        ]
+        merged = merge_extractions(parts)
+        assert len(merged.prazos) == 1
+        assert merged.prazos[0].date_text == "10/08/2025"
+        assert any("datas divergentes" in p for p in merged.pendencias)
+
+    def test_pendencias_deduplicated_in_order(self):
+        parts = [
+            EditalExtraction(pendencias=["Valor estimado ausente", "B"]),
+            EditalExtraction(pendencias=["valor estimado ausente", "C"]),
+        ]
+        merged = merge_extractions(parts)
+        assert merged.pendencias == ["Valor estimado ausente", "B", "C"]
+
+    def test_does_not_mutate_inputs(self):
+        req = Requirement(title="A", description="x", citations=[Citation(page=1, excerpt="a")])
+        parts = [
+            EditalExtraction(penalidades=[req]),
+            EditalExtraction(penalidades=[Requirement(title="A", description="x", citations=[Citation(page=3, excerpt="b")])]),
+        ]
+        merge_extractions(parts)
+        assert len(req.citations) == 1
+
+
+class TestReduceStep:
+    def test_failure_pendencia_does_not_leak_into_chunk_result(self):
+        own = EditalExtraction(orgao="Prefeitura", pendencias=["do chunk"])
+        result = StructuredResult(extraction=own, prompt="p", raw_response="{}", cache_hit=False)
+        outcomes = [
+            ChunkOutcome(index=0, result=result),
+            ChunkOutcome(index=1, error=RuntimeError("timeout")),
+        ]
+        spans = [ChunkSpan(0, 5, (1, 1)), ChunkSpan(5, 10, (2, 2))]
+        extraction = reduce_step(outcomes, ["a" * 5, "b" * 5], spans, {})["extraction"]
+        assert extraction.pendencias[-1].startswith("Trecho 2/2 não pôde ser analisado")
+        assert result.extraction.pendencias == ["do chunk"]
+        assert extraction is not result.extraction
@@ -0,0 +1,131 @@
+"""Testes do cache de resultado completo (documento + prompt + modelo + versão)."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.persistence.db import (
+    _get_conn,
+    get_cache_stats,
+    get_cached_result,
+    save_cached_result,
+)
+from dexter_eng.pipeline.edital_pipeline import run_edital_pipeline_detailed
+
+
+KEY = {
+    "document_sha256": "sha-doc",
+    "prompt_hash": "sha-prompt",
+    "model": "gpt-4o",
+    "pipeline_version": "0.3",
+    "max_chars": 8000,
+    "options": '{"ocr": "off"}',
+}
+
+TEXT = "=== PAGE 1 ===\nEdital com resultado em cache\n"
+RESPONSE = json.dumps({"orgao": "Prefeitura do Cache de Resultado"})
+
+
+class CountingLLM(LLMClient):
+    def __init__(self, model: str = "fake-result"):
+        super().__init__(model=model, api_key="fake")
+        self.calls = 0
+
+    def complete(self, prompt: str) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(text=RESPONSE)
+
+
+def _run(pdf: Path, out_dir: Path, llm: LLMClient, template: str = "{{TEXT}}", **kwargs):
+    return run_edital_pipeline_detailed(
+        pdf_path=str(pdf),
+        llm=llm,
+        prompt_template=template,
+        out_dir=str(out_dir),
+        max_chars=8000,
+        **kwargs,
+    )
+
+
+class TestResultCacheDb:
+    def test_miss_returns_none(self):
+        assert get_cached_result(**KEY) is None
+
+    def test_save_and_retrieve(self):
+        save_cached_result(**KEY, validated_json='{"orgao": "X"}', result_md="# X")
+        row = get_cached_result(**KEY)
+        assert row["validated_json"] == '{"orgao": "X"}'
+        assert row["result_md"] == "# X"
+
+    def test_any_key_component_changes_lookup(self):
+        save_cached_result(**KEY, validated_json="{}", result_md="# X")
+        for field, value in [("model", "gpt-4o-mini"), ("pipeline_version", "9.9"), ("max_chars", 4000)]:
+            assert get_cached_result(**{**KEY, field: value}) is None
+
+    def test_save_replaces_previous_entry(self):
+        save_cached_result(**KEY, validated_json="{}", result_md="# antigo")
+        save_cached_result(**KEY, validated_json="{}", result_md="# novo")
+        assert get_cached_result(**KEY)["result_md"] == "# novo"
+
+
+class TestPipelineResultCache:
+    def test_second_run_skips_extraction_and_llm(self, tmp_path: Path):
+        pdf = tmp_path / "edital.pdf"
+        pdf.write_bytes(b"%PDF-cache")
+        llm = CountingLLM()
+
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
+            return_value=TEXT,
+        ) as extract:
+            first = _run(pdf, tmp_path / "out1", llm)
+            second = _run(pdf, tmp_path / "out2", llm)
+
+        assert extract.call_count == 1
+        assert llm.calls == 1
+        assert first.result_cache_hit is False
+        assert second.result_cache_hit is True
+        assert second.output_path.read_text(encoding="utf-8") == first.output_path.read_text(
+            encoding="utf-8"
+        )
+
+        row = _get_conn().execute(
+            "SELECT status, cache_hit, result_cache_hit FROM runs WHERE id = ?", (second.run_id,)
+        ).fetchone()
+        assert row["status"] == "success"
+        assert row["cache_hit"] == 1
+        assert row["result_cache_hit"] == 1
+        assert get_cache_stats()["result_hits"] == 1
+
+    def test_force_bypasses_result_cache(self, tmp_path: Path):
+        pdf = tmp_path / "edital.pdf"
+        pdf.write_bytes(b"%PDF-force")
+        llm = CountingLLM()
+
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
+            return_value=TEXT,
+        ) as extract:
+            _run(pdf, tmp_path / "out", llm)
+            forced = _run(pdf, tmp_path / "out", llm, force=True)
+
+        assert extract.call_count == 2
+        assert forced.result_cache_hit is False
+
+    def test_prompt_change_misses_result_cache(self, tmp_path: Path):
+        pdf = tmp_path / "edital.pdf"
+        pdf.write_bytes(b"%PDF-prompt")
+        llm = CountingLLM()
+
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf",
+            return_value=TEXT,
+        ) as extract:
+            _run(pdf, tmp_path / "out", llm, template="v1 {{TEXT}}")
+            result = _run(pdf, tmp_path / "out", llm, template="v2 {{TEXT}}")
+
+        # Extração vem do cache de etapas; só LLM e renderização rodam de novo
+        assert extract.call_count == 1
+        assert result.result_cache_hit is False
+        assert llm.calls == 2
@@ -0,0 +1,104 @@
+"""Testes do índice BM25 e da seleção de chunks enviados à LLM."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.core.retrieval.bm25 import BM25Index, analyze, stem
+from dexter_eng.pipeline.edital_pipeline import PipelineOptions, run_edital_pipeline_detailed
+from dexter_eng.pipeline.steps.step_llm_structured import llm_map_step
+from dexter_eng.pipeline.steps.step_select import select_chunks, select_step
+
+FILLER = "Especificações técnicas do mobiliário, cores, dimensões e acabamentos. " * 8
+CHUNKS = [
+    "PREÂMBULO: Prefeitura Municipal, pregão eletrônico para aquisição de mobiliário.",
+    FILLER,
+    "O prazo para entrega das propostas encerra-se às 10h; impugnações em até 3 dias úteis.",
+    FILLER,
+    "Habilitação: regularidade fiscal e trabalhista, atestado de capacidade técnica.",
+    FILLER,
+    "Penalidades: multa de 10%, advertência e impedimento de licitar.",
+]
+
+
+class TestAnalyzer:
+    def test_plural_and_accents_share_stem(self):
+        assert stem("prazos") == stem("prazo")
+        assert analyze("Habilitação") == analyze("habilitações")
+
+    def test_stopwords_removed(self):
+        assert analyze("o prazo de entrega das propostas") == analyze("prazo entrega propostas")
+
+
+class TestBM25Index:
+    def test_ranks_relevant_chunk_first(self):
+        index = BM25Index.build(CHUNKS)
+        assert index.rank("penalidade multa")[0] == 6
+        assert index.rank("prazos de entrega")[0] == 2
+
+    def test_unknown_terms_rank_nothing(self):
+        assert BM25Index.build(CHUNKS).rank("xyzzy") == []
+
+
+class TestSelectChunks:
+    def test_everything_when_within_budget(self):
+        index = BM25Index.build(CHUNKS)
+        assert select_chunks(index, [10] * 7, token_budget=1000) == list(range(7))
+        assert select_chunks(index, [10] * 7, token_budget=0) == list(range(7))
+
+    def test_picks_relevant_chunks_under_budget(self):
+        index = BM25Index.build(CHUNKS)
+        tokens = [20, 150, 20, 150, 20, 150, 20]
+        selected = select_chunks(index, tokens, token_budget=100)
+        assert selected == [0, 2, 4, 6]
+        assert sum(tokens[i] for i in selected) <= 100
+
+    def test_step_reports_selection(self):
+        out = select_step(CHUNKS, select_token_budget=100)
+        assert out["selection"]["chunks_selected"] == len(out["selected"]) < len(CHUNKS)
+
+    def test_no_index_when_selection_is_off(self, monkeypatch):
+        def fail(chunks):
+            raise AssertionError("índice construído sem necessidade")
+
+        monkeypatch.setattr(BM25Index, "build", fail)
+        assert select_step(CHUNKS, select_token_budget=0)["selected"] == list(range(7))
+        assert select_step(CHUNKS, select_token_budget=10**6)["selected"] == list(range(7))
+
+
+class _EchoLLM(LLMClient):
+    def __init__(self):
+        super().__init__(model="fake-select", api_key="fake")
+        self.prompts: list[str] = []
+
+    def complete(self, prompt: str) -> LLMResponse:
+        self.prompts.append(prompt)
+        return LLMResponse(text=json.dumps({"orgao": "Prefeitura"}))
+
+
+class TestMapWithSelection:
+    def test_outcomes_keep_original_chunk_index(self):
+        llm = _EchoLLM()
+        out = llm_map_step(CHUNKS, [0, 4], "{{TEXT}}", llm.model, llm, 1)
+        assert [o.index for o in out["outcomes"]] == [0, 4]
+        assert llm.prompts == [CHUNKS[0], CHUNKS[4]]
+
+    def test_pipeline_sends_only_selected_chunks(self, tmp_path: Path):
+        llm = _EchoLLM()
+        text = "\n\n".join(f"=== PAGE {i + 1} ===\n{c}" for i, c in enumerate(CHUNKS))
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf", return_value=text
+        ):
+            result = run_edital_pipeline_detailed(
+                pdf_path="selecao.pdf",
+                llm=llm,
+                prompt_template="{{TEXT}}",
+                out_dir=str(tmp_path),
+                max_chars=8000,
+                llm_workers=1,
+                options=PipelineOptions(chunk_tokens=160, select_token_budget=200),
+            )
+        assert result.chunks == 7
+        assert 0 < len(llm.prompts) < 7
+        assert not any(p.startswith("=== PAGE 2 ===") for p in llm.prompts)
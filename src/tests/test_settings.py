@@ -31,3 +31,9 @@ class TestSettings:
         monkeypatch.setenv("OPENAI_API_KEY", "sk-openai-456")
         s = Settings()
         assert s.llm_api_key == "sk-openai-456"
+
+    def test_pdf_tables_is_opt_in(self, monkeypatch):
+        monkeypatch.delenv("PDF_TABLES", raising=False)
+        assert Settings().pdf_tables is False
+        monkeypatch.setenv("PDF_TABLES", "1")
+        assert Settings().pdf_tables is True
@@ -0,0 +1,147 @@
+"""Testes da coalescência de chamadas idênticas à LLM (no processo e entre processos)."""
+
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.persistence import db
+from dexter_eng.persistence.db import (
+    acquire_llm_lease,
+    release_llm_lease,
+    save_cached_response,
+)
+from dexter_eng.pipeline.single_flight import SingleFlight
+from dexter_eng.pipeline.steps import step_llm_structured
+from dexter_eng.pipeline.steps.step_llm_structured import (
+    aextract_edital_chunk,
+    extract_edital_chunk,
+)
+
+
+class _SlowLLM(LLMClient):
+    """Demora até ``release`` ser sinalizado; conta as chamadas."""
+
+    def __init__(self):
+        super().__init__(model="lento", api_key="fake")
+        self.calls = 0
+        self.release = threading.Event()
+
+    def complete(self, prompt: str) -> LLMResponse:
+        self.calls += 1
+        self.release.wait(timeout=5)
+        return LLMResponse(text='{"orgao": "X"}', raw={"id": f"req-{self.calls}"})
+
+    async def acomplete(self, prompt: str) -> LLMResponse:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return LLMResponse(text='{"orgao": "X"}', raw={"id": f"req-{self.calls}"})
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return 42
+
+        with ThreadPoolExecutor(4) as pool:
+            leader = pool.submit(flights.do, "k", work)
+            started.wait(timeout=5)
+            followers = [pool.submit(flights.do, "k", work) for _ in range(3)]
+            time.sleep(0.05)
+            release.set()
+            results = [leader.result(), *(f.result() for f in followers)]
+        assert len(calls) == 1
+        assert results == [(42, False)] + [(42, True)] * 3
+
+    def test_error_reaches_followers_and_key_is_freed(self):
+        flights = SingleFlight()
+
+        def boom():
+            raise RuntimeError("falhou")
+
+        with pytest.raises(RuntimeError):
+            flights.do("k", boom)
+        assert flights.do("k", lambda: 1) == (1, False)
+
+
+class TestExtractionCoalescing:
+    def test_threads_with_same_chunk_call_llm_once(self):
+        llm = _SlowLLM()
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(extract_edital_chunk, llm, "{{TEXT}}", "igual") for _ in range(4)]
+            time.sleep(0.1)
+            llm.release.set()
+            results = [f.result() for f in futures]
+        assert llm.calls == 1
+        assert sorted(r.cache_hit for r in results) == [False, True, True, True]
+        assert {r.extraction.orgao for r in results} == {"X"}
+
+    def test_async_tasks_with_same_chunk_call_llm_once(self):
+        llm = _SlowLLM()
+
+        async def run():
+            return await asyncio.gather(
+                *(aextract_edital_chunk(llm, "{{TEXT}}", "igual") for _ in range(3))
+            )
+
+        results = asyncio.run(run())
+        assert llm.calls == 1
+        assert [r.cache_hit for r in results].count(False) == 1
+
+
+class TestCrossProcessLease:
+    def test_lease_is_exclusive_until_released_or_expired(self):
+        assert acquire_llm_lease("h", "m", "a", ttl_s=60)
+        assert not acquire_llm_lease("h", "m", "b", ttl_s=60)
+        release_llm_lease("h", "m", "a")
+        assert acquire_llm_lease("h", "m", "b", ttl_s=-1)
+        # Reserva vencida: outro dono assume
+        assert acquire_llm_lease("h", "m", "c", ttl_s=60)
+
+    def test_waits_for_other_process_answer(self, monkeypatch):
+        monkeypatch.setattr(step_llm_structured, "_LEASE_POLL_S", 0.01)
+        llm = _SlowLLM()
+        llm.release.set()
+        prompt_hash = hashlib.sha256(b"trecho").hexdigest()
+        # Outro processo segura a reserva e responde depois
+        assert acquire_llm_lease(prompt_hash, llm.model, "outro-processo", ttl_s=60)
+
+        def other_process_answers():
+            time.sleep(0.1)
+            save_cached_response(prompt_hash, llm.model, '{"orgao": "Y"}')
+            release_llm_lease(prompt_hash, llm.model, "outro-processo")
+
+        threading.Thread(target=other_process_answers).start()
+        result = extract_edital_chunk(llm, "{{TEXT}}", "trecho")
+        assert llm.calls == 0
+        assert result.cache_hit
+        assert result.extraction.orgao == "Y"
+
+    def test_async_path_keeps_sqlite_off_the_event_loop(self, monkeypatch):
+        threads: list[str] = []
+        real_acquire = step_llm_structured.acquire_llm_lease
+
+        def recording_acquire(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return real_acquire(*args, **kwargs)
+
+        monkeypatch.setattr(step_llm_structured, "acquire_llm_lease", recording_acquire)
+        asyncio.run(aextract_edital_chunk(_SlowLLM(), "{{TEXT}}", "assíncrono"))
+        assert threads and threading.main_thread().name not in threads
+
+    def test_file_database_uses_wal_and_busy_timeout(self, tmp_path):
+        db.init_db(tmp_path / "dexter.db")
+        conn = db._get_conn()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
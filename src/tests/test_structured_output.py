@@ -0,0 +1,180 @@
+"""Testes da decodificação restrita pelo schema e do reaproveitamento do prefixo do prompt."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+
+from dexter_eng.adapters.llm import local_ollama_client
+from dexter_eng.adapters.llm.cascade import CascadeLLMClient
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.adapters.llm.local_ollama_client import LocalOllamaClient
+from dexter_eng.adapters.llm.openai_client import OpenAILLMClient, strict_json_schema
+from dexter_eng.adapters.llm.rate_limit import RateLimitedClient, RateLimiter
+from dexter_eng.core.schemas.edital import edital_json_schema
+from dexter_eng.pipeline.steps.step_llm_structured import (
+    amap_edital_chunks,
+    extract_edital_chunk,
+    map_edital_chunks,
+    prompt_prefix,
+)
+
+
+class _SchemaLLM(LLMClient):
+    """Registra o schema recebido; ``complete`` sem schema não deve ser usado."""
+
+    def __init__(self):
+        super().__init__(model="fake-schema", api_key="fake")
+        self.schemas: list[dict] = []
+
+    def complete(self, prompt: str) -> LLMResponse:
+        raise AssertionError("esperava complete_json")
+
+    def complete_json(self, prompt: str, schema: dict) -> LLMResponse:
+        self.schemas.append(schema)
+        return LLMResponse(text='{"orgao":"X"}')
+
+    async def acomplete_json(self, prompt: str, schema: dict) -> LLMResponse:
+        return self.complete_json(prompt, schema)
+
+
+class TestStrictJsonSchema:
+    def test_every_object_is_closed_and_fully_required(self):
+        strict = strict_json_schema(edital_json_schema())
+        objects = [strict, *strict["$defs"].values()]
+        for obj in objects:
+            assert obj["additionalProperties"] is False
+            assert obj["required"] == list(obj["properties"])
+
+    def test_unsupported_keywords_removed(self):
+        strict = json.dumps(strict_json_schema(edital_json_schema()))
+        assert '"default"' not in strict
+        assert '"minLength"' not in strict
+        assert '"minimum"' not in strict
+
+    def test_field_names_are_not_treated_as_keywords(self):
+        schema = {"type": "object", "properties": {"default": {"type": "string"}}}
+        assert strict_json_schema(schema)["required"] == ["default"]
+
+
+class TestProviders:
+    def test_ollama_sends_schema_as_format(self, monkeypatch):
+        bodies: list[dict] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            bodies.append(json.loads(request.content))
+            lines = [{"response": '{"orgao":"X"}'}, {"done": True}]
+            return httpx.Response(200, content="\n".join(map(json.dumps, lines)).encode())
+
+        real_client = httpx.Client
+        monkeypatch.setattr(
+            local_ollama_client.httpx,
+            "Client",
+            lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+        )
+        llm = LocalOllamaClient(model="m")
+        llm.complete_json("p", edital_json_schema())
+        llm.complete("p")
+        assert bodies[0]["format"] == edital_json_schema()
+        assert "format" not in bodies[1]
+
+    def test_openai_uses_strict_json_schema(self):
+        calls: list[dict] = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            message = SimpleNamespace(content='{"orgao":"X"}')
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], model_dump=dict)
+
+        llm = OpenAILLMClient(model="gpt-4o", api_key="sk-fake")
+        llm.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        assert llm.complete_json("p", edital_json_schema()).text == '{"orgao":"X"}'
+        fmt = calls[0]["response_format"]
+        assert fmt["type"] == "json_schema"
+        assert fmt["json_schema"]["name"] == "EditalExtraction"
+        assert fmt["json_schema"]["strict"] is True
+
+
+class TestSchemaIsRequested:
+    def test_extraction_passes_edital_schema(self):
+        llm = _SchemaLLM()
+        result = extract_edital_chunk(llm, "{{TEXT}}", "trecho")
+        assert result.extraction.orgao == "X"
+        assert llm.schemas == [edital_json_schema()]
+
+    def test_wrappers_forward_schema(self):
+        inner = _SchemaLLM()
+        wrapped = RateLimitedClient(
+            CascadeLLMClient([("local", inner)], reject=lambda text: None), RateLimiter()
+        )
+        asyncio.run(wrapped.acomplete_json("p", {"type": "object"}))
+        assert inner.schemas == [{"type": "object"}]
+
+    def test_clients_without_support_fall_back_to_complete(self):
+        class Plain(LLMClient):
+            def complete(self, prompt: str) -> LLMResponse:
+                return LLMResponse(text="{}")
+
+        assert Plain(model="p").complete_json("x", {}).text == "{}"
+
+
+class TestPromptPrefix:
+    def test_prefix_is_everything_before_text(self):
+        assert prompt_prefix("INSTRUÇÕES\nTEXTO:\n{{TEXT}}\nFIM") == "INSTRUÇÕES\nTEXTO:\n"
+        assert prompt_prefix("sem marcador") == "sem marcador"
+
+    def test_map_announces_prefix_through_wrappers(self):
+        prefixes: list[str] = []
+
+        class Recorder(_SchemaLLM):
+            def cache_prefix(self, prefix: str) -> None:
+                prefixes.append(prefix)
+
+        wrapped = RateLimitedClient(
+            CascadeLLMClient([("local", Recorder())], reject=lambda text: None), RateLimiter()
+        )
+        map_edital_chunks(wrapped, "REGRAS\n{{TEXT}}", ["a", "b"], max_workers=2)
+        asyncio.run(amap_edital_chunks(wrapped, "REGRAS\n{{TEXT}}", ["c"]))
+        assert prefixes == ["REGRAS\n", "REGRAS\n"]
+
+    def test_ollama_keeps_prefix_and_reports_it(self, monkeypatch):
+        bodies: list[dict] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            bodies.append(json.loads(request.content))
+            lines = [{"response": "{}"}, {"done": True, "prompt_eval_count": 5}]
+            return httpx.Response(200, content="\n".join(map(json.dumps, lines)).encode())
+
+        real_client = httpx.Client
+        monkeypatch.setattr(
+            local_ollama_client.httpx,
+            "Client",
+            lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+        )
+        llm = LocalOllamaClient(model="m")
+        llm.cache_prefix("R" * 70)
+        resp = llm.complete("R" * 70 + "trecho")
+        other = llm.complete("outro prompt")
+        assert bodies[0]["options"]["num_keep"] == 20
+        assert resp.raw["prefix_chars"] == 70
+        assert "num_keep" not in bodies[1]["options"]
+        assert other.raw["prefix_chars"] == 0
+
+    def test_openai_sends_stable_prompt_cache_key(self):
+        calls: list[dict] = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            message = SimpleNamespace(content="{}")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], model_dump=dict)
+
+        llm = OpenAILLMClient(model="gpt-4o", api_key="sk-fake")
+        llm.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        llm.complete("sem dica")
+        llm.cache_prefix("REGRAS\n")
+        llm.complete_json("REGRAS\na", edital_json_schema())
+        llm.complete_json("REGRAS\nb", edital_json_schema())
+        assert "extra_body" not in calls[0]
+        keys = {c["extra_body"]["prompt_cache_key"] for c in calls[1:]}
+        assert len(keys) == 1
@@ -0,0 +1,172 @@
+"""Testes da contabilidade de tokens, latência e custo por chamada à LLM."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from dexter_eng.adapters.llm.client import LLMClient, LLMResponse
+from dexter_eng.adapters.llm.usage import (
+    LLMUsage,
+    estimate_cost,
+    summarize_usage,
+    usage_from_raw,
+)
+from dexter_eng.persistence.db import (
+    create_run,
+    get_or_create_document,
+    get_run_history,
+    record_run_usage,
+)
+from dexter_eng.pipeline.edital_pipeline import run_edital_pipeline_detailed
+
+OPENAI_RAW = {
+    "model": "gpt-4o-2024-08-06",
+    "elapsed_s": 2.0,
+    "usage": {
+        "prompt_tokens": 1000,
+        "completion_tokens": 200,
+        "total_tokens": 1200,
+        "prompt_tokens_details": {"cached_tokens": 400},
+    },
+}
+OLLAMA_RAW = {
+    "provider": "ollama",
+    "elapsed_s": 3.0,
+    "ttft_s": 1.2,
+    "ollama_last_chunk": {
+        "done": True,
+        "prompt_eval_count": 800,
+        "eval_count": 100,
+        "eval_duration": 2_000_000_000,
+        "load_duration": 500_000_000,
+    },
+}
+
+
+class TestUsageFromRaw:
+    def test_openai_usage_and_cost(self):
+        usage = usage_from_raw(OPENAI_RAW)
+        assert (usage.input_tokens, usage.output_tokens, usage.cached_input_tokens) == (
+            1000,
+            200,
+            400,
+        )
+        # 600 * 2.50 + 400 * 1.25 + 200 * 10.00 por 1M tokens
+        assert usage.cost_usd == pytest.approx(0.004)
+        assert usage.tokens_per_s == pytest.approx(100)
+
+    def test_ollama_last_chunk(self):
+        usage = usage_from_raw(OLLAMA_RAW)
+        assert usage.input_tokens == 800
+        assert usage.output_tokens == 100
+        assert usage.load_s == pytest.approx(0.5)
+        assert usage.tokens_per_s == pytest.approx(50)
+        assert usage.ttft_s == 1.2
+        assert usage.cost_usd == 0.0
+
+    def test_ollama_stopped_early_counts_streamed_tokens(self):
+        raw = {
+            "provider": "ollama",
+            "elapsed_s": 2.0,
+            "ttft_s": 0.5,
+            "ollama_last_chunk": {},
+            "tokens_streamed": 30,
+            "prompt_chars": 700,
+        }
+        usage = usage_from_raw(raw)
+        assert usage.output_tokens == 30
+        assert usage.input_tokens == 200
+        assert usage.tokens_per_s == pytest.approx(20)
+
+    def test_unknown_raw(self):
+        assert usage_from_raw(None) is None
+        assert usage_from_raw({"id": "x"}) is None
+
+    def test_cost_of_unknown_model(self):
+        assert estimate_cost("modelo-novo", 10, 0, 10) is None
+        assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0, 0) == pytest.approx(0.15)
+
+
+class TestSummarizeUsage:
+    def test_totals_and_means(self):
+        summary = summarize_usage(
+            [
+                LLMUsage(input_tokens=10, output_tokens=100, ttft_s=1.0, generation_s=2.0),
+                LLMUsage(input_tokens=20, output_tokens=50, ttft_s=3.0, generation_s=1.0),
+            ]
+        )
+        assert summary["llm_calls"] == 2
+        assert summary["input_tokens"] == 30
+        assert summary["ttft_s"] == 2.0
+        assert summary["tokens_per_s"] == 50.0
+        assert summary["cost_usd"] is None
+
+    def test_rejected_cascade_attempts_are_counted(self):
+        last_chunk = {"prompt_eval_count": 500, "eval_count": 80}
+        local = {"provider": "ollama", "ollama_last_chunk": last_chunk}
+        usage = usage_from_raw({**OPENAI_RAW, "tier": "openai", "attempts": [local]})
+        assert usage.input_tokens == 1000
+        assert [a.output_tokens for a in usage.attempts] == [80]
+        summary = summarize_usage([usage])
+        assert summary["llm_calls"] == 2
+        assert summary["input_tokens"] == 1500
+        assert summary["output_tokens"] == 280
+        assert summary["cost_usd"] == pytest.approx(usage.cost_usd)
+
+
+class _UsageLLM(LLMClient):
+    def __init__(self):
+        super().__init__(model="gpt-4o", api_key="fake")
+
+    def complete(self, prompt: str) -> LLMResponse:
+        return LLMResponse(text='{"orgao": "X"}', raw=OPENAI_RAW)
+
+
+class TestRunUsage:
+    def test_pipeline_records_usage_in_runs_and_meta(self, tmp_path: Path):
+        text = "".join(f"\n=== PAGE {i} ===\n" + chr(96 + i) * 300 + "\n" for i in range(1, 3))
+        with patch(
+            "dexter_eng.pipeline.steps.step_extract.extract_text_from_pdf", return_value=text
+        ):
+            result = run_edital_pipeline_detailed(
+                pdf_path="uso.pdf",
+                llm=_UsageLLM(),
+                prompt_template="{{TEXT}}",
+                out_dir=str(tmp_path),
+                max_chars=350,
+                llm_workers=1,
+            )
+        row = next(r for r in get_run_history() if r["id"] == result.run_id)
+        assert row["input_tokens"] == 2000
+        assert row["output_tokens"] == 400
+        assert row["cost_usd"] == pytest.approx(0.008)
+        meta = json.loads(next((tmp_path / "runs").iterdir()).joinpath("meta.json").read_text())
+        assert meta["llm_usage"]["llm_calls"] == 2
+        assert [c["chunk"] for c in meta["llm_calls"]] == [0, 1]
+
+
+class TestPrefixCache:
+    def test_ollama_cached_prefix_from_prompt_eval_count(self):
+        raw = {
+            **OLLAMA_RAW,
+            "prompt_chars": 3500,  # ~1000 tokens
+            "prefix_chars": 2100,  # ~600 tokens de instruções
+            "ollama_last_chunk": {**OLLAMA_RAW["ollama_last_chunk"], "prompt_eval_count": 420},
+        }
+        usage = usage_from_raw(raw)
+        assert usage.cached_input_tokens == 580
+        assert usage.input_tokens == 1000
+
+    def test_ollama_cached_prefix_never_exceeds_prefix(self):
+        raw = {**OLLAMA_RAW, "prompt_chars": 3500, "prefix_chars": 700}
+        raw["ollama_last_chunk"] = {**OLLAMA_RAW["ollama_last_chunk"], "prompt_eval_count": 10}
+        assert usage_from_raw(raw).cached_input_tokens == 200
+
+    def test_history_shows_cached_tokens(self):
+        document_id = get_or_create_document("x.pdf", "a" * 64, 1, 10)
+        run_id = create_run(document_id, "mistral", "v1")
+        record_run_usage(run_id, {"input_tokens": 100, "cached_input_tokens": 60})
+        row = next(r for r in get_run_history() if r["id"] == run_id)
+        assert row["cached_input_tokens"] == 60